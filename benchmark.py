@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-Search 基准测试 - 本地模拟服务器 + 可比较的 JSON 报告
+
+在本机启动一个模拟 DuckDuckGo / Bing / Bing API / Tavily 响应和合成网页的 HTTP 服务器，
+可配置各路由的延迟、失败率和网页大小，完全离线运行。测量：
+  - 端到端查询延迟分位数（全部引擎正常）
+  - 首选引擎失败时的回退开销
+  - 网页抓取吞吐量与内存峰值
+  - 各解析后端每 MB 的解析耗时
+
+用法:
+  python benchmark.py                               # 输出摘要
+  python benchmark.py --output bench.json           # 保存 JSON 报告
+  python benchmark.py --compare baseline.json       # 与基线对比，退化超过阈值时返回码为 1
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import gzip
+import zlib
+import random
+import argparse
+import platform
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, parse_qs, quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import multi_search
+from multi_search import (
+    HTML_EXTRACTORS, BingAPISearch, BingScraper, DuckDuckGoSearch, HealthMonitor, HttpTransport, MultiSearch,
+    NetworkChecker, LocalIndex, PageCache, ParsePool, QuotaManager, RateLimiter, ResultCache, SearchResult,
+    TavilySearch, WebContentFetcher, _parse_page_worker, _race_lost, _report_engine_error,
+    get_html_extractor,
+)
+
+ROUTES = ("ddg", "bing", "bingapi", "tavily", "page")
+UNLIMITED = RateLimiter(path=None, limits={})
+DEFAULT_LATENCY = 0.02
+DEFAULT_PAGE_SIZE = 200 * 1024
+
+
+class MockConfig:
+    """模拟服务器配置：每个路由的延迟（秒）与失败率，合成网页大小；同时统计各路由的请求数、最大并发数和 304 响应数"""
+
+    def __init__(self, latency: float = DEFAULT_LATENCY, page_size: int = DEFAULT_PAGE_SIZE, seed: int = 1):
+        self.latency = {route: latency for route in ROUTES}
+        self.failure_rate = {route: 0.0 for route in ROUTES}
+        self.page_size = page_size
+        self.requests = {route: 0 for route in ROUTES}
+        self.peak = {route: 0 for route in ROUTES}
+        self._active = {route: 0 for route in ROUTES}
+        self.not_modified = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def begin(self, route: str):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            self._active[route] = self._active.get(route, 0) + 1
+            self.peak[route] = max(self.peak.get(route, 0), self._active[route])
+
+    def end(self, route: str):
+        with self._lock:
+            self._active[route] -= 1
+
+    def should_fail(self, route: str) -> bool:
+        rate = self.failure_rate.get(route, 0.0)
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def to_dict(self) -> Dict:
+        return {"latency": dict(self.latency), "failure_rate": dict(self.failure_rate), "page_size": self.page_size}
+
+
+def make_page(size: int, seed: int = 0) -> str:
+    """生成约 size 字节、结构接近真实文章页（导航、脚本、正文段落）的合成网页"""
+    rng = random.Random(seed)
+    words = ("search", "engine", "python", "latency", "result", "network", "cache", "agent", "page", "query",
+             "content", "parser", "thread", "socket", "budget", "quota", "fallback", "stream", "index", "token")
+    head = (f'<!DOCTYPE html><html><head><title>Synthetic page {seed}</title>'
+            f'<script>{"var t = {id: 1, events: []};" * 200}</script><style>p {{ margin: 0 }}</style></head>'
+            f'<body><header><nav>{"".join(f"<a href=/s/{i}>Section {i}</a>" for i in range(100))}</nav></header><main>')
+    parts = [head]
+    total = len(head)
+    i = 0
+    while total < size:
+        sentence = ' '.join(rng.choice(words) for _ in range(40))
+        paragraph = f'<p>Paragraph {i}: {sentence}. <a href="/ref/{i}">ref {i}</a></p>\n'
+        parts.append(paragraph)
+        total += len(paragraph)
+        i += 1
+    parts.append('</main><footer>footer</footer></body></html>')
+    return ''.join(parts)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """按路由返回各引擎格式的模拟响应"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "MockSearch/1.0"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        if 'gzip' in self.headers.get('Accept-Encoding', '') and len(body) > 1024:
+            body = gzip.compress(body, 5)
+            encoding = 'gzip'
+        else:
+            encoding = None
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _json(self, payload):
+        self._send(200, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def do_GET(self):
+        config: MockConfig = self.server.config
+        parts = urlsplit(self.path)
+        route = parts.path.strip('/').split('/')[0]
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if route == 'health':
+            self._send(200, b'ok', 'text/plain')
+            return
+
+        config.begin(route)
+        try:
+            self._respond(config, route, parts, params)
+        finally:
+            config.end(route)
+
+    def _respond(self, config: MockConfig, route: str, parts, params: Dict[str, str]):
+        query = params.get('q', 'query')
+        count = int(params.get('n') or params.get('count') or 5)
+        base = f"http://{self.headers.get('Host')}"
+
+        time.sleep(config.latency.get(route, 0.0))
+        if config.should_fail(route):
+            self._send(503, b'unavailable', 'text/plain')
+            return
+
+        links = [(f"{base}/page/{zlib.crc32(f'{query}|{i}'.encode('utf-8')) % 100000}", f"{query} result {i}")
+                 for i in range(count)]
+        snippet = f"Snippet about {query} with enough words to look like a real search result description."
+        if route == 'ddg':
+            self._json([{'title': title, 'href': href, 'body': snippet} for href, title in links])
+        elif route == 'tavily':
+            self._json({'results': [{'title': title, 'url': href, 'content': snippet} for href, title in links]})
+        elif route == 'bingapi':
+            self._json({'webPages': {'value': [{'name': title, 'url': href, 'snippet': snippet}
+                                               for href, title in links]}})
+        elif route == 'bing':
+            chrome = ''.join(f'<a href="https://www.bing.com/nav/{i}">Bing navigation {i}</a>' for i in range(200))
+            items = ''.join(
+                f'<li class="b_algo"><h2><a href="{href}">{title}</a></h2>'
+                f'<div class="b_caption"><p>{snippet}</p></div></li>'
+                for href, title in links
+            )
+            page = f'<html><head><title>{query}</title></head><body>{chrome}<ol id="b_results">{items}</ol></body></html>'
+            self._send(200, page.encode('utf-8'), 'text/html; charset=utf-8')
+        elif route == 'page':
+            seed = int(parts.path.rsplit('/', 1)[-1] or 0)
+            size = int(params.get('size') or config.page_size)
+            # 带 ETag 支持条件请求，max_age 参数控制新鲜期
+            headers = {'ETag': f'"page-{seed}-{size}"'}
+            if 'max_age' in params:
+                headers['Cache-Control'] = f"max-age={int(params['max_age'])}"
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                config.not_modified += 1
+                self._send(304, b'', 'text/html; charset=utf-8', headers)
+                return
+            self._send(200, make_page(size, seed).encode('utf-8'), 'text/html; charset=utf-8', headers)
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端收够数据后提前断开属于正常情况
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockServer:
+    """在后台线程运行的本地模拟服务器"""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or MockConfig()
+        self.httpd = _QuietHTTPServer((host, port), MockHandler)
+        self.httpd.config = self.config
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-search-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class LocalDuckDuckGo(DuckDuckGoSearch):
+    """DuckDuckGo 替身：从模拟服务器读取 DDGS 格式的条目，沿用 parse_item"""
+
+    def __init__(self, transport: HttpTransport, base_url: str):
+        super().__init__(transport)
+        self.base_url = base_url
+
+    def iter_search(self, query: str, max_results: int = 5):
+        if _race_lost():
+            return
+        try:
+            response = self.transport.get(f"{self.base_url}/ddg", params={'q': query, 'n': max_results})
+            response.raise_for_status()
+            for r in response.json():
+                yield SearchResult.from_dict(self.parse_item(r, query))
+        except Exception as e:
+            _report_engine_error(e)
+
+
+class LocalTavily(TavilySearch):
+    """Tavily 替身：从模拟服务器读取 Tavily 格式的响应，沿用 parse"""
+
+    def __init__(self, transport: HttpTransport, base_url: str):
+        super().__init__(transport)
+        self.api_key = 'benchmark'
+        self.base_url = base_url
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        if _race_lost():
+            return []
+        try:
+            response = self.transport.get(f"{self.base_url}/tavily", params={'q': query, 'n': max_results})
+            response.raise_for_status()
+            return self.parse(response.json(), query)
+        except Exception as e:
+            _report_engine_error(e)
+            return []
+
+
+class LocalBingScraper(BingScraper):
+    """Bing 爬虫替身：请求模拟服务器的结果页，解析走真实的 parse"""
+
+    def __init__(self, transport: HttpTransport, base_url: str):
+        super().__init__(transport)
+        self.base_url = base_url
+
+    def search_url(self, query: str) -> str:
+        return f"{self.base_url}/bing?q={quote(query)}"
+
+
+class LocalNetworkChecker(NetworkChecker):
+    """只探测模拟服务器、不读写磁盘缓存的网络检测器"""
+
+    def __init__(self, transport: HttpTransport, base_url: str):
+        super().__init__(transport)
+        self.PROBE_URLS = {name: f"{base_url}/health/{name}" for name in NetworkChecker.PROBE_URLS}
+
+    def _load_cache(self) -> Dict:
+        return {'availability': {}, 'last_check': '2000-01-01'}
+
+    def _write_cache(self):
+        pass
+
+
+def build_multi_search(base_url: str, transport: HttpTransport) -> MultiSearch:
+    """构建全部引擎指向模拟服务器、不读写磁盘状态的 MultiSearch"""
+    checker = LocalNetworkChecker(transport, base_url)
+    searcher = MultiSearch(
+        transport=transport,
+        result_cache=ResultCache(path=None),
+        quota_manager=QuotaManager(path=None, limits={'tavily': 10 ** 9, 'bing_api': 10 ** 9}),
+        network_checker=checker,
+        health_monitor=HealthMonitor(checker, interval=3600),
+        local_index=LocalIndex(path=None),
+        rate_limiter=UNLIMITED,
+    )
+    searcher.duckduckgo = LocalDuckDuckGo(transport, base_url)
+    searcher.duckduckgo.rate_limiter = UNLIMITED
+    searcher.bing_scraper = LocalBingScraper(transport, base_url)
+    searcher.bing_scraper.rate_limiter = UNLIMITED
+    searcher.tavily = LocalTavily(transport, base_url)
+    searcher.bing_api = BingAPISearch(transport)
+    searcher.bing_api.api_key = 'benchmark'
+    searcher.bing_api.endpoint = f"{base_url}/bingapi"
+    return searcher
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """最近秩法分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict:
+    ms = [value * 1000 for value in latencies]
+    return {
+        'count': len(ms),
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else None,
+        'p50_ms': round(percentile(ms, 50), 3) if ms else None,
+        'p90_ms': round(percentile(ms, 90), 3) if ms else None,
+        'p99_ms': round(percentile(ms, 99), 3) if ms else None,
+        'max_ms': round(max(ms), 3) if ms else None,
+    }
+
+
+def run_queries(searcher: MultiSearch, queries: int, max_results: int, prefer_quality: bool = False) -> Dict:
+    """依次执行查询（不使用结果缓存），返回延迟分布和各引擎使用次数"""
+    latencies, engines, empty = [], {}, 0
+    for i in range(queries):
+        started = time.perf_counter()
+        results = searcher.search(f"benchmark query {i}", max_results=max_results, prefer_quality=prefer_quality,
+                                  use_cache=False, verbose=False)
+        latencies.append(time.perf_counter() - started)
+        if results:
+            engines[results[0]['source']] = engines.get(results[0]['source'], 0) + 1
+        else:
+            empty += 1
+    report = summarize_latencies(latencies)
+    report.update({'engines': engines, 'empty': empty})
+    return report
+
+
+def bench_search(config: MockConfig, queries: int, max_results: int) -> Dict:
+    """全部引擎正常时的端到端查询延迟"""
+    with MockServer(config) as server:
+        transport = HttpTransport()
+        searcher = build_multi_search(server.base_url, transport)
+        run_queries(searcher, 3, max_results)
+        report = run_queries(searcher, queries, max_results)
+        searcher.health.stop()
+        transport.close()
+    return report
+
+
+def bench_fallback(config: MockConfig, queries: int, max_results: int, failed: str = 'ddg') -> Dict:
+    """首选引擎持续失败时的查询延迟（包含重试、熔断和回退到下一个引擎的开销）"""
+    failure_rate = dict(config.failure_rate)
+    config.failure_rate[failed] = 1.0
+    try:
+        with MockServer(config) as server:
+            transport = HttpTransport()
+            searcher = build_multi_search(server.base_url, transport)
+            report = run_queries(searcher, queries, max_results)
+            searcher.health.stop()
+            transport.close()
+    finally:
+        config.failure_rate = failure_rate
+    report['failed_route'] = failed
+    return report
+
+
+def bench_enrichment(config: MockConfig, pages: int, max_length: int, max_workers: int) -> Dict:
+    """并发抓取合成网页的吞吐量与内存峰值（不使用网页缓存）"""
+    with MockServer(config) as server:
+        transport = HttpTransport()
+        fetcher = WebContentFetcher(transport=transport, page_cache=PageCache(path=None),
+                                    local_index=LocalIndex(path=None), rate_limiter=UNLIMITED)
+        urls = [f"{server.base_url}/page/{i}" for i in range(pages)]
+        fetcher.fetch(urls[0], max_length, use_cache=False)
+
+        started = time.perf_counter()
+        results = fetcher.fetch_many(urls, max_length, max_workers=max_workers, per_host_limit=max_workers)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        fetcher.fetch_many(urls[:max_workers], max_length, max_workers=max_workers, per_host_limit=max_workers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        transport.close()
+
+    succeeded = sum(1 for result in results if result and result['success'])
+    return {
+        'pages': pages,
+        'succeeded': succeeded,
+        'page_bytes': config.page_size,
+        'max_length': max_length,
+        'seconds': round(elapsed, 4),
+        'pages_per_s': round(pages / elapsed, 2) if elapsed else None,
+        'peak_mb': round(peak / 1e6, 3),
+    }
+
+
+def _synthetic_article(paragraphs: int = 400) -> str:
+    """生成带大量导航、脚本和正文段落的测试网页"""
+    nav = ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(300))
+    script = 'var tracker = {id: 1, events: []};\n' * 2000
+    body = ''.join(
+        f'<p>Paragraph {i}: the quick brown fox jumps over the lazy dog &amp; keeps running '
+        f'through <b>field {i}</b> with <a href="/ref/{i}">reference {i}</a>.</p>\n'
+        for i in range(paragraphs)
+    )
+    return (f'<!DOCTYPE html><html><head><title>Synthetic article</title><script>{script}</script>'
+            f'<style>p {{ margin: 0 }}</style></head><body><header><nav><ul>{nav}</ul></nav></header>'
+            f'<main><h1>Synthetic article</h1>{body}</main><footer>{nav}</footer></body></html>')
+
+
+def _synthetic_bing(results: int = 10) -> str:
+    """生成结构与 Bing 结果页相近的测试页面"""
+    chrome = ''.join(f'<a href="https://www.bing.com/nav/{i}">Bing navigation link {i}</a>' for i in range(400))
+    items = ''.join(
+        f'<li class="b_algo"><div class="b_tpcn"><a class="tilk" href="https://example{i}.com/">'
+        f'<div class="tptt">Example {i}</div></a></div>'
+        f'<h2><a href="https://example{i}.com/page">Example result title {i}</a></h2>'
+        f'<div class="b_caption"><p class="b_lineclamp2">Snippet for result {i} describing the page.</p></div></li>'
+        for i in range(results)
+    )
+    return (f'<html><head><title>query - Search</title><script>{"var b = 1;" * 3000}</script></head>'
+            f'<body><header>{chrome}</header><ol id="b_results">{items}</ol><footer>{chrome}</footer></body></html>')
+
+
+def benchmark_extractors(pages: Optional[List[str]] = None, bing_pages: Optional[List[str]] = None,
+                         max_length: int = 5000, max_results: int = 10, rounds: int = 5) -> Dict:
+    """
+    对比各个已安装解析后端的网页正文提取和 Bing 结果提取耗时
+
+    Args:
+        pages: 用于正文提取的网页 HTML，为空时使用生成的测试网页
+        bing_pages: 用于结果提取的 Bing 结果页 HTML，为空时使用生成的测试页面
+        max_length: 正文最大长度
+        max_results: Bing 最大结果数
+        rounds: 每个后端重复的轮数（取最快一轮）
+
+    Returns:
+        {'page_bytes': ..., 'bing_bytes': ..., 'backends': {name: {'page_ms', 'bing_ms', 'mb_per_s', 'speedup'}}}
+    """
+    pages = pages or [_synthetic_article()]
+    bing_pages = bing_pages or [_synthetic_bing(max_results)]
+    page_bytes = sum(len(page.encode('utf-8')) for page in pages)
+
+    def best_of(fn, inputs, limit):
+        best = None
+        for _ in range(max(1, rounds)):
+            started = time.perf_counter()
+            for page in inputs:
+                fn(page, limit)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    backends = {}
+    for name in HTML_EXTRACTORS:
+        try:
+            extractor = get_html_extractor(name)
+        except ImportError:
+            continue
+        page_time = best_of(extractor.extract_page, pages, max_length)
+        bing_time = best_of(extractor.extract_bing, bing_pages, max_results)
+        backends[name] = {
+            'page_ms': round(page_time * 1000, 3),
+            'bing_ms': round(bing_time * 1000, 3),
+            'mb_per_s': round(page_bytes / 1e6 / page_time, 2) if page_time else None,
+        }
+
+    baseline = backends.get('bs4')
+    for stats in backends.values():
+        stats['speedup'] = round(baseline['page_ms'] / stats['page_ms'], 2) if baseline and stats['page_ms'] else None
+
+    return {
+        'page_bytes': page_bytes,
+        'bing_bytes': sum(len(page.encode('utf-8')) for page in bing_pages),
+        'backends': backends,
+    }
+
+
+def bench_parse(page_size: int, pages: int, max_length: int, rounds: int) -> Dict:
+    """各解析后端的解析耗时（每 MB）与内存峰值"""
+    corpus = [make_page(page_size, seed) for seed in range(pages)]
+    report = benchmark_extractors(corpus, max_length=max_length, rounds=rounds)
+    megabytes = report['page_bytes'] / 1e6
+    for name, stats in report['backends'].items():
+        stats['ms_per_mb'] = round(stats['page_ms'] / megabytes, 3)
+        extractor = get_html_extractor(name)
+        tracemalloc.start()
+        extractor.extract_page(corpus[0], max_length)
+        stats['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+        tracemalloc.stop()
+    return report
+
+
+def bench_parse_pool(page_size: int, pages: int, processes: int) -> Dict:
+    """
+    同一批网页由 processes 个线程并发整页解析：在线程内解析与交给解析进程池的吞吐量对比
+
+    线程内解析受 GIL 限制只能用满一个核心，进程池的吞吐量随核心数增长
+    """
+    corpus = [make_page(page_size, seed).encode('utf-8') for seed in range(pages)]
+    content_type = 'text/html; charset=utf-8'
+
+    def run(parse) -> float:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(parse, corpus))
+        return time.perf_counter() - started
+
+    inline = run(lambda data: _parse_page_worker(content_type, data, page_size))
+    pool = ParsePool(processes, min_bytes=0).start()
+    try:
+        pooled = run(lambda data: pool.parse_page(content_type, data, page_size))
+    finally:
+        pool.shutdown()
+    return {
+        'pages': pages,
+        'page_bytes': page_size,
+        'processes': processes,
+        'cpus': os.cpu_count(),
+        'inline_pages_per_s': round(pages / inline, 2),
+        'pool_pages_per_s': round(pages / pooled, 2),
+        'speedup': round(inline / pooled, 2),
+    }
+
+
+def run_benchmarks(config: Optional[MockConfig] = None, queries: int = 30, max_results: int = 5, pages: int = 24,
+                   max_length: int = 5000, max_workers: int = 8, parse_rounds: int = 3,
+                   parse_processes: int = 0) -> Dict:
+    """运行全部基准测试，返回 JSON 可序列化的报告（parse_processes > 0 时加测解析进程池）"""
+    config = config or MockConfig()
+    search = bench_search(config, queries, max_results)
+    fallback = bench_fallback(config, queries, max_results)
+    # 熔断打开后失败引擎会被跳过，p50 接近正常值，回退开销主要体现在均值和尾部分位数
+    for key in ('mean_ms', 'p50_ms', 'p90_ms'):
+        if search[key] is not None and fallback[key] is not None:
+            fallback[f'overhead_{key}'] = round(fallback[key] - search[key], 3)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'extractor': multi_search.get_html_extractor().name,
+            'config': config.to_dict(),
+        },
+        'search': search,
+        'fallback': fallback,
+        'enrichment': bench_enrichment(config, pages, max_length, max_workers),
+        'parse': bench_parse(config.page_size, 4, max_length, parse_rounds),
+    }
+    if parse_processes > 0:
+        report['parse_pool'] = bench_parse_pool(config.page_size, pages, parse_processes)
+    return report
+
+
+def comparable_metrics(report: Dict) -> Dict[str, float]:
+    """提取用于对比的指标（均为越小越好）"""
+    metrics = {}
+    for section in ('search', 'fallback'):
+        for key in ('p50_ms', 'p90_ms', 'p99_ms'):
+            if report.get(section, {}).get(key) is not None:
+                metrics[f"{section}.{key}"] = report[section][key]
+    enrichment = report.get('enrichment', {})
+    for key in ('seconds', 'peak_mb'):
+        if enrichment.get(key) is not None:
+            metrics[f"enrichment.{key}"] = enrichment[key]
+    for name, stats in report.get('parse', {}).get('backends', {}).items():
+        for key in ('ms_per_mb', 'peak_mb'):
+            if stats.get(key) is not None:
+                metrics[f"parse.{name}.{key}"] = stats[key]
+    return metrics
+
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float = 0.2) -> List[Dict]:
+    """对比两份报告，返回比基线慢（或占用更多内存）超过 threshold 比例的指标"""
+    old, new = comparable_metrics(baseline), comparable_metrics(current)
+    regressions = []
+    for key, value in new.items():
+        base = old.get(key)
+        if base and value > base * (1 + threshold):
+            regressions.append({'metric': key, 'baseline': base, 'current': value,
+                                'change': round(value / base - 1, 4)})
+    return regressions
+
+
+def print_summary(report: Dict):
+    search, fallback, enrichment = report['search'], report['fallback'], report['enrichment']
+    print(f"[Search]   p50 {search['p50_ms']} ms, p90 {search['p90_ms']} ms, p99 {search['p99_ms']} ms "
+          f"({search['count']} queries, engines: {search['engines']})")
+    print(f"[Fallback] {fallback['failed_route']} failing: p50 {fallback['p50_ms']} ms, p90 {fallback['p90_ms']} ms, "
+          f"overhead mean {fallback.get('overhead_mean_ms')} ms (engines: {fallback['engines']})")
+    print(f"[Fetch]    {enrichment['succeeded']}/{enrichment['pages']} pages in {enrichment['seconds']} s "
+          f"({enrichment['pages_per_s']} pages/s, peak {enrichment['peak_mb']} MB)")
+    for name, stats in report['parse']['backends'].items():
+        print(f"[Parse]    {name}: {stats['ms_per_mb']} ms/MB (x{stats['speedup']} vs bs4, peak {stats['peak_mb']} MB)")
+    pool = report.get('parse_pool')
+    if pool:
+        print(f"[Pool]     {pool['processes']} processes / {pool['cpus']} CPUs: {pool['pool_pages_per_s']} pages/s vs "
+              f"{pool['inline_pages_per_s']} pages/s in threads (x{pool['speedup']})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-Search offline benchmark")
+    parser.add_argument('--queries', type=int, default=30, help="每个场景的查询次数")
+    parser.add_argument('--max-results', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help="模拟服务器每个请求的延迟（秒）")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="所有路由的随机失败率")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="合成网页大小（字节）")
+    parser.add_argument('--pages', type=int, default=24, help="抓取场景的网页数")
+    parser.add_argument('--max-length', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=8, help="抓取并发数")
+    parser.add_argument('--parse-processes', type=int, default=0, help="对比解析进程池的工作进程数（0 表示不测）")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="将 JSON 报告写入文件")
+    parser.add_argument('--json', action='store_true', help="在标准输出打印 JSON 报告")
+    parser.add_argument('--compare', help="基线 JSON 报告，存在退化时返回码为 1")
+    parser.add_argument('--threshold', type=float, default=0.2, help="允许的退化比例")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(latency=args.latency, page_size=args.page_size, seed=args.seed)
+    config.failure_rate = {route: args.failure_rate for route in ROUTES}
+    report = run_benchmarks(config, args.queries, args.max_results, args.pages, args.max_length, args.workers,
+                            parse_processes=args.parse_processes)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_summary(report)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        for item in regressions:
+            print(f"[REGRESSION] {item['metric']}: {item['baseline']} -> {item['current']} (+{item['change']:.0%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
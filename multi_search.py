@@ -9,23 +9,484 @@ Multi-Search Skill - 智能多引擎搜索
 import os
 import sys
 import json
+import math
+import zlib
 import re
 import html
 import time
+import codecs
+import atexit
+import weakref
+import importlib
+import contextlib
+import threading
+import contextvars
+from collections import Counter, OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from urllib.parse import quote
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit, urlunsplit, parse_qsl, urlencode
+
+if TYPE_CHECKING:
+    import sqlite3
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+_IMPORT_STARTED = time.perf_counter()
 
 if sys.platform == 'win32':
-    import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
 
 QUOTA_FILE = os.path.join(os.path.dirname(__file__), "quota.json")
+QUOTA_DB_FILE = os.path.join(os.path.dirname(__file__), "quota.db")
 NETWORK_CACHE_FILE = os.path.join(os.path.dirname(__file__), "network_cache.json")
 API_KEYS_FILE = os.path.join(os.path.dirname(__file__), "api_keys.json")
+RESULT_CACHE_FILE = os.path.join(os.path.dirname(__file__), "result_cache.db")
+PAGE_CACHE_FILE = os.path.join(os.path.dirname(__file__), "page_cache.db")
+RATE_LIMIT_FILE = os.path.join(os.path.dirname(__file__), "rate_limit.db")
+LOCAL_INDEX_FILE = os.path.join(os.path.dirname(__file__), "local_index.db")
+FINGERPRINT_FILE = os.path.join(os.path.dirname(__file__), "fingerprints.db")
+DAEMON_SOCKET_FILE = os.path.join(os.path.dirname(__file__), "multi_search.sock")
 MAX_TAVILY_QUOTA = 1000
 MAX_BING_API_QUOTA = 1000
+QUOTA_LIMITS = {"tavily": MAX_TAVILY_QUOTA, "bing_api": MAX_BING_API_QUOTA}
+QUOTA_LEASE_SIZE = 1
+QUOTA_LEASE_TTL = 30.0
+RATE_LIMIT_ENABLED = os.environ.get("MULTI_SEARCH_RATE_LIMIT", "1") != "0"
+RATE_LIMITS = {"duckduckgo": (1.0, 3), "bing": (1.0, 3), "host": (2.0, 4)}
+RATE_LIMIT_MAX_WAIT = 30.0
+RATE_LIMIT_DEFAULT_PENALTY = 30.0
+RATE_LIMIT_MAX_PENALTY = 600.0
 NETWORK_CHECK_INTERVAL = 300
+STATE_FLUSH_DELAY = 2.0
+HEALTH_FAILURE_THRESHOLD = 3
+HEALTH_COOLDOWN = 60
+HEALTH_EWMA_ALPHA = 0.3
+ENGINE_STATS_WINDOW = 100
+ENGINE_STATS_MAX_AGE = 600
+ENGINE_PROFILES = {
+    "tavily": {"label": "Tavily", "quality": 5, "paid": True},
+    "duckduckgo": {"label": "DuckDuckGo", "quality": 3, "paid": False},
+    "bing_api": {"label": "Bing API", "quality": 4, "paid": True},
+    "bing": {"label": "Bing Scraper", "quality": 3, "paid": False},
+}
+FETCH_MAX_WORKERS = 8
+FETCH_PER_HOST_LIMIT = 2
+FETCH_CHUNK_SIZE = 16384
+FETCH_BYTES_PER_CHAR = 200
+FETCH_MIN_BYTES = 512 * 1024
+FETCH_MAX_BYTES = 8 * 1024 * 1024
+FETCH_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml")
+HTTP_POOL_CONNECTIONS = 20
+HTTP_POOL_MAXSIZE = 16
+HTTP_MAX_RETRIES = 2
+HTTP_BACKOFF_FACTOR = 0.3
+HTTP_TIMEOUT = 15
+ASYNC_MAX_CONNECTIONS = 100
+RESULT_CACHE_MEMORY_SIZE = 256
+RESULT_CACHE_DISK_SIZE = 5000
+RESULT_CACHE_TTL = {
+    "tavily": 24 * 3600,
+    "bing_api": 24 * 3600,
+    "duckduckgo": 6 * 3600,
+    "bing_scraper": 3600,
+}
+RESULT_CACHE_DEFAULT_TTL = 3600
+PAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PAGE_CACHE_TTL = 600
+PAGE_CACHE_MAX_TTL = 86400
+PAGE_CACHE_COMPRESS_LEVEL = 6
+LOCAL_INDEX_ENABLED = os.environ.get("MULTI_SEARCH_LOCAL_INDEX", "1") != "0"
+LOCAL_INDEX_MAX_DOCS = 20000
+LOCAL_INDEX_MAX_BYTES = 128 * 1024 * 1024
+LOCAL_INDEX_RETENTION = 30 * 86400
+LOCAL_INDEX_FRESHNESS = 86400
+LOCAL_INDEX_MIN_HITS = 3
+LOCAL_INDEX_COMPACT_EVERY = 200
+DEDUP_ENABLED = os.environ.get("MULTI_SEARCH_DEDUP", "1") != "0"
+DEDUP_DISTANCE = 3
+DEDUP_SHINGLE = 3
+DEDUP_MIN_SHINGLES = 8
+DEDUP_MAX_ENTRIES = 50000
+DEDUP_TTL = 7 * 86400
+DEDUP_COMPACT_EVERY = 200
+RACE_HEDGE_DELAY = 0.0
+RACE_MAX_WORKERS = 8
+SEARCH_MANY_CONCURRENCY = 4
+SEARCH_VERBOSE = os.environ.get("MULTI_SEARCH_QUIET", "0") != "1"
+PARSE_PROCESSES = int(os.environ.get("MULTI_SEARCH_PARSE_PROCESSES", "0"))
+PARSE_POOL_MIN_BYTES = 256 * 1024
+DAEMON_ADDRESS = os.environ.get("MULTI_SEARCH_DAEMON", "unix:" + DAEMON_SOCKET_FILE)
+DAEMON_TIMEOUT = 120.0
+DAEMON_RETRY_INTERVAL = 5.0
+DAEMON_QUOTA_LEASE = 10
+HTML_EXTRACTOR_ORDER = ("selectolax", "lxml", "stream")
+HTML_SKIP_TAGS = frozenset({"script", "style", "nav", "footer", "header", "noscript", "template"})
+HTML_FEED_CHUNK = 32768
+HTML_PREFIX_CHARS = 65536
+HTML_PREFIX_FACTOR = 8
+PASSAGE_CHARS = 400
+PASSAGE_TOP_K = 8
+PASSAGE_BUDGET = 4000
+PASSAGE_POOL_FACTOR = 4
+PASSAGE_SEPARATOR = "\n...\n"
+SNIPPET_CHARS = 200
+BM25_K1 = 1.2
+BM25_B = 0.75
+METRICS_ENABLED = os.environ.get("MULTI_SEARCH_METRICS", "1") != "0"
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "yclid", "dclid", "mc_cid", "mc_eid", "spm", "ref", "ref_src", "igshid"}
+
+_lazy_modules: Dict[str, object] = {}
+_STARTUP = {"import_ms": None, "first_query_ms": None}
+
+
+def lazy_import(*names: str):
+    """按顺序尝试导入模块并缓存，可选依赖在对应引擎首次使用时才加载"""
+    for name in names:
+        module = _lazy_modules.get(name)
+        if module is not None:
+            return module
+
+    error = None
+    for name in names:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            error = error or e
+            continue
+        _lazy_modules[name] = module
+        return module
+    raise error
+
+
+class _LazyObject:
+    """首次使用时才调用 factory(*args) 创建的对象代理，避免 logging、大字符集正则等拖慢 import"""
+
+    def __init__(self, factory: Callable, *args):
+        self._factory = factory
+        self._args = args
+        self._target = None
+
+    def __getattr__(self, attr):
+        if self._target is None:
+            self._target = self._factory(*self._args)
+        return getattr(self._target, attr)
+
+
+logger = _LazyObject(lambda: lazy_import('logging').getLogger("multi_search"))
+
+
+class _WriteBehind:
+    """延迟写回 - 合并短时间内的多次保存，进程退出时统一写回"""
+
+    _instances: "weakref.WeakSet[_WriteBehind]" = weakref.WeakSet()
+
+    def __init__(self, flush: Callable[[], None], delay: float = STATE_FLUSH_DELAY):
+        self._flush = flush
+        self.delay = delay
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        _WriteBehind._instances.add(self)
+
+    def mark_dirty(self):
+        """标记状态已修改，delay 秒后写回"""
+        with self._lock:
+            self._dirty = True
+            if self.delay > 0 and self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.delay <= 0:
+            self.flush()
+
+    def flush(self):
+        """立即写回未保存的修改"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+        self._flush()
+
+    @classmethod
+    def flush_all(cls):
+        for writer in list(cls._instances):
+            writer.flush()
+
+
+atexit.register(_WriteBehind.flush_all)
+
+
+class Span:
+    """一次被计时的阶段（OpenTelemetry 风格），传给 span 钩子"""
+
+    __slots__ = ("name", "attributes", "parent", "start_time", "end_time", "error", "context")
+
+    def __init__(self, name: str, attributes: Dict, parent: Optional["Span"]):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self.context: Dict = {}
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.end_time - self.start_time if self.end_time is not None else None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+
+class SpanHook:
+    """span 钩子基类：阶段开始与结束时调用，钩子内的异常会被忽略"""
+
+    def on_start(self, span: Span):
+        pass
+
+    def on_end(self, span: Span):
+        pass
+
+
+class OpenTelemetryHook(SpanHook):
+    """将 span 转发给 OpenTelemetry tracer（需要安装 opentelemetry-api）"""
+
+    def __init__(self, tracer=None):
+        self.trace = lazy_import('opentelemetry.trace')
+        self.tracer = tracer or self.trace.get_tracer("multi_search")
+
+    def on_start(self, span: Span):
+        parent = span.parent.context.get('otel') if span.parent is not None else None
+        context = self.trace.set_span_in_context(parent) if parent is not None else None
+        span.context['otel'] = self.tracer.start_span(f"multi_search.{span.name}", context=context,
+                                                      attributes=dict(span.attributes))
+
+    def on_end(self, span: Span):
+        otel_span = span.context.pop('otel', None)
+        if otel_span is None:
+            return
+        for key, value in span.attributes.items():
+            otel_span.set_attribute(key, value)
+        if span.error:
+            otel_span.set_status(self.trace.Status(self.trace.StatusCode.ERROR, span.error))
+        otel_span.end()
+
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """指标关闭时使用的空 span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _SpanScope:
+    """计时一个阶段：记录到 stage_seconds 并通知 span 钩子"""
+
+    __slots__ = ("metrics", "name", "labels", "attributes", "span", "token", "started")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict, attributes: Optional[Dict]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.attributes = attributes
+
+    def __enter__(self):
+        # 没有钩子时只计时，不创建 Span 对象
+        if self.metrics.hooks:
+            self.span = Span(self.name, dict(self.labels, **(self.attributes or {})), _current_span.get())
+            self.token = _current_span.set(self.span)
+            self.metrics._notify('on_start', self.span)
+        else:
+            self.span = None
+        self.started = time.perf_counter()
+        return self.span or _NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        self.metrics.observe("stage_seconds", elapsed, stage=self.name, **self.labels)
+        span = self.span
+        if span is not None:
+            span.end_time = span.start_time + elapsed
+            if exc is not None:
+                span.error = f"{exc_type.__name__}: {exc}"
+            _current_span.reset(self.token)
+            self.metrics._notify('on_end', span)
+        return False
+
+
+class Metrics:
+    """
+    进程内指标注册表 - 计数器与阶段耗时直方图，可挂接 span 钩子
+
+    关闭时 inc / observe 直接返回，span 返回共享的空对象，热路径几乎没有额外开销。
+    snapshot() 返回字典，to_prometheus() 输出 Prometheus 文本格式
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, buckets=METRICS_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.hooks: List[SpanHook] = []
+        self._counters: Dict[Tuple, float] = {}
+        self._timers: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加 value"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """记录一次耗时（秒）"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = [0, 0.0, 0.0, [0] * len(self.buckets)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+            for idx, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    timer[3][idx] += 1
+                    break
+
+    def span(self, name: str, attributes: Optional[Dict] = None, **labels):
+        """
+        计时一个阶段的上下文管理器
+
+        labels 同时作为指标标签和 span 属性（应为取值有限的字段，如引擎名）；
+        attributes 只传给 span 钩子（可包含查询词、URL 等）
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _SpanScope(self, name, labels, attributes)
+
+    def add_hook(self, hook: SpanHook):
+        """添加 span 钩子（需要 on_start / on_end 方法）"""
+        with self._lock:
+            self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook: SpanHook):
+        with self._lock:
+            self.hooks = [h for h in self.hooks if h is not hook]
+
+    def _notify(self, event: str, span: Span):
+        for hook in self.hooks:
+            try:
+                getattr(hook, event)(span)
+            except Exception:
+                pass
+
+    def reset(self):
+        """清空已记录的指标"""
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    @staticmethod
+    def _format_labels(labels: Tuple, extra: Tuple = ()) -> str:
+        items = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                 for k, v in labels + extra]
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}" if items else ""
+
+    def snapshot(self) -> Dict:
+        """获取全部指标：{'counters': {...}, 'timers': {...}}，键为 name{label=value,...}"""
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {key: (timer[0], timer[1], timer[2]) for key, timer in self._timers.items()}
+
+        def label_key(name, labels):
+            return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        return {
+            "enabled": self.enabled,
+            "counters": {label_key(*key): value for key, value in sorted(counters.items())},
+            "timers": {
+                label_key(*key): {"count": count, "total_ms": round(total * 1000, 3),
+                                  "mean_ms": round(total / count * 1000, 3) if count else None,
+                                  "max_ms": round(peak * 1000, 3)}
+                for key, (count, total, peak) in sorted(timers.items())
+            },
+        }
+
+    def to_prometheus(self, prefix: str = "multi_search_") -> str:
+        """导出为 Prometheus 文本格式（计数器 + 直方图）"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted((key, (timer[0], timer[1], list(timer[3]))) for key, timer in self._timers.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {prefix}{name} counter")
+            lines.append(f"{prefix}{name}{self._format_labels(labels)} {value}")
+        for (name, labels), (count, total, buckets) in timers:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {prefix}{name} histogram")
+            cumulative = 0
+            for bound, hits in zip(self.buckets, buckets):
+                cumulative += hits
+                lines.append(f"{prefix}{name}_bucket{self._format_labels(labels, (('le', repr(float(bound))),))} "
+                             f"{cumulative}")
+            lines.append(f"{prefix}{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{prefix}{name}_sum{self._format_labels(labels)} {total}")
+            lines.append(f"{prefix}{name}_count{self._format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """获取进程内共享的指标注册表"""
+    return _metrics
+
+
+def configure_metrics(enabled: Optional[bool] = None, hooks: Optional[List[SpanHook]] = None,
+                      reset: bool = False) -> Metrics:
+    """
+    配置指标收集
+
+    Args:
+        enabled: 开启或关闭指标收集（关闭后热路径几乎无开销）
+        hooks: 替换全部 span 钩子（如 [OpenTelemetryHook()]）
+        reset: 清空已记录的指标
+    """
+    if enabled is not None:
+        _metrics.enabled = enabled
+    if hooks is not None:
+        _metrics.hooks = list(hooks)
+    if reset:
+        _metrics.reset()
+    return _metrics
+
 
 def get_api_key(service: str) -> Optional[str]:
     """从环境变量或配置文件获取 API key"""
@@ -43,11 +504,255 @@ def get_api_key(service: str) -> Optional[str]:
     return None
 
 
+class HttpTransport:
+    """共享 HTTP 传输层 - 按主机保持长连接池，统一配置重试与超时策略"""
+
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 max_retries: int = HTTP_MAX_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR,
+                 timeout: float = HTTP_TIMEOUT):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _build_retry(self):
+        """构建重试策略：连接错误与 5xx 响应按指数退避重试，读取超时不重试（请求可能已在服务端执行）"""
+        Retry = lazy_import('urllib3.util.retry').Retry
+
+        options = dict(
+            total=self.max_retries,
+            read=False,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        try:
+            return Retry(allowed_methods=frozenset(['GET', 'HEAD']), **options)
+        except TypeError:
+            return Retry(method_whitelist=frozenset(['GET', 'HEAD']), **options)
+
+    @property
+    def session(self):
+        """延迟创建的共享 requests.Session"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    requests = lazy_import('requests')
+                    HTTPAdapter = lazy_import('requests.adapters').HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_connections,
+                        pool_maxsize=self.pool_maxsize,
+                        max_retries=self._build_retry(),
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs):
+        """发送 GET 请求，未指定 timeout 时使用统一超时"""
+        return self.session.get(url, timeout=timeout if timeout is not None else self.timeout, **kwargs)
+
+    def close(self):
+        """关闭连接池"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+_tavily_clients: Dict[str, object] = {}
+_tavily_clients_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """获取进程内共享的 HTTP 传输层"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
+
+
+def configure_transport(**kwargs) -> HttpTransport:
+    """
+    重新配置共享 HTTP 传输层（连接池大小、重试、超时等）
+
+    之后创建的引擎、网络检测器和网页抓取器都会使用新的传输层
+    """
+    global _transport
+    with _transport_lock:
+        old = _transport
+        _transport = HttpTransport(**kwargs)
+    if old is not None:
+        old.close()
+    return _transport
+
+
+def get_tavily_client(api_key: str, use_async: bool = False):
+    """获取复用的 TavilyClient / AsyncTavilyClient（按 API key 缓存）"""
+    cache_key = f"{'async' if use_async else 'sync'}:{api_key}"
+    client = _tavily_clients.get(cache_key)
+    if client is None:
+        with _tavily_clients_lock:
+            client = _tavily_clients.get(cache_key)
+            if client is None:
+                tavily = lazy_import('tavily')
+                if use_async:
+                    if not hasattr(tavily, 'AsyncTavilyClient'):
+                        raise ImportError("tavily-python without AsyncTavilyClient")
+                    client = tavily.AsyncTavilyClient(api_key=api_key)
+                else:
+                    client = tavily.TavilyClient(api_key=api_key)
+                _tavily_clients[cache_key] = client
+    return client
+
+
+class AsyncResponse:
+    """异步 HTTP 响应（get 返回时已读取完整响应体，stream 返回时通过 iter_chunks 逐块读取）"""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], text: Optional[str] = None,
+                 chunks: Optional[Callable] = None):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.text = text
+        self._chunks = chunks
+
+    def iter_chunks(self):
+        """逐块读取（已解压的）响应体"""
+        return self._chunks()
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise IOError(f"HTTP {self.status} for url: {self.url}")
+
+
+class AsyncHttpClient:
+    """
+    事件循环内共享的异步 HTTP 客户端
+
+    安装了 aiohttp 时使用带连接池的 aiohttp.ClientSession；
+    否则回退为在线程池中调用共享的同步 HttpTransport
+    """
+
+    def __init__(self, max_connections: int = ASYNC_MAX_CONNECTIONS, per_host: int = HTTP_POOL_MAXSIZE,
+                 timeout: float = HTTP_TIMEOUT):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self._session = None
+        self._loop = None
+
+    def _get_session(self):
+        """获取绑定当前事件循环的 aiohttp 会话，未安装 aiohttp 时返回 None"""
+        import asyncio
+        try:
+            aiohttp = lazy_import('aiohttp')
+        except ImportError:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host,
+                                             ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    async def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None,
+                  timeout: Optional[float] = None) -> AsyncResponse:
+        """发送 GET 请求并读取完整响应"""
+        import asyncio
+        timeout = timeout if timeout is not None else self.timeout
+        session = self._get_session()
+        if session is None:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: get_transport().get(url, timeout=timeout, headers=headers, params=params)
+            )
+            return AsyncResponse(response.url, response.status_code, dict(response.headers), response.text)
+
+        aiohttp = lazy_import('aiohttp')
+        async with session.get(url, headers=headers, params=params,
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            text = await response.text(errors='replace')
+            return AsyncResponse(str(response.url), response.status, dict(response.headers), text)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None,
+                     chunk_size: int = FETCH_CHUNK_SIZE):
+        """发送流式 GET 请求，退出上下文时关闭响应（未读完的响应体不再下载）"""
+        import asyncio
+        timeout = timeout if timeout is not None else self.timeout
+        session = self._get_session()
+        if session is None:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: get_transport().get(url, timeout=timeout, headers=headers, stream=True)
+            )
+            chunks = response.iter_content(chunk_size)
+
+            async def iter_chunks():
+                while True:
+                    chunk = await loop.run_in_executor(None, next, chunks, None)
+                    if chunk is None:
+                        return
+                    yield chunk
+
+            try:
+                yield AsyncResponse(response.url, response.status_code, dict(response.headers), chunks=iter_chunks)
+            finally:
+                response.close()
+            return
+
+        aiohttp = lazy_import('aiohttp')
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            yield AsyncResponse(str(response.url), response.status, dict(response.headers),
+                                chunks=lambda: response.content.iter_chunked(chunk_size))
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+_async_client: Optional[AsyncHttpClient] = None
+
+
+def get_async_client() -> AsyncHttpClient:
+    """获取进程内共享的异步 HTTP 客户端"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncHttpClient()
+    return _async_client
+
+
 class NetworkChecker:
-    """网络环境检测器 - 检测各引擎可用性"""
+    """网络环境检测器 - 探测各引擎首页并持久化结果，状态由 HealthMonitor 维护"""
     
-    def __init__(self):
+    PROBE_URLS = {
+        'duckduckgo': 'https://duckduckgo.com/html/?q=test',
+        'bing': 'https://www.bing.com',
+    }
+    
+    def __init__(self, transport: Optional[HttpTransport] = None):
+        self.transport = transport or get_transport()
         self.cache = self._load_cache()
+        self._writer = _WriteBehind(self._write_cache)
     
     def _load_cache(self) -> Dict:
         """加载网络检测缓存"""
@@ -56,567 +761,4777 @@ class NetworkChecker:
                 with open(NETWORK_CACHE_FILE, 'r', encoding='utf-8') as f:
                     cache = json.load(f)
                     last_check = datetime.fromisoformat(cache.get('last_check', '2000-01-01'))
-                    if (datetime.now() - last_check).seconds < NETWORK_CHECK_INTERVAL:
+                    if (datetime.now() - last_check).total_seconds() < NETWORK_CHECK_INTERVAL:
                         return cache
             except:
                 pass
         return {'availability': {}, 'last_check': datetime.now().isoformat()}
     
     def _save_cache(self):
-        """保存网络检测缓存"""
+        """更新网络检测缓存，延迟写回磁盘"""
+        self.cache['last_check'] = datetime.now().isoformat()
+        self._writer.mark_dirty()
+    
+    def _write_cache(self):
+        """将网络检测缓存写入磁盘"""
         try:
-            self.cache['last_check'] = datetime.now().isoformat()
             with open(NETWORK_CACHE_FILE, 'w', encoding='utf-8') as f:
                 json.dump(self.cache, f, indent=2)
         except Exception as e:
-            print(f"[WARN] Failed to save network cache: {e}")
+            logger.warning("Failed to save network cache: %s", e)
     
-    def check_duckduckgo(self, force: bool = False) -> bool:
-        """检测 DuckDuckGo 是否可用"""
-        if not force and 'duckduckgo' in self.cache['availability']:
-            return self.cache['availability']['duckduckgo']
-        
-        try:
-            import requests
-            response = requests.get(
-                'https://duckduckgo.com/html/?q=test',
-                timeout=5,
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            )
-            available = response.status_code == 200
-            self.cache['availability']['duckduckgo'] = available
-            self._save_cache()
-            return available
-        except:
-            self.cache['availability']['duckduckgo'] = False
-            self._save_cache()
+    def probe(self, engine: str) -> bool:
+        """直接探测引擎首页是否可访问（不读写缓存），支持 duckduckgo 和 bing"""
+        with _metrics.span("network_check", engine=engine):
+            try:
+                response = self.transport.get(
+                    self.PROBE_URLS[engine],
+                    timeout=5,
+                    headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+                )
+                return response.status_code == 200
+            except:
+                return False
+
+
+class EngineHealth:
+    """单个引擎的健康状态 - EWMA 成功率与延迟，带熔断器"""
+    
+    def __init__(self, available: bool = True):
+        self.success_rate = 1.0 if available else 0.0
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.samples = 0
+        self.state = "closed" if available else "open"
+        self.opened_at = 0.0 if available else time.monotonic()
+        self.trial_started: Optional[float] = None
+    
+    def record(self, success: bool, latency: float):
+        """记录一次请求或探测结果，连续失败达到阈值时熔断"""
+        alpha = HEALTH_EWMA_ALPHA
+        self.samples += 1
+        self.trial_started = None
+        self.success_rate = (1 - alpha) * self.success_rate + alpha * (1.0 if success else 0.0)
+        self.latency = latency if self.latency is None else (1 - alpha) * self.latency + alpha * latency
+        if success:
+            self.failures = 0
+            self.state = "closed"
+        else:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= HEALTH_FAILURE_THRESHOLD:
+                self.trip()
+    
+    def allow(self) -> bool:
+        """是否允许请求：熔断冷却期过后进入半开状态，半开时只在没有试探请求进行中时放行"""
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= HEALTH_COOLDOWN:
+            self.state = "half_open"
+        if self.state == "half_open":
+            # 试探请求迟迟没有结果（线程被占用等）时，冷却期过后允许再试探一次
+            return self.trial_started is None or now - self.trial_started >= HEALTH_COOLDOWN
+        return self.state != "open"
+    
+    def trip(self):
+        """立即熔断"""
+        self.state = "open"
+        self.opened_at = time.monotonic()
+    
+    def begin(self) -> bool:
+        """开始一次请求，半开状态下占用唯一的试探名额"""
+        if not self.allow():
             return False
+        if self.state == "half_open":
+            self.trial_started = time.monotonic()
+        return True
     
-    def check_bing(self, force: bool = False) -> bool:
-        """检测 Bing 是否可用"""
-        if not force and 'bing' in self.cache['availability']:
-            return self.cache['availability']['bing']
-        
+    def to_dict(self) -> Dict:
+        return {
+            "state": self.state,
+            "success_rate": round(self.success_rate, 4),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "consecutive_failures": self.failures,
+            "samples": self.samples,
+        }
+
+
+class HealthMonitor:
+    """
+    后台健康监控 - 定时并行探测各引擎，结合实际搜索结果维护健康状态
+
+    搜索路径只读取内存中的状态，从不阻塞在探测上：状态从网络检测缓存恢复，没有缓存的引擎先视为可用，
+    由后台线程立即探测一轮来确定。Tavily 和 Bing API 不做主动探测（探测会消耗配额），只根据实际调用结果更新。
+    探测结果每轮合并写回一次网络检测缓存。
+    """
+    
+    ENGINES = ("duckduckgo", "bing", "tavily", "bing_api")
+    
+    def __init__(self, network_checker: Optional[NetworkChecker] = None, interval: float = NETWORK_CHECK_INTERVAL):
+        self.network_checker = network_checker or NetworkChecker()
+        self.interval = interval
+        cached = self.network_checker.cache.get('availability', {})
+        self.engines = {name: EngineHealth(cached.get(name, True)) for name in self.ENGINES}
+        self.probes = {name: (lambda name=name: self.network_checker.probe(name))
+                       for name in NetworkChecker.PROBE_URLS}
+        self._unknown = {name for name in self.probes if name not in cached}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """启动后台探测线程（重复调用无副作用）"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="multi-search-health", daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        """停止后台探测线程"""
+        self._stop.set()
+    
+    def _run(self):
+        # 磁盘缓存仍在有效期内时，等到缓存过期再进行第一轮探测
+        self._stop.wait(self._cache_remaining())
+        while not self._stop.is_set():
+            self.probe_all()
+            self._stop.wait(self.interval)
+    
+    def _cache_remaining(self) -> float:
+        cache = self.network_checker.cache
+        if not cache.get('availability') or self._unknown:
+            return 0.0
         try:
-            import requests
-            response = requests.get(
-                'https://www.bing.com',
-                timeout=5,
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            )
-            available = response.status_code == 200
-            self.cache['availability']['bing'] = available
-            self._save_cache()
-            return available
-        except:
-            self.cache['availability']['bing'] = False
-            self._save_cache()
-            return False
+            age = (datetime.now() - datetime.fromisoformat(cache['last_check'])).total_seconds()
+        except (KeyError, ValueError):
+            return 0.0
+        return max(0.0, self.interval - age)
     
-    def check_tavily(self, force: bool = False) -> bool:
-        """检测 Tavily API 是否可用（需要配置 API key）"""
-        api_key = get_api_key('TAVILY')
-        if not api_key:
-            return False
+    def probe_all(self) -> Dict[str, bool]:
+        """并行探测所有可主动探测的引擎，返回本轮探测结果"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def timed_probe(probe):
+            started = time.perf_counter()
+            return probe(), time.perf_counter() - started
         
-        if not force and 'tavily' in self.cache['availability']:
-            return self.cache['availability']['tavily']
+        with ThreadPoolExecutor(max_workers=len(self.probes)) as executor:
+            futures = {name: executor.submit(timed_probe, probe) for name, probe in self.probes.items()}
+            outcomes = {name: future.result() for name, future in futures.items()}
         
-        try:
-            from tavily import TavilyClient
-            client = TavilyClient(api_key=api_key)
-            response = client.search(query='test', max_results=1)
-            available = len(response.get('results', [])) >= 0
-            self.cache['availability']['tavily'] = available
-            self._save_cache()
-            return available
-        except:
-            self.cache['availability']['tavily'] = False
-            self._save_cache()
-            return False
+        for name, (success, latency) in outcomes.items():
+            self.record(name, success, latency)
+        
+        self.network_checker.cache['availability'].update({name: ok for name, (ok, _) in outcomes.items()})
+        self.network_checker._save_cache()
+        return {name: ok for name, (ok, _) in outcomes.items()}
     
-    def get_availability(self, force_check: bool = False) -> Dict[str, bool]:
-        """获取所有引擎的可用性状态"""
-        return {
-            'duckduckgo': self.check_duckduckgo(force_check),
-            'bing': self.check_bing(force_check),
-            'tavily': self.check_tavily(force_check)
-        }
+    def record(self, engine: str, success: bool, latency: float):
+        """记录一次实际请求或探测结果"""
+        with self._lock:
+            unknown = engine in self._unknown
+            self._unknown.discard(engine)
+            health = self.engines.get(engine)
+            if health is not None:
+                health.record(success, latency)
+                if unknown and not success:
+                    # 没有缓存时第一次结果就失败，与缓存记录为不可用时一样直接熔断
+                    health.trip()
+    
+    def is_available(self, engine: str) -> bool:
+        """O(1) 读取引擎当前是否可用（不占用半开试探名额）"""
+        with self._lock:
+            health = self.engines.get(engine)
+            return health.allow() if health is not None else True
+    
+    def begin(self, engine: str) -> bool:
+        """
+        开始一次实际请求，返回是否放行
+
+        熔断半开时只放行一个试探请求，试探返回（record）或放弃（release）之前其余请求视为不可用
+        """
+        with self._lock:
+            health = self.engines.get(engine)
+            return health.begin() if health is not None else True
+    
+    def release(self, engine: str):
+        """放弃已开始但没有结果可记录的请求（被取消或提前结束），归还半开试探名额"""
+        with self._lock:
+            health = self.engines.get(engine)
+            if health is not None:
+                health.trial_started = None
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """获取所有引擎的健康状态"""
+        with self._lock:
+            return {name: health.to_dict() for name, health in self.engines.items()}
 
 
 class QuotaManager:
-    """管理 API 使用配额"""
+    """
+    管理 API 使用配额 - SQLite (WAL) 持久化，多进程共享同一配额计数
+
+    每次扣减都在 BEGIN IMMEDIATE 事务中原子完成，多个进程并发使用也不会超出上限。
+    lease_size > 1 时一次预占多个额度在内存中扣减，把多次写入合并为一次；
+    未用完的预占额度在 QUOTA_LEASE_TTL 秒后或进程退出时归还。
+    月度重置按 "YYYY-MM" 周期在扣减时顺带完成，只读查询不写盘。
+    """
     
-    def __init__(self):
-        self.quota_data = self._load_quota()
+    def __init__(self, path: Optional[str] = QUOTA_DB_FILE, limits: Optional[Dict[str, int]] = None,
+                 lease_size: int = QUOTA_LEASE_SIZE):
+        self.path = path
+        self.limits = self._resolve_limits(limits)
+        self.lease_size = max(1, lease_size)
+        self._leases: Dict[str, List] = {}
+        self._memory: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._db = self._open_db() if path else None
+        self._writer = _WriteBehind(self.release_leases, delay=QUOTA_LEASE_TTL)
     
-    def _load_quota(self) -> Dict:
-        """加载配额数据"""
-        if os.path.exists(QUOTA_FILE):
-            try:
-                with open(QUOTA_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {
-            "tavily": {"used": 0, "month": datetime.now().month},
-            "bing_api": {"used": 0, "month": datetime.now().month},
-            "last_reset": datetime.now().isoformat()
-        }
+    @staticmethod
+    def _resolve_limits(limits: Optional[Dict[str, int]]) -> Dict[str, int]:
+        """合并默认上限、环境变量 {SERVICE}_QUOTA_LIMIT 与传入的上限"""
+        resolved = dict(QUOTA_LIMITS)
+        for service in resolved:
+            env_limit = os.environ.get(f"{service.upper()}_QUOTA_LIMIT")
+            if env_limit and env_limit.isdigit():
+                resolved[service] = int(env_limit)
+        resolved.update(limits or {})
+        return resolved
     
-    def _save_quota(self):
-        """保存配额数据"""
+    @staticmethod
+    def _current_period() -> str:
+        return datetime.now().strftime("%Y-%m")
+    
+    def _open_db(self) -> Optional["sqlite3.Connection"]:
+        """打开配额数据库，首次创建时导入旧版 quota.json 中本月的用量"""
         try:
-            with open(QUOTA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.quota_data, f, indent=2)
+            db = lazy_import('sqlite3').connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS quota (service TEXT PRIMARY KEY, period TEXT, used INTEGER)")
+            legacy = self._load_legacy_quota()
+            for service, used in legacy.items():
+                db.execute("INSERT OR IGNORE INTO quota (service, period, used) VALUES (?, ?, ?)",
+                           (service, self._current_period(), used))
+            return db
         except Exception as e:
-            print(f"[WARN] Failed to save quota: {e}")
-    
-    def _check_month_reset(self):
-        """检查是否需要月度重置"""
-        current_month = datetime.now().month
-        for service in ["tavily", "bing_api"]:
-            if self.quota_data[service]["month"] != current_month:
-                self.quota_data[service]["used"] = 0
-                self.quota_data[service]["month"] = current_month
-                print(f"[INFO] Reset {service} quota for new month")
-        self._save_quota()
+            logger.warning("Quota database unavailable, counting in memory only: %s", e)
+            return None
+    
+    def _load_legacy_quota(self) -> Dict[str, int]:
+        """读取旧版 quota.json 中当月的已用次数"""
+        if not os.path.exists(QUOTA_FILE):
+            return {}
+        try:
+            with open(QUOTA_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {
+                service: int(data[service].get("used", 0))
+                for service in self.limits
+                if isinstance(data.get(service), dict) and data[service].get("month") == datetime.now().month
+            }
+        except Exception:
+            return {}
+    
+    def _reserve(self, service: str, count: int) -> int:
+        """原子地预占最多 count 次额度，返回实际预占数"""
+        period = self._current_period()
+        limit = self.limits[service]
+        
+        if self._db is None:
+            row = self._memory.setdefault(service, [period, 0])
+            if row[0] != period:
+                row[:] = [period, 0]
+            granted = max(0, min(count, limit - row[1]))
+            row[1] += granted
+            return granted
+        
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT period, used FROM quota WHERE service = ?", (service,)).fetchone()
+            used = row[1] if row and row[0] == period else 0
+            if row and row[0] != period:
+                logger.info("Reset %s quota for new month", service)
+            granted = max(0, min(count, limit - used))
+            self._db.execute("INSERT OR REPLACE INTO quota (service, period, used) VALUES (?, ?, ?)",
+                             (service, period, used + granted))
+            self._db.execute("COMMIT")
+            return granted
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
     
     def use_quota(self, service: str) -> bool:
         """使用一次配额，返回是否成功"""
-        self._check_month_reset()
+        with _metrics.span("quota", op="use"):
+            if service not in self.limits:
+                return False
         
-        if service == "tavily":
-            if self.quota_data["tavily"]["used"] < MAX_TAVILY_QUOTA:
-                self.quota_data["tavily"]["used"] += 1
-                self._save_quota()
-                return True
-        elif service == "bing_api":
-            if self.quota_data["bing_api"]["used"] < MAX_BING_API_QUOTA:
-                self.quota_data["bing_api"]["used"] += 1
-                self._save_quota()
+            period = self._current_period()
+            with self._lock:
+                lease = self._leases.get(service)
+                if lease and lease[0] == period and lease[1] > 0:
+                    lease[1] -= 1
+                    return True
+            
+                try:
+                    granted = self._reserve(service, self.lease_size)
+                except Exception as e:
+                    logger.warning("Failed to update quota: %s", e)
+                    return False
+                if granted <= 0:
+                    return False
+                if granted > 1:
+                    self._leases[service] = [period, granted - 1]
+                    self._writer.mark_dirty()
                 return True
-        
-        return False
+    
+    def refund(self, service: str):
+        """退还一次已扣减但没有真正发出请求的配额，放回预占额度，随未用完的预占额度一起归还"""
+        if service not in self.limits:
+            return
+        period = self._current_period()
+        with self._lock:
+            lease = self._leases.get(service)
+            if lease and lease[0] == period:
+                lease[1] += 1
+            else:
+                self._leases[service] = [period, 1]
+            self._writer.mark_dirty()
+    
+    def release_leases(self):
+        """归还未用完的预占额度"""
+        with self._lock:
+            leases, self._leases = self._leases, {}
+            for service, (period, unused) in leases.items():
+                if unused <= 0:
+                    continue
+                try:
+                    if self._db is None:
+                        row = self._memory.get(service)
+                        if row and row[0] == period:
+                            row[1] = max(0, row[1] - unused)
+                    else:
+                        self._db.execute("UPDATE quota SET used = MAX(0, used - ?) WHERE service = ? AND period = ?",
+                                         (unused, service, period))
+                except Exception as e:
+                    logger.warning("Failed to release quota lease: %s", e)
     
     def get_quota_status(self) -> Dict:
-        """获取配额状态"""
-        self._check_month_reset()
-        return {
-            "tavily": {
-                "used": self.quota_data["tavily"]["used"],
-                "limit": MAX_TAVILY_QUOTA,
-                "remaining": MAX_TAVILY_QUOTA - self.quota_data["tavily"]["used"]
-            },
-            "bing_api": {
-                "used": self.quota_data["bing_api"]["used"],
-                "limit": MAX_BING_API_QUOTA,
-                "remaining": MAX_BING_API_QUOTA - self.quota_data["bing_api"]["used"]
-            }
-        }
+        """获取配额状态（本进程预占但未使用的额度不计入已用）"""
+        with _metrics.span("quota", op="status"):
+            period = self._current_period()
+            with self._lock:
+                if self._db is None:
+                    rows = {service: tuple(row) for service, row in self._memory.items()}
+                else:
+                    try:
+                        rows = {row[0]: (row[1], row[2])
+                                for row in self._db.execute("SELECT service, period, used FROM quota")}
+                    except Exception as e:
+                        logger.warning("Failed to read quota: %s", e)
+                        rows = {}
+                leased = {service: lease[1] for service, lease in self._leases.items() if lease[0] == period}
+        
+            status = {}
+            for service, limit in self.limits.items():
+                row_period, used = rows.get(service, (period, 0))
+                used = used - leased.get(service, 0) if row_period == period else 0
+                status[service] = {
+                    "used": used,
+                    "limit": limit,
+                    "remaining": max(0, limit - used)
+                }
+            return status
 
 
-class SearchEngine:
-    """搜索引擎基类"""
-    
-    def search(self, query: str, max_results: int = 5) -> List[Dict]:
-        raise NotImplementedError
+class RateLimited(Exception):
+    """等待限速令牌的时间超过上限"""
 
 
-class DuckDuckGoSearch(SearchEngine):
-    """DuckDuckGo 搜索 - 无需 API Key"""
-    
-    def search(self, query: str, max_results: int = 5) -> List[Dict]:
-        """使用 DuckDuckGo 搜索"""
+def retry_after_seconds(headers, default: float = RATE_LIMIT_DEFAULT_PENALTY) -> float:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），缺失或无法解析时返回 default"""
+    value = _lower_headers(headers or {}).get('retry-after')
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return min(float(value), RATE_LIMIT_MAX_PENALTY)
         try:
-            try:
-                from ddgs import DDGS
-            except ImportError:
-                from duckduckgo_search import DDGS
-            
-            with DDGS() as ddgs:
-                results = []
-                for r in ddgs.text(query, max_results=max_results):
-                    results.append({
-                        'title': r.get('title', ''),
-                        'href': r.get('href', ''),
-                        'body': r.get('body', '')[:200] + "..." if len(r.get('body', '')) > 200 else r.get('body', ''),
-                        'source': 'duckduckgo'
-                    })
-                return results
-                
-        except Exception as e:
-            print(f"[ERROR] DuckDuckGo search failed: {e}")
-            return []
+            from email.utils import parsedate_to_datetime
+            return min(max(0.0, parsedate_to_datetime(value).timestamp() - time.time()), RATE_LIMIT_MAX_PENALTY)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            pass
+    return default
 
 
-class BingScraper(SearchEngine):
-    """Bing 爬虫搜索 - 无需 API Key"""
-    
-    def search(self, query: str, max_results: int = 5) -> List[Dict]:
-        """使用 Bing 网页搜索"""
-        try:
-            import requests
-            from bs4 import BeautifulSoup
+class RateLimiter:
+    """
+    令牌桶限速器 - 按引擎和主机限速，SQLite (WAL) 持久化，多线程与多进程共享
 
-            search_url = f"https://www.bing.com/search?q={quote(query)}"
+    采用 GCRA（等价于令牌桶）：每个键记录下一个令牌的理论发放时间，每次请求在 BEGIN IMMEDIATE
+    事务中预约一个发放时间，令牌不足时排队等待而不是失败；预计等待超过 max_wait 时抛出 RateLimited。
+    服务器返回 429/503 时按 Retry-After 暂停该键，之后按速率逐个放行而不是立即突发。
 
-            response = requests.get(search_url, timeout=15, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            })
+    Args:
+        path: 状态数据库路径，None 时只在进程内共享
+        limits: {键: (每秒请求数, 突发容量)}，键为引擎名（duckduckgo、bing）或 "host:主机名"，
+            "host" 为未单独配置主机的默认限速；不传时使用 RATE_LIMITS，传入 {} 表示不限速
+        max_wait: 单次请求最多排队等待的秒数
+    """
 
-            if response.status_code != 200:
-                print(f"[ERROR] Bing scraper failed: {response.status_code}")
+    def __init__(self, path: Optional[str] = RATE_LIMIT_FILE, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.path = path
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.max_wait = max_wait
+        self._memory: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._db = self._open_db() if path else None
+        self.stats = {"acquired": 0, "delayed": 0, "rejected": 0, "penalties": 0, "wait_seconds": 0.0}
+
+    def _open_db(self) -> Optional["sqlite3.Connection"]:
+        """打开限速状态库，失败时只在进程内限速"""
+        try:
+            db = lazy_import('sqlite3').connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tat REAL, blocked_until REAL)")
+            return db
+        except Exception as e:
+            logger.warning("Rate limit database unavailable, limiting in this process only: %s", e)
+            return None
+
+    def limit_for(self, key: str) -> Optional[Tuple[float, int]]:
+        """返回键对应的 (每秒请求数, 突发容量)，未配置时返回 None（不限速）"""
+        limit = self.limits.get(key)
+        if limit is None and key.startswith("host:"):
+            limit = self.limits.get("host")
+        return limit
+
+    def _update(self, key: str, change: Callable[[float, float], Optional[Tuple[float, float]]]):
+        """在事务中读取并更新 (tat, blocked_until)；change 返回 None 时不写入"""
+        if self._db is None:
+            state = self._memory.get(key, [0.0, 0.0])
+            updated = change(state[0], state[1])
+            if updated is not None:
+                self._memory[key] = list(updated)
+            return updated
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT tat, blocked_until FROM buckets WHERE key = ?", (key,)).fetchone()
+            updated = change(*(row or (0.0, 0.0)))
+            if updated is not None:
+                self._db.execute("INSERT OR REPLACE INTO buckets (key, tat, blocked_until) VALUES (?, ?, ?)",
+                                 (key,) + tuple(updated))
+            self._db.execute("COMMIT")
+            return updated
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _reserve(self, key: str) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        rate, burst = self.limit_for(key)
+        interval = 1.0 / rate
+        tolerance = (max(1, burst) - 1) * interval
+        now = time.time()
+        wait = []
+
+        def change(tat: float, blocked_until: float):
+            send_at = max(now, tat - tolerance, blocked_until)
+            if send_at - now > self.max_wait:
+                wait.append(None)
+                return None
+            wait.append(send_at - now)
+            return max(tat, send_at) + interval, blocked_until
+
+        with self._lock:
+            try:
+                self._update(key, change)
+            except Exception as e:
+                logger.warning("Rate limiter unavailable: %s", e)
+                return 0.0
+            if wait[0] is None:
+                self.stats["rejected"] += 1
+                _metrics.inc("rate_limit_total", key=key.split(":", 1)[0], outcome="rejected")
+                raise RateLimited(f"{key}: queue longer than {self.max_wait}s")
+            self.stats["acquired"] += 1
+            if wait[0] > 0:
+                self.stats["delayed"] += 1
+                self.stats["wait_seconds"] += wait[0]
+        _metrics.inc("rate_limit_total", key=key.split(":", 1)[0], outcome="delayed" if wait[0] > 0 else "immediate")
+        return wait[0]
+
+    def blocked_for(self, key: str) -> float:
+        """键被 Retry-After 暂停的剩余秒数"""
+        if self._db is None:
+            with self._lock:
+                blocked_until = self._memory.get(key, [0.0, 0.0])[1]
+        else:
+            with self._lock:
+                row = self._db.execute("SELECT blocked_until FROM buckets WHERE key = ?", (key,)).fetchone()
+            blocked_until = row[0] if row else 0.0
+        return max(0.0, blocked_until - time.time())
+
+    def acquire(self, key: str):
+        """
+        获取一个令牌，必要时阻塞等待（排队期间遇到新的 Retry-After 暂停会继续等待）
+
+        Raises:
+            RateLimited: 预计等待超过 max_wait
+        """
+        if self.limit_for(key) is None:
+            return
+        waited = 0.0
+        wait = self._reserve(key)
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait = self.blocked_for(key)
+            if waited + wait > self.max_wait:
+                raise RateLimited(f"{key}: blocked for another {wait:.0f}s")
+
+    async def aacquire(self, key: str):
+        """acquire 的异步版本，等待期间不阻塞事件循环"""
+        import asyncio
+        if self.limit_for(key) is None:
+            return
+        waited = 0.0
+        wait = self._reserve(key)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.blocked_for(key)
+            if waited + wait > self.max_wait:
+                raise RateLimited(f"{key}: blocked for another {wait:.0f}s")
+
+    def penalize(self, key: str, seconds: float):
+        """服务器要求退避（429 / 503 / Retry-After）时暂停该键 seconds 秒"""
+        limit = self.limit_for(key)
+        if limit is None:
+            return
+        tolerance = (max(1, limit[1]) - 1) / limit[0]
+        until = time.time() + seconds
+
+        def change(tat: float, blocked_until: float):
+            return max(tat, until + tolerance), max(blocked_until, until)
+
+        with self._lock:
+            try:
+                self._update(key, change)
+            except Exception as e:
+                logger.warning("Rate limiter unavailable: %s", e)
+                return
+            self.stats["penalties"] += 1
+        logger.warning("Rate limited by %s, pausing for %.0fs", key, seconds)
+        _metrics.inc("rate_limit_total", key=key.split(":", 1)[0], outcome="penalized")
+
+    def observe_response(self, key: str, status: int, headers) -> bool:
+        """检查响应状态，429/503 时按 Retry-After 暂停该键，返回是否被限速"""
+        if status not in (429, 503):
+            return False
+        self.penalize(key, retry_after_seconds(headers))
+        return True
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的限速器（环境变量 MULTI_SEARCH_RATE_LIMIT=0 时不限速）"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(limits=None if RATE_LIMIT_ENABLED else {})
+    return _rate_limiter
+
+
+def _host_key(url: str) -> str:
+    """网页抓取的限速键"""
+    return "host:" + urlsplit(url).netloc.lower()
+
+
+class ResultCache:
+    """
+    搜索结果缓存 - 内存 LRU + SQLite 磁盘两级缓存
+
+    以规范化后的查询、max_results 和搜索模式为键，按返回结果的引擎设置 TTL，
+    命中缓存时不访问网络也不消耗配额
+    """
+
+    def __init__(self, path: Optional[str] = RESULT_CACHE_FILE, memory_size: int = RESULT_CACHE_MEMORY_SIZE,
+                 disk_size: int = RESULT_CACHE_DISK_SIZE, ttl: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = dict(RESULT_CACHE_TTL, **(ttl or {}))
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_db() if path else None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _open_db(self) -> Optional["sqlite3.Connection"]:
+        """打开磁盘缓存，失败时退化为仅内存缓存"""
+        try:
+            db = lazy_import('sqlite3').connect(self.path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, engine TEXT, results TEXT, expires_at REAL, accessed_at REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            db.commit()
+            return db
+        except Exception as e:
+            logger.warning("Result cache disabled on disk: %s", e)
+            return None
+
+    @staticmethod
+    def make_key(query: str, max_results: int, mode: str) -> str:
+        """生成缓存键：查询忽略大小写和多余空白"""
+        normalized = " ".join(query.lower().split())
+        return f"{mode}|{max_results}|{normalized}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """读取缓存，返回 {'engine': ..., 'results': [...]}，未命中或已过期返回 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    _metrics.inc("cache_requests_total", cache="result", outcome="hit")
+                    return self._copy(entry)
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT engine, results, expires_at FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and row[2] > now:
+                        self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        entry = {"engine": row[0], "results": json.loads(row[1]), "expires_at": row[2]}
+                        self._remember(key, entry)
+                        self.stats["disk_hits"] += 1
+                        _metrics.inc("cache_requests_total", cache="result", outcome="hit")
+                        return self._copy(entry)
+                except Exception as e:
+                    logger.warning("Result cache read failed: %s", e)
+
+            self.stats["misses"] += 1
+            _metrics.inc("cache_requests_total", cache="result", outcome="miss")
+            return None
+
+    def put(self, key: str, engine: str, results: List[Dict]):
+        """写入缓存，TTL 由返回结果的引擎决定"""
+        now = time.time()
+        entry = {
+            "engine": engine,
+            "results": [dict(r) for r in results],
+            "expires_at": now + self.ttl.get(engine, RESULT_CACHE_DEFAULT_TTL),
+        }
+        with self._lock:
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, engine, results, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, engine, json.dumps(entry["results"], ensure_ascii=False), entry["expires_at"], now),
+                )
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                evicted = self._db.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_size,),
+                ).rowcount
+                self._db.commit()
+                self.stats["evictions"] += max(evicted, 0)
+            except Exception as e:
+                logger.warning("Result cache write failed: %s", e)
+
+    def clear(self):
+        """清空两级缓存"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        """获取缓存命中统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                try:
+                    stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                except Exception:
+                    stats["disk_entries"] = 0
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / total, 4) if total else 0.0
+        return stats
+
+    def _remember(self, key: str, entry: Dict):
+        """写入内存 LRU，超出容量时淘汰最久未使用的条目"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    @staticmethod
+    def _copy(entry: Dict) -> Dict:
+        return {"engine": entry["engine"], "results": [dict(r) for r in entry["results"]]}
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """获取进程内共享的搜索结果缓存"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化 URL 用于去重：协议和主机小写，去掉默认端口、片段、跟踪参数（utm_* 等），
+    查询参数排序，路径去掉末尾斜杠
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        # 无法解析的地址（如端口超出范围）按原样去重
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def merge_results(result_lists: List[List[Dict]], labels: Optional[List[str]] = None) -> List[Dict]:
+    """
+    合并多组搜索结果，按规范化 URL 去重并保持首次出现的顺序
+
+    Args:
+        result_lists: 多组搜索结果
+        labels: 每组结果对应的标签（如查询词），会记录到合并结果的 queries 字段
+
+    Returns:
+        去重后的结果列表
+    """
+    merged: Dict[str, Dict] = {}
+    for idx, results in enumerate(result_lists):
+        for result in results:
+            key = canonicalize_url(result.get('href', '')) if result.get('href') else f"title:{result.get('title', '')}"
+            item = merged.get(key)
+            if item is None:
+                item = merged[key] = dict(result, queries=[])
+            elif not item.get('body') and result.get('body'):
+                item['body'] = result['body']
+            if labels is not None and labels[idx] not in item['queries']:
+                item['queries'].append(labels[idx])
+    return list(merged.values())
+
+
+class RequestCoalescer:
+    """合并相同的并发请求：同一个 key 正在执行时，后来的调用直接等待并共享其结果"""
+
+    def __init__(self):
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key: str, fn: Callable, *args, **kwargs):
+        """执行 fn 或等待同 key 的进行中调用，返回 (result, 是否复用了进行中的调用)"""
+        from concurrent.futures import Future
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result(), True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class _QuotaBudget:
+    """批量搜索共享的付费调用预算"""
+
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.limit is not None and self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+    def refund(self):
+        with self._lock:
+            self.used -= 1
+
+
+class HtmlExtractor:
+    """网页解析后端基类：提取网页标题正文与 Bing 结果块"""
+
+    name = ""
+
+    def extract_page(self, page: str, max_length: int = 5000) -> Tuple[str, str]:
+        """返回 (标题, 正文)，正文收集到 max_length 后即可停止解析"""
+        raise NotImplementedError
+
+    def extract_bing(self, page: str, max_results: int = 5) -> List[Dict]:
+        """从 Bing 结果页的 li.b_algo 块中提取结果，找不到结果块时退回扫描全部链接"""
+        raise NotImplementedError
+
+    def page_parser(self, max_length: int = 5000) -> "_PrefixPageParser":
+        """
+        返回增量解析器，用于边下载边解析：push(文本) 返回是否已收集到足够正文，finish() 返回 (标题, 正文)
+
+        默认按几何增长的前缀重复调用 extract_page，前缀中的正文已超过 max_length 时停止
+        """
+        return _PrefixPageParser(self.extract_page, max_length)
+
+    def _feed_page(self, page: str, max_length: int) -> Tuple[str, str]:
+        """把整页分块喂给 page_parser，解析器收集到足够正文后不再继续"""
+        parser = self.page_parser(max_length)
+        for start in range(0, len(page), HTML_FEED_CHUNK):
+            if parser.push(page[start:start + HTML_FEED_CHUNK]):
+                break
+        return parser.finish()
+
+
+class _PrefixPageParser:
+    """
+    不能增量解析的后端使用的解析器：缓存下载的文本，每增长一倍就解析一次已下载的前缀
+
+    前缀截在最后一个 '<' 之前，其中的文本节点都是完整的，正文超过 max_length 时结果与解析整个网页相同；
+    总解析量不超过最终前缀的两倍
+    """
+
+    def __init__(self, parse: Callable[[str, int], Tuple[str, str]], max_length: int):
+        self.parse = parse
+        self.max_length = max_length
+        self.done = False
+        self._chunks: List[str] = []
+        self._size = 0
+        self._next = max(HTML_PREFIX_CHARS, max_length * HTML_PREFIX_FACTOR)
+        self._result: Optional[Tuple[str, str]] = None
+
+    def push(self, text: str) -> bool:
+        if self.done or not text:
+            return self.done
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= self._next:
+            self._next = self._size * 2
+            page = ''.join(self._chunks)
+            self._chunks = [page]
+            cut = page.rfind('<')
+            if cut > 0:
+                title, content = self.parse(page[:cut], self.max_length)
+                if len(content) > self.max_length:
+                    self._result = (title, content)
+                    self.done = True
+        return self.done
+
+    def finish(self) -> Tuple[str, str]:
+        if self._result is not None:
+            return self._result
+        return self.parse(''.join(self._chunks), self.max_length)
+
+
+def _clip_lines(lines, max_length: int) -> str:
+    """合并非空文本行并截断到 max_length"""
+    content = '\n'.join(line for line in (line.strip() for line in lines) if line)
+    if len(content) > max_length:
+        content = content[:max_length] + "..."
+    return content
+
+
+def _decode_bing_href(href: str) -> str:
+    """还原 Bing 跳转链接 (bing.com/ck/a?u=a1<base64>) 中的真实地址"""
+    import base64
+    if '/ck/a' not in href:
+        return href
+    try:
+        params = dict(parse_qsl(urlsplit(href).query))
+        encoded = params.get('u', '')
+        if encoded.startswith('a1'):
+            encoded = encoded[2:]
+            decoded = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+            if decoded.startswith('http'):
+                return decoded
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return href
+
+
+def _bing_result(title: str, href: str, body: str = '') -> Optional[Dict]:
+    """过滤 Bing 自身链接和过短标题，构造结果"""
+    href = _decode_bing_href(href or '')
+    title = (title or '').strip()
+    if not title or len(title) < 5:
+        return None
+    if 'bing.com' in href or 'msn.com' in href:
+        return None
+    if not href.startswith('http'):
+        return None
+    body = ' '.join((body or '').split())
+    return {
+        'title': title[:100],
+        'href': href,
+        'body': body[:200] + "..." if len(body) > 200 else body,
+        'source': 'bing_scraper'
+    }
+
+
+def _collect_bing(candidates, max_results: int) -> List[Dict]:
+    """从 (标题, 链接, 摘要) 序列中收集前 max_results 个有效结果"""
+    results = []
+    for title, href, body in candidates:
+        result = _bing_result(title, href, body)
+        if result is None:
+            continue
+        results.append(result)
+        if len(results) >= max_results:
+            break
+    return results
+
+
+class _PageTextCollector:
+    """流式正文提取的公共部分：按标签事件收集文本，跳过脚本和导航，收集到足够正文后标记 done"""
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+        self.title = None
+        self.lines: List[str] = []
+        self.done = False
+        self._size = 0
+        self._skip = 0
+        self._in_title = False
+        self._text: List[str] = []
+
+    def _flush(self):
+        if not self._text:
+            return
+        text = ''.join(self._text)
+        self._text = []
+        if self._in_title:
+            self.title = (self.title or '') + text
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                self.lines.append(line)
+                self._size += len(line) + 1
+        # 已收集的正文合并后超过 max_length 时，截断结果与完整解析一致
+        if self._size > self.max_length + 1:
+            self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in HTML_SKIP_TAGS:
+            self._skip += 1
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in HTML_SKIP_TAGS:
+            if self._skip:
+                self._skip -= 1
+        elif tag == 'title':
+            self._in_title = False
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_data(self, data):
+        if not self._skip and not self.done:
+            self._text.append(data)
+
+    def result(self) -> Tuple[str, str]:
+        self._flush()
+        return (self.title or '').strip(), _clip_lines(self.lines, self.max_length)
+
+
+_html_parser_classes: Dict[type, type] = {}
+
+
+def _html_parser_class(cls: type) -> type:
+    """返回 cls 与 html.parser.HTMLParser 组合后的类，html.parser 在标准库解析后端首次使用时才导入"""
+    combined = _html_parser_classes.get(cls)
+    if combined is None:
+        combined = _html_parser_classes[cls] = type(cls.__name__, (cls, lazy_import('html.parser').HTMLParser), {})
+    return combined
+
+
+class _PageTextParser(_PageTextCollector):
+    """基于 html.parser 的流式正文提取（通过 _html_parser_class 创建）"""
+
+    def __init__(self, max_length: int):
+        _PageTextCollector.__init__(self, max_length)
+        lazy_import('html.parser').HTMLParser.__init__(self, convert_charrefs=True)
+
+    def push(self, text: str) -> bool:
+        if not self.done:
+            self.feed(text)
+        return self.done
+
+    def finish(self) -> Tuple[str, str]:
+        if not self.done:
+            self.close()
+        return self.result()
+
+
+class _LxmlTextTarget(_PageTextCollector):
+    """lxml 解析器的事件接收对象（不构建文档树）"""
+
+    def start(self, tag, attrib):
+        self.handle_starttag(tag, attrib)
+
+    def end(self, tag):
+        self.handle_endtag(tag)
+
+    def data(self, data):
+        self.handle_data(data)
+
+    def comment(self, text):
+        self.handle_comment(text)
+
+    def close(self):
+        return None
+
+
+class _LxmlPageParser:
+    """基于 lxml HTMLParser feed 接口的增量正文提取，收集到足够正文后不再喂入数据"""
+
+    def __init__(self, etree, max_length: int):
+        self.etree = etree
+        self.target = _LxmlTextTarget(max_length)
+        self._parser = etree.HTMLParser(target=self.target)
+        self._fed = False
+
+    def push(self, text: str) -> bool:
+        if text and not self.target.done:
+            self._parser.feed(text)
+            self._fed = True
+        return self.target.done
+
+    def finish(self) -> Tuple[str, str]:
+        if self._fed and not self.target.done:
+            try:
+                self._parser.close()
+            except self.etree.LxmlError:
+                pass
+        return self.target.result()
+
+
+class _BingResultParser:
+    """基于 html.parser 的流式 Bing 结果提取，收集到 max_results 个 li.b_algo 后停止（通过 _html_parser_class 创建）"""
+
+    def __init__(self, max_results: int):
+        super().__init__(convert_charrefs=True)
+        self.max_results = max_results
+        self.results: List[Dict] = []
+        self.links: List[Tuple[str, str, str]] = []
+        self.done = False
+        self._item = None
+        self._field = None
+        self._anchor = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        item = self._item
+        if tag == 'li':
+            if item is not None:
+                item['depth'] += 1
+            elif 'b_algo' in (dict(attrs).get('class') or '').split():
+                self._item = {'depth': 1, 'h2': False, 'title': None, 'href': '', 'body': None}
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self._anchor = (href, [])
+                if item is not None and item['h2'] and item['title'] is None:
+                    item['href'] = href
+                    item['title'] = self._field = []
+        elif item is not None:
+            if tag == 'h2':
+                item['h2'] = True
+            elif tag == 'p' and item['title'] is not None and item['body'] is None:
+                item['body'] = self._field = []
+
+    def handle_endtag(self, tag):
+        item = self._item
+        if tag == 'a':
+            if self._anchor is not None:
+                self.links.append((''.join(self._anchor[1]), self._anchor[0], ''))
+                self._anchor = None
+            if item is not None and self._field is item['title']:
+                self._field = None
+        elif item is None:
+            return
+        elif tag == 'h2':
+            item['h2'] = False
+        elif tag == 'p' and self._field is item['body']:
+            self._field = None
+        elif tag == 'li':
+            item['depth'] -= 1
+            if item['depth'] == 0:
+                self._item = self._field = None
+                result = _bing_result(''.join(item['title'] or []), item['href'], ''.join(item['body'] or []))
+                if result is not None:
+                    self.results.append(result)
+                    self.done = len(self.results) >= self.max_results
+
+    def handle_data(self, data):
+        if self._anchor is not None:
+            self._anchor[1].append(data)
+        if self._field is not None:
+            self._field.append(data)
+
+
+def _feed_until_done(parser: _BingResultParser, page: str):
+    """分块喂给流式解析器，解析器标记 done 后不再继续"""
+    for start in range(0, len(page), HTML_FEED_CHUNK):
+        parser.feed(page[start:start + HTML_FEED_CHUNK])
+        if parser.done:
+            return
+    parser.close()
+
+
+class StreamingExtractor(HtmlExtractor):
+    """标准库流式解析后端，无需额外依赖"""
+
+    name = "stream"
+
+    def extract_page(self, page: str, max_length: int = 5000) -> Tuple[str, str]:
+        return self._feed_page(page, max_length)
+
+    def page_parser(self, max_length: int = 5000) -> _PageTextParser:
+        return _html_parser_class(_PageTextParser)(max_length)
+
+    def extract_bing(self, page: str, max_results: int = 5) -> List[Dict]:
+        parser = _html_parser_class(_BingResultParser)(max_results)
+        _feed_until_done(parser, page)
+        return parser.results or _collect_bing(parser.links, max_results)
+
+
+class LxmlExtractor(HtmlExtractor):
+    """lxml (libxml2) 解析后端"""
+
+    name = "lxml"
+    BING_ITEMS = '//li[contains(concat(" ", normalize-space(@class), " "), " b_algo ")]'
+
+    def __init__(self):
+        self.html = lazy_import('lxml.html')
+        self.etree = lazy_import('lxml.etree')
+
+    def _document(self, page: str):
+        try:
+            return self.html.document_fromstring(page)
+        except ValueError:
+            # 带编码声明的字符串需要以字节形式解析
+            return self.html.document_fromstring(page.encode('utf-8'))
+
+    def extract_page(self, page: str, max_length: int = 5000) -> Tuple[str, str]:
+        return self._feed_page(page, max_length)
+
+    def page_parser(self, max_length: int = 5000) -> _LxmlPageParser:
+        """事件驱动的增量解析，不构建文档树"""
+        return _LxmlPageParser(self.etree, max_length)
+
+    def extract_bing(self, page: str, max_results: int = 5) -> List[Dict]:
+        if not page.strip():
+            return []
+        doc = self._document(page)
+
+        def items():
+            for item in doc.xpath(self.BING_ITEMS):
+                anchors = item.xpath('.//h2//a[@href]')
+                if not anchors:
+                    continue
+                captions = item.xpath('.//*[contains(@class, "b_caption")]//p') or item.xpath('.//p')
+                yield anchors[0].text_content(), anchors[0].get('href'), captions[0].text_content() if captions else ''
+
+        return _collect_bing(items(), max_results) or _collect_bing(
+            ((a.text_content(), a.get('href'), '') for a in doc.xpath('//a[@href]')), max_results)
+
+
+class SelectolaxExtractor(HtmlExtractor):
+    """selectolax (lexbor / modest) 解析后端"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        module = lazy_import('selectolax.lexbor', 'selectolax.parser')
+        self.parser = getattr(module, 'LexborHTMLParser', None) or module.HTMLParser
+
+    def extract_page(self, page: str, max_length: int = 5000) -> Tuple[str, str]:
+        return self._feed_page(page, max_length)
+
+    def page_parser(self, max_length: int = 5000) -> _PrefixPageParser:
+        """selectolax 不支持分块解析，按增长的前缀解析，正文足够后停止"""
+        return _PrefixPageParser(self._parse_page, max_length)
+
+    def _parse_page(self, page: str, max_length: int) -> Tuple[str, str]:
+        tree = self.parser(page)
+        title_node = tree.css_first('title')
+        title = title_node.text() if title_node is not None else ''
+        tree.strip_tags(list(HTML_SKIP_TAGS))
+        root = tree.root
+        text = root.text(separator='\n', strip=True) if root is not None else ''
+        return title.strip(), _clip_lines(text.splitlines(), max_length)
+
+    def extract_bing(self, page: str, max_results: int = 5) -> List[Dict]:
+        tree = self.parser(page)
+
+        def items():
+            for item in tree.css('li.b_algo'):
+                anchor = item.css_first('h2 a[href]')
+                if anchor is None:
+                    continue
+                caption = item.css_first('.b_caption p') or item.css_first('p')
+                yield anchor.text(), anchor.attributes.get('href'), caption.text() if caption is not None else ''
+
+        return _collect_bing(items(), max_results) or _collect_bing(
+            ((a.text(), a.attributes.get('href'), '') for a in tree.css('a[href]')), max_results)
+
+
+class Bs4Extractor(HtmlExtractor):
+    """BeautifulSoup + html.parser 完整 DOM 解析（原有实现，用于对照基准）"""
+
+    name = "bs4"
+
+    def __init__(self):
+        self.BeautifulSoup = lazy_import('bs4').BeautifulSoup
+
+    def extract_page(self, page: str, max_length: int = 5000) -> Tuple[str, str]:
+        soup = self.BeautifulSoup(page, 'html.parser')
+
+        for script in soup(list(HTML_SKIP_TAGS)):
+            script.decompose()
+
+        title = soup.title.string if soup.title and soup.title.string else ""
+        text = soup.get_text(separator='\n', strip=True)
+        return title.strip(), _clip_lines(text.splitlines(), max_length)
+
+    def extract_bing(self, page: str, max_results: int = 5) -> List[Dict]:
+        soup = self.BeautifulSoup(page, 'html.parser')
+        return _collect_bing(((link.get_text(), link.get('href', ''), '') for link in soup.find_all('a', href=True)),
+                             max_results)
+
+
+HTML_EXTRACTORS = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "stream": StreamingExtractor,
+    "bs4": Bs4Extractor,
+}
+
+_html_extractor: Optional[HtmlExtractor] = None
+_html_extractor_lock = threading.Lock()
+
+
+def get_html_extractor(name: Optional[str] = None) -> HtmlExtractor:
+    """
+    获取网页解析后端
+
+    未指定 name 时返回共享后端：按 HTML_EXTRACTOR_ORDER 选择第一个已安装的
+    """
+    global _html_extractor
+    if name is not None:
+        return HTML_EXTRACTORS[name]()
+    if _html_extractor is None:
+        with _html_extractor_lock:
+            if _html_extractor is None:
+                for candidate in HTML_EXTRACTOR_ORDER:
+                    try:
+                        _html_extractor = HTML_EXTRACTORS[candidate]()
+                        break
+                    except ImportError:
+                        continue
+                else:
+                    _html_extractor = StreamingExtractor()
+    return _html_extractor
+
+
+def configure_html_extractor(name: str) -> HtmlExtractor:
+    """
+    切换共享的网页解析后端（selectolax / lxml / stream / bs4）
+
+    对应依赖未安装时抛出 ImportError
+    """
+    global _html_extractor
+    extractor = get_html_extractor(name)
+    with _html_extractor_lock:
+        _html_extractor = extractor
+    return extractor
+
+
+_CJK_RANGE = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_CJK_RUN = _LazyObject(re.compile, f"[{_CJK_RANGE}]+")
+_WORD_PATTERN = _LazyObject(re.compile, f"[^\\W_{_CJK_RANGE}]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?;。！？；])\s*")
+
+
+def _cjk_grams(run: str) -> List[str]:
+    return [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def _term_counts(text: str, with_cjk: bool = True) -> Tuple[Counter, int]:
+    """
+    统计词频并返回 (词频, 词数)：字母数字按单词，中日韩文字按相邻两字切分（单字保留单字）
+
+    with_cjk=False 时只计入中日韩词的数量而不统计其词频（查询不含中日韩文字时可省去切分）
+    """
+    text = text.lower()
+    words = _WORD_PATTERN.findall(text)
+    counts = Counter(words)
+    length = len(words)
+    for run in _CJK_RUN.findall(text):
+        if with_cjk:
+            grams = _cjk_grams(run)
+            counts.update(grams)
+            length += len(grams)
+        else:
+            length += max(1, len(run) - 1)
+    return counts, length
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> List[str]:
+    """按行和句子把正文切成不超过 size 字符的段落"""
+    passages: List[str] = []
+    current = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        for piece in ([line] if len(line) <= size else _split_sentences(line, size)):
+            if current and len(current) + 1 + len(piece) > size:
+                passages.append(current)
+                current = piece
+            else:
+                current = f"{current}\n{piece}" if current else piece
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _split_sentences(line: str, size: int) -> List[str]:
+    pieces = []
+    for sentence in _SENTENCE_END.split(line):
+        while len(sentence) > size:
+            cut = sentence.rfind(" ", 0, size)
+            cut = cut if cut > size // 2 else size
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def score_passages(query: str, passages: List[str]) -> List[float]:
+    """
+    按 BM25 给段落打分，IDF 在传入的全部段落上统计
+
+    安装 numpy 时向量化计算，否则使用等价的纯 Python 实现
+    """
+    query_terms = list(_term_counts(query)[0])
+    if not query_terms or not passages:
+        return [0.0] * len(passages)
+    with_cjk = any(_CJK_RUN.match(term) for term in query_terms)
+    counts = []
+    lengths = []
+    for passage in passages:
+        terms, length = _term_counts(passage, with_cjk)
+        counts.append([terms[term] for term in query_terms])
+        lengths.append(length)
+    try:
+        np = lazy_import("numpy")
+    except ImportError:
+        return _bm25_python(counts, lengths)
+    return _bm25_numpy(np, counts, lengths)
+
+
+def _bm25_numpy(np, counts: List[List[int]], lengths: List[int]) -> List[float]:
+    tf = np.asarray(counts, dtype=float)
+    dl = np.asarray(lengths, dtype=float)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((len(counts) - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * dl / max(float(dl.mean()), 1.0))
+    return (idf * tf * (BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1).tolist()
+
+
+def _bm25_python(counts: List[List[int]], lengths: List[int]) -> List[float]:
+    n = len(counts)
+    df = [sum(1 for row in counts if row[col]) for col in range(len(counts[0]))]
+    idf = [math.log1p((n - d + 0.5) / (d + 0.5)) for d in df]
+    avgdl = max(sum(lengths) / n, 1.0)
+    scores = []
+    for row, length in zip(counts, lengths):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+        scores.append(float(sum(w * tf * (BM25_K1 + 1) / (tf + norm) for w, tf in zip(idf, row) if tf)))
+    return scores
+
+
+def rank_passages(query: str, texts: List[str], budget: int = PASSAGE_BUDGET, top_k: Optional[int] = PASSAGE_TOP_K,
+                  passage_chars: int = PASSAGE_CHARS) -> List[List[Dict]]:
+    """
+    从多篇正文中选出与查询最相关的段落
+
+    全部正文的段落一起打分（共享 IDF），按得分从高到低选取，最多 top_k 段（None 表示不限段数）、总字符数不超过 budget；
+    不含任何查询词的段落只会以各篇开头段的形式入选
+
+    Returns:
+        与 texts 一一对应的列表，每项为该篇入选的段落 [{'index', 'text', 'score'}]，按原文顺序排列
+    """
+    chunks = [(doc, idx, passage) for doc, text in enumerate(texts)
+              for idx, passage in enumerate(split_passages(text or "", passage_chars))]
+    scores = score_passages(query, [passage for _, _, passage in chunks])
+    selected: List[List[Dict]] = [[] for _ in texts]
+    used = count = 0
+    for pos in sorted(range(len(chunks)), key=lambda pos: (-scores[pos], chunks[pos][1], chunks[pos][0])):
+        doc, idx, passage = chunks[pos]
+        if top_k is not None and count >= top_k:
+            break
+        if (scores[pos] <= 0 and idx) or used + len(passage) > budget:
+            continue
+        selected[doc].append({'index': idx, 'text': passage, 'score': round(scores[pos], 4)})
+        used += len(passage)
+        count += 1
+    for passages in selected:
+        passages.sort(key=lambda passage: passage['index'])
+    return selected
+
+
+def query_snippet(text: str, query: str = "", size: int = SNIPPET_CHARS) -> str:
+    """截取与查询最相关的一段作为摘要（原先固定截取开头 size 个字符）"""
+    if len(text) <= size:
+        return text
+    passages = split_passages(text, size)
+    best = 0
+    if query and len(passages) > 1:
+        scores = score_passages(query, passages)
+        best = max(range(len(passages)), key=lambda idx: (scores[idx], -idx))
+    snippet = " ".join(passages[best].split())
+    return ("..." if best else "") + snippet + "..."
+
+
+def focus_contents(query: str, contents: List[Optional[Dict]], budget: int = PASSAGE_BUDGET,
+                   top_k: Optional[int] = PASSAGE_TOP_K) -> List[Optional[Dict]]:
+    """把抓取结果的 content 替换为与查询最相关的段落，段落列表写入 passages 字段（top_k 为 None 时只受 budget 限制）"""
+    fetched = [content for content in contents if content and content['success']]
+    ranked = rank_passages(query, [content['content'] for content in fetched], budget, top_k)
+    for content, passages in zip(fetched, ranked):
+        content['passages'] = passages
+        content['content'] = PASSAGE_SEPARATOR.join(passage['text'] for passage in passages)
+    return contents
+
+
+_engine_errors: "contextvars.ContextVar[Optional[List[str]]]" = contextvars.ContextVar("engine_errors", default=None)
+
+
+_race_state: "contextvars.ContextVar[Optional[Dict]]" = contextvars.ContextVar("race_state", default=None)
+
+
+def _race_lost() -> bool:
+    """竞速中其他引擎已返回结果时返回 True；引擎在发出请求前检查，放弃的请求不扣配额、不计入健康状态"""
+    state = _race_state.get()
+    if state is None or not state['cancel'].is_set():
+        return False
+    state['skipped'] = True
+    return True
+
+
+def _report_engine_error(error):
+    """引擎内部吞掉异常返回空结果时，向当前调度上下文报告错误，用于区分“出错”和“无结果”"""
+    errors = _engine_errors.get()
+    if errors is not None:
+        errors.append(str(error))
+
+
+class SearchResult:
+    """
+    紧凑的单条搜索结果（__slots__，不为每条结果创建字典），由 iter_search / iter_fetch 产出
+
+    支持 result['title'] / result.get('href') 的字典式读取，to_dict() 转换为原有的结果字典
+    """
+
+    __slots__ = ("title", "href", "body", "source", "full_content", "duplicate_of")
+    _OPTIONAL = ("full_content", "duplicate_of")
+
+    def __init__(self, title: str = "", href: str = "", body: str = "", source: str = "",
+                 full_content: Optional[Dict] = None, duplicate_of: Optional[str] = None):
+        self.title = title
+        self.href = href
+        self.body = body
+        self.source = source
+        self.full_content = full_content
+        self.duplicate_of = duplicate_of
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SearchResult":
+        return cls(data.get('title', ''), data.get('href', ''), data.get('body', ''), data.get('source', ''),
+                   data.get('full_content'), data.get('duplicate_of'))
+
+    def to_dict(self) -> Dict:
+        data = {'title': self.title, 'href': self.href, 'body': self.body, 'source': self.source}
+        for key in self._OPTIONAL:
+            if getattr(self, key) is not None:
+                data[key] = getattr(self, key)
+        return data
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ or (key in self._OPTIONAL and getattr(self, key) is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"SearchResult(title={self.title!r}, href={self.href!r}, source={self.source!r})"
+
+
+class SearchEngine:
+    """搜索引擎基类，rate_key 不为空的引擎（免费爬取类）请求前先经过共享限速器"""
+    
+    rate_key: Optional[str] = None
+    
+    def __init__(self, transport: Optional[HttpTransport] = None, rate_limiter: Optional[RateLimiter] = None):
+        self.transport = transport or get_transport()
+        self._rate_limiter = rate_limiter
+    
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        if self._rate_limiter is None:
+            self._rate_limiter = get_rate_limiter()
+        return self._rate_limiter
+    
+    @rate_limiter.setter
+    def rate_limiter(self, limiter: RateLimiter):
+        self._rate_limiter = limiter
+    
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        raise NotImplementedError
+    
+    def iter_search(self, query: str, max_results: int = 5):
+        """逐条产出 SearchResult；默认在整批响应解析完成后逐条产出，能边解析边产出的引擎覆盖此方法"""
+        for item in self.search(query, max_results):
+            yield SearchResult.from_dict(item)
+    
+    async def asearch(self, query: str, max_results: int = 5, client: Optional["AsyncHttpClient"] = None) -> List[Dict]:
+        """异步搜索，默认在线程池中执行同步 search"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, context.run, self.search, query, max_results)
+
+
+class DuckDuckGoSearch(SearchEngine):
+    """DuckDuckGo 搜索 - 无需 API Key"""
+    
+    rate_key = "duckduckgo"
+    
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """使用 DuckDuckGo 搜索"""
+        return [result.to_dict() for result in self.iter_search(query, max_results)]
+    
+    def iter_search(self, query: str, max_results: int = 5):
+        """边读取 ddgs.text() 生成器边产出结果，提前结束迭代时关闭 DDGS 会话，不再请求后续结果页"""
+        try:
+            DDGS = lazy_import('ddgs', 'duckduckgo_search').DDGS
+            
+            self.rate_limiter.acquire(self.rate_key)
+            if _race_lost():
+                return
+            with DDGS() as ddgs:
+                for r in ddgs.text(query, max_results=max_results):
+                    yield SearchResult.from_dict(self.parse_item(r, query))
+                
+        except Exception as e:
+            if "ratelimit" in type(e).__name__.lower():
+                self.rate_limiter.penalize(self.rate_key, RATE_LIMIT_DEFAULT_PENALTY)
+            logger.error("DuckDuckGo search failed: %s", e)
+            _report_engine_error(e)
+    
+    @staticmethod
+    def parse_item(r: Dict, query: str = "") -> Dict:
+        """将 DDGS 返回的条目转换为统一结果格式，过长的摘要截取与查询最相关的一段"""
+        return {
+            'title': r.get('title', ''),
+            'href': r.get('href', ''),
+            'body': query_snippet(r.get('body', ''), query),
+            'source': 'duckduckgo'
+        }
+
+
+class BingScraper(SearchEngine):
+    """Bing 爬虫搜索 - 无需 API Key"""
+    
+    rate_key = "bing"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+    }
+    
+    @staticmethod
+    def search_url(query: str) -> str:
+        return f"https://www.bing.com/search?q={quote(query)}"
+    
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """使用 Bing 网页搜索"""
+        try:
+            self.rate_limiter.acquire(self.rate_key)
+            if _race_lost():
+                return []
+            response = self.transport.get(self.search_url(query), headers=self.headers)
+
+            if response.status_code != 200:
+                self.rate_limiter.observe_response(self.rate_key, response.status_code, response.headers)
+                logger.error("Bing scraper failed: %s", response.status_code)
+                _report_engine_error(f"HTTP {response.status_code}")
+                return []
+
+            return self.parse(response.text, max_results)
+
+        except ImportError as e:
+            logger.error("HTML parser backend not installed: %s", e)
+            _report_engine_error(e)
+            return []
+        except Exception as e:
+            logger.error("Bing scraper failed: %s", e)
+            _report_engine_error(e)
+            return []
+    
+    async def asearch(self, query: str, max_results: int = 5, client: Optional["AsyncHttpClient"] = None) -> List[Dict]:
+        """异步 Bing 网页搜索，解析在线程池中执行"""
+        import asyncio
+        try:
+            await self.rate_limiter.aacquire(self.rate_key)
+            response = await (client or get_async_client()).get(self.search_url(query), headers=self.headers)
+
+            if response.status != 200:
+                self.rate_limiter.observe_response(self.rate_key, response.status, response.headers)
+                logger.error("Bing scraper failed: %s", response.status)
+                _report_engine_error(f"HTTP {response.status}")
+                return []
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.parse, response.text, max_results)
+
+        except ImportError as e:
+            logger.error("HTML parser backend not installed: %s", e)
+            _report_engine_error(e)
+            return []
+        except Exception as e:
+            logger.error("Bing scraper failed: %s", e)
+            _report_engine_error(e)
+            return []
+    
+    @staticmethod
+    def parse(page: str, max_results: int = 5) -> List[Dict]:
+        """从 Bing 搜索结果页中提取结果（标题、链接、摘要），启用解析进程池时较大的结果页在进程池中解析"""
+        pool = get_parse_pool()
+        with _metrics.span("parse", kind="bing"):
+            if pool is not None and pool.routes(len(page)):
+                return pool.parse_bing(page, max_results)
+            return get_html_extractor().extract_bing(page, max_results)
+
+
+class TavilySearch(SearchEngine):
+    """Tavily API 搜索 - 需要 API Key"""
+    
+    def __init__(self, transport: Optional[HttpTransport] = None):
+        super().__init__(transport)
+        self.api_key = get_api_key('TAVILY')
+    
+    def is_available(self) -> bool:
+        return self.api_key is not None
+    
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """使用 Tavily API 搜索"""
+        if _race_lost():
+            return []
+        try:
+            client = get_tavily_client(self.api_key)
+            response = client.search(
+                query=query,
+                max_results=max_results,
+                search_depth="basic"
+            )
+            return self.parse(response, query)
+            
+        except Exception as e:
+            logger.error("Tavily search failed: %s", e)
+            _report_engine_error(e)
+            return []
+    
+    async def asearch(self, query: str, max_results: int = 5, client: Optional["AsyncHttpClient"] = None) -> List[Dict]:
+        """异步 Tavily 搜索，未安装 AsyncTavilyClient 时回退到线程池"""
+        try:
+            async_client = get_tavily_client(self.api_key, use_async=True)
+        except ImportError:
+            return await super().asearch(query, max_results, client)
+        
+        try:
+            response = await async_client.search(
+                query=query,
+                max_results=max_results,
+                search_depth="basic"
+            )
+            return self.parse(response, query)
+            
+        except Exception as e:
+            logger.error("Tavily search failed: %s", e)
+            _report_engine_error(e)
+            return []
+    
+    @staticmethod
+    def parse(response: Dict, query: str = "") -> List[Dict]:
+        """将 Tavily 响应转换为统一结果格式，过长的正文截取与查询最相关的一段作为摘要"""
+        results = []
+        for item in response.get("results", []):
+            results.append({
+                'title': item.get('title', ''),
+                'href': item.get('url', ''),
+                'body': query_snippet(item.get('content', ''), query),
+                'source': 'tavily'
+            })
+        return results
+
+
+class BingAPISearch(SearchEngine):
+    """Bing Web Search API - 需要 API Key"""
+    
+    def __init__(self, transport: Optional[HttpTransport] = None):
+        super().__init__(transport)
+        self.api_key = os.environ.get("BING_API_KEY")
+        self.endpoint = "https://api.bing.microsoft.com/v7.0/search"
+    
+    def is_available(self) -> bool:
+        return self.api_key is not None
+    
+    def _request_args(self, query: str, max_results: int):
+        headers = {"Ocp-Apim-Subscription-Key": self.api_key}
+        params = {
+            "q": query,
+            "count": max_results,
+            "textDecorations": "false",
+            "textFormat": "HTML"
+        }
+        return headers, params
+    
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """使用 Bing Web Search API"""
+        if _race_lost():
+            return []
+        try:
+            headers, params = self._request_args(query, max_results)
+            response = self.transport.get(self.endpoint, headers=headers, params=params)
+            response.raise_for_status()
+            return self.parse(response.json())
+            
+        except Exception as e:
+            logger.error("Bing API search failed: %s", e)
+            _report_engine_error(e)
+            return []
+    
+    async def asearch(self, query: str, max_results: int = 5, client: Optional["AsyncHttpClient"] = None) -> List[Dict]:
+        """异步调用 Bing Web Search API"""
+        try:
+            headers, params = self._request_args(query, max_results)
+            response = await (client or get_async_client()).get(self.endpoint, headers=headers, params=params)
+            response.raise_for_status()
+            return self.parse(response.json())
+            
+        except Exception as e:
+            logger.error("Bing API search failed: %s", e)
+            _report_engine_error(e)
+            return []
+    
+    @staticmethod
+    def parse(search_results: Dict) -> List[Dict]:
+        """将 Bing API 响应转换为统一结果格式"""
+        results = []
+        for item in search_results.get("webPages", {}).get("value", []):
+            results.append({
+                'title': item.get('name', ''),
+                'href': item.get('url', ''),
+                'body': item.get('snippet', ''),
+                'source': 'bing_api'
+            })
+        return results
+
+
+class EngineStats:
+    """
+    单个引擎最近调用的延迟与结果统计
+    
+    最多保留 ENGINE_STATS_WINDOW 次调用，超过 ENGINE_STATS_MAX_AGE 秒的样本自动过期，
+    被降级的引擎因此会在一段时间后回到原有优先级重新接受试探
+    """
+    
+    def __init__(self, window: int = ENGINE_STATS_WINDOW, max_age: float = ENGINE_STATS_MAX_AGE):
+        self.max_age = max_age
+        self._samples: "deque" = deque(maxlen=window)
+    
+    def record(self, latency: float, outcome: str):
+        """记录一次调用，outcome 为 ok / empty / error"""
+        self._samples.append((time.monotonic(), latency, outcome))
+    
+    @property
+    def samples(self) -> List:
+        """未过期的 (latency, outcome) 样本"""
+        cutoff = time.monotonic() - self.max_age
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return [(latency, outcome) for _, latency, outcome in self._samples]
+    
+    def percentile(self, p: float) -> Optional[float]:
+        samples = self.samples
+        if not samples:
+            return None
+        latencies = sorted(latency for latency, _ in samples)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+    
+    def rate(self, outcome: str) -> float:
+        samples = self.samples
+        if not samples:
+            return 0.0
+        return sum(1 for _, o in samples if o == outcome) / len(samples)
+    
+    def to_dict(self) -> Dict:
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+        return {
+            "samples": len(self.samples),
+            "p50_ms": ms(self.percentile(50)),
+            "p90_ms": ms(self.percentile(90)),
+            "p99_ms": ms(self.percentile(99)),
+            "empty_rate": round(self.rate("empty"), 4),
+            "error_rate": round(self.rate("error"), 4),
+        }
+
+
+class SearchPolicy:
+    """
+    引擎调度策略
+    
+    Args:
+        adaptive: 是否按观测数据自适应排序（False 时保持固定优先级）
+        allow_paid: 是否允许使用付费引擎（Tavily / Bing API）
+        min_quality: 最低引擎质量等级（1-5），低于该等级的引擎不参与，除非没有其他可用引擎
+        max_latency: 延迟上限（秒），观测延迟超过上限的引擎排到最后
+        quota_reserve: 付费引擎保留的配额比例，剩余比例低于该值时不再使用
+        latency_percentile: 排序使用的延迟分位数
+        latency_weight: 每秒延迟对应的排序惩罚
+        failure_weight: 空结果率/错误率对应的排序惩罚
+        quota_weight: 配额消耗程度对应的排序惩罚
+        prior_samples: 观测样本的先验权重，样本越少越接近固定优先级
+        local_index: 是否先查询本地全文索引
+        local_min_hits: 本地索引命中数达到 min(local_min_hits, max_results) 时直接返回，不访问网络
+        local_max_age: 本地索引只使用最近多少秒内抓取的网页
+        local_merge: 本地命中不足时的合并方式："fill" 用本地结果补足网络结果的空位，"none" 不合并
+    """
+    
+    def __init__(self, adaptive: bool = True, allow_paid: bool = True, min_quality: int = 0,
+                 max_latency: Optional[float] = None, quota_reserve: float = 0.0, latency_percentile: int = 90,
+                 latency_weight: float = 0.5, failure_weight: float = 3.0, quota_weight: float = 1.0,
+                 prior_samples: int = 5, local_index: bool = True, local_min_hits: int = LOCAL_INDEX_MIN_HITS,
+                 local_max_age: float = LOCAL_INDEX_FRESHNESS, local_merge: str = "fill"):
+        self.adaptive = adaptive
+        self.allow_paid = allow_paid
+        self.min_quality = min_quality
+        self.max_latency = max_latency
+        self.quota_reserve = quota_reserve
+        self.latency_percentile = latency_percentile
+        self.latency_weight = latency_weight
+        self.failure_weight = failure_weight
+        self.quota_weight = quota_weight
+        self.prior_samples = prior_samples
+        self.local_index = local_index
+        self.local_min_hits = local_min_hits
+        self.local_max_age = local_max_age
+        self.local_merge = local_merge
+    
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class EngineScheduler:
+    """
+    自适应引擎调度器
+    
+    以固定优先级中的位置为基础分，叠加观测到的延迟分位数、空结果率、错误率和配额消耗程度的惩罚，
+    按总分从低到高排序。观测样本少时惩罚按 n / (n + prior_samples) 打折，因此冷启动时与固定顺序一致。
+    """
+    
+    def __init__(self, policy: Optional[SearchPolicy] = None):
+        self.policy = policy or SearchPolicy()
+        self.stats = {name: EngineStats() for name in ENGINE_PROFILES}
+        self.last_decision: List[Dict] = []
+        self._lock = threading.Lock()
+    
+    def record(self, engine: str, latency: float, outcome: str):
+        with self._lock:
+            if engine in self.stats:
+                self.stats[engine].record(latency, outcome)
+    
+    def rank(self, plan: List[Dict], quota_status: Dict) -> List[Dict]:
+        """按策略过滤并排序引擎，每个步骤附带 score 和 reasons 说明"""
+        policy = self.policy
+        candidates = []
+        excluded = []
+        for position, step in enumerate(plan):
+            profile = ENGINE_PROFILES[step['key']]
+            step = dict(step, score=float(position), reasons=[f"base priority {position}"])
+            
+            if profile['paid'] and not policy.allow_paid:
+                excluded.append(dict(step, reasons=["paid engines disabled by policy"]))
+                continue
+            if step['quota']:
+                quota = quota_status.get(step['quota'], {})
+                limit = quota.get('limit') or 1
+                remaining_ratio = quota.get('remaining', 0) / limit
+                if remaining_ratio <= policy.quota_reserve:
+                    excluded.append(dict(step, reasons=[f"quota below reserve ({remaining_ratio:.0%} left)"]))
+                    continue
+                if policy.adaptive and policy.quota_weight:
+                    penalty = policy.quota_weight * (1 - remaining_ratio)
+                    step['score'] += penalty
+                    step['reasons'].append(f"quota used +{penalty:.2f}")
+            if profile['quality'] < policy.min_quality:
+                step['low_quality'] = True
+            candidates.append(step)
+        
+        if policy.adaptive:
+            with self._lock:
+                for step in candidates:
+                    self._apply_observations(step, self.stats[step['key']])
+        
+        preferred = [step for step in candidates if not step.get('low_quality')]
+        if preferred:
+            excluded.extend(dict(step, reasons=[f"quality below {policy.min_quality}"])
+                            for step in candidates if step.get('low_quality'))
+            candidates = preferred
+        
+        ranked = sorted(candidates, key=lambda step: (step.get('too_slow', False), step['score']))
+        with self._lock:
+            self.last_decision = [
+                {"engine": step['key'], "score": round(step['score'], 3), "reasons": step['reasons']}
+                for step in ranked
+            ] + [
+                {"engine": step['key'], "score": None, "reasons": step['reasons'], "excluded": True}
+                for step in excluded
+            ]
+        return ranked
+    
+    def _apply_observations(self, step: Dict, stats: EngineStats):
+        policy = self.policy
+        samples = len(stats.samples)
+        if not samples:
+            return
+        confidence = samples / (samples + policy.prior_samples)
+        
+        latency = stats.percentile(policy.latency_percentile)
+        penalty = policy.latency_weight * latency * confidence
+        step['score'] += penalty
+        step['reasons'].append(f"p{policy.latency_percentile} {latency * 1000:.0f}ms +{penalty:.2f}")
+        
+        failure = stats.rate("empty") + stats.rate("error")
+        if failure:
+            penalty = policy.failure_weight * failure * confidence
+            step['score'] += penalty
+            step['reasons'].append(f"empty/error {failure:.0%} +{penalty:.2f}")
+        
+        if policy.max_latency is not None and latency > policy.max_latency:
+            step['too_slow'] = True
+            step['reasons'].append(f"slower than {policy.max_latency}s limit")
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "policy": self.policy.to_dict(),
+                "stats": {name: stats.to_dict() for name, stats in self.stats.items()},
+                "last_decision": list(self.last_decision),
+            }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+class SearchOutcome:
+    """
+    一次搜索的结构化结果
+    
+    Attributes:
+        query: 搜索关键词
+        results: 搜索结果列表
+        engine: 返回结果的引擎（全部失败时为最后尝试的引擎，未尝试任何引擎时为空）
+        cached: 是否命中结果缓存
+        strategy: "sequential" 或 "race"
+        prefer_quality: 是否质量优先
+        availability: 本次使用的各引擎可用性（命中缓存时为空）
+        quota: 本次使用的配额快照（命中缓存时为空）
+        timings: 各阶段耗时（毫秒）：cache_ms / index_ms / network_ms / quota_ms / engines_ms / total_ms
+    """
+    
+    __slots__ = ("query", "results", "engine", "cached", "strategy", "prefer_quality", "availability", "quota",
+                 "timings")
+    
+    def __init__(self, query: str, strategy: str = "sequential", prefer_quality: bool = False):
+        self.query = query
+        self.results: List[Dict] = []
+        self.engine = ""
+        self.cached = False
+        self.strategy = strategy
+        self.prefer_quality = prefer_quality
+        self.availability: Dict[str, bool] = {}
+        self.quota: Dict = {}
+        self.timings: Dict[str, float] = {}
+    
+    def finish(self, started: float) -> "SearchOutcome":
+        self.timings['total_ms'] = _elapsed_ms(started)
+        return self
+    
+    @property
+    def ok(self) -> bool:
+        return bool(self.results)
+    
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SearchOutcome":
+        outcome = cls(data["query"])
+        for name in cls.__slots__:
+            if name in data:
+                setattr(outcome, name, data[name])
+        return outcome
+    
+    def __repr__(self):
+        return (f"SearchOutcome(query={self.query!r}, engine={self.engine!r}, results={len(self.results)}, "
+                f"cached={self.cached}, total_ms={self.timings.get('total_ms')})")
+
+
+def format_search_outcome(outcome: SearchOutcome) -> str:
+    """把 SearchOutcome 渲染成可读报告（search(verbose=True) 打印的内容）"""
+    mode = 'Quality Priority' if outcome.prefer_quality else 'Balanced'
+    lines = ["=" * 60, "🔍 Multi-Search - 智能多引擎搜索", "=" * 60, f"[Query] {outcome.query}",
+             f"[Mode] {mode}{' / Race' if outcome.strategy == 'race' else ''}", "-" * 60]
+    if outcome.cached:
+        lines.append(f"[Cache] Hit, served from {outcome.engine} results")
+        used_engine = f"Cache ({outcome.engine})"
+    elif outcome.engine == "Local Index":
+        lines.append("[Local Index] Hit, served from previously fetched pages")
+        used_engine = outcome.engine
+    else:
+        lines.append("[Network] Checking availability...")
+        for key, label in (('duckduckgo', 'DuckDuckGo'), ('bing', 'Bing'), ('tavily', 'Tavily')):
+            lines.append(f"  {label}: {'✅' if outcome.availability.get(key) else '❌'}")
+        lines.append("-" * 60)
+        for key, label in (('tavily', 'Tavily'), ('bing_api', 'Bing API')):
+            info = outcome.quota.get(key)
+            if info:
+                lines.append(f"[Quota] {label}: {info['remaining']}/{info['limit']} remaining")
+        lines.append("-" * 60)
+        used_engine = outcome.engine
+    
+    if outcome.results:
+        lines.append(f"\n[OK] {used_engine} returned {len(outcome.results)} results:\n")
+        for idx, r in enumerate(outcome.results, 1):
+            lines.append(f"{idx}. {r['title']}")
+            lines.append(f"   Source: {r['source']}")
+            lines.append(f"   URL: {r['href']}")
+            if r['body']:
+                lines.append(f"   Summary: {r['body'][:150]}...")
+            lines.append("")
+    else:
+        lines.append("[ERROR] All search engines failed")
+        lines.append("[TIP] Try enabling VPN or check your network connection")
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+class MultiSearch:
+    """多引擎搜索管理器"""
+    
+    def __init__(self, transport: Optional[HttpTransport] = None, result_cache: Optional[ResultCache] = None,
+                 quota_manager: Optional[QuotaManager] = None, network_checker: Optional[NetworkChecker] = None,
+                 health_monitor: Optional[HealthMonitor] = None, scheduler: Optional[EngineScheduler] = None,
+                 local_index: Optional["LocalIndex"] = None, rate_limiter: Optional[RateLimiter] = None):
+        self.transport = transport or get_transport()
+        self.result_cache = result_cache or get_result_cache()
+        self.local_index = local_index or get_local_index()
+        self.quota_manager = quota_manager or QuotaManager()
+        self.network_checker = network_checker or NetworkChecker(self.transport)
+        self.health = health_monitor or HealthMonitor(self.network_checker)
+        self.scheduler = scheduler or EngineScheduler()
+        self.coalescer = RequestCoalescer()
+        self.duckduckgo = DuckDuckGoSearch(self.transport, rate_limiter)
+        self.bing_scraper = BingScraper(self.transport, rate_limiter)
+        self.tavily = TavilySearch(self.transport)
+        self.bing_api = BingAPISearch(self.transport)
+        self._executor: Optional["ThreadPoolExecutor"] = None
+    
+    def search(self, query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False,
+               use_cache: bool = True, strategy: str = "sequential", hedge_delay: float = RACE_HEDGE_DELAY,
+               race_paid: bool = False, verbose: Optional[bool] = None) -> List[Dict]:
+        """
+        智能搜索 - 自动选择最佳引擎
+        
+        Args:
+            query: 搜索关键词
+            max_results: 最大结果数
+            prefer_quality: 是否优先质量（优先使用 Tavily）
+            force_network_check: 是否强制重新检测网络
+            use_cache: 是否使用搜索结果缓存
+            strategy: "sequential" 逐个回退，或 "race" 并行竞速
+            hedge_delay: 竞速模式下启动下一个引擎前的等待秒数（0 表示同时启动）
+            race_paid: 竞速模式下付费引擎是否参与竞速
+            verbose: 是否打印可读报告（默认打印，环境变量 MULTI_SEARCH_QUIET=1 时不打印）
+        
+        Returns:
+            搜索结果列表
+        """
+        outcome = self.run(query, max_results, prefer_quality, force_network_check, use_cache, strategy,
+                           hedge_delay, race_paid)
+        if SEARCH_VERBOSE if verbose is None else verbose:
+            print(format_search_outcome(outcome))
+        return outcome.results
+    
+    def run(self, query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False,
+            use_cache: bool = True, strategy: str = "sequential", hedge_delay: float = RACE_HEDGE_DELAY,
+            race_paid: bool = False) -> "SearchOutcome":
+        """智能搜索的静默版本，参数与 search 相同，不打印任何内容，返回 SearchOutcome"""
+        started = time.perf_counter()
+        outcome = SearchOutcome(query, strategy, prefer_quality)
+        with _metrics.span("search", {'query': query}, strategy=strategy):
+            cache_key = self.result_cache.make_key(query, max_results, 'quality' if prefer_quality else 'balanced')
+            if use_cache and self._lookup_cache(cache_key, outcome):
+                return outcome.finish(started)
+            local = self._lookup_index(query, max_results, outcome) if use_cache else []
+            if outcome.results:
+                return outcome.finish(started)
+            
+            outcome.availability, outcome.quota = self._check_engines(force_network_check, outcome.timings)
+            mark = time.perf_counter()
+            results, outcome.engine = self._execute(query, max_results, prefer_quality, outcome.availability,
+                                                    outcome.quota, strategy, hedge_delay, race_paid)
+            outcome.timings['engines_ms'] = _elapsed_ms(mark)
+            outcome.results = self._merge_local(self._store(results, cache_key if use_cache else None), local,
+                                                max_results)
+            return outcome.finish(started)
+    
+    def iter_search(self, query: str, max_results: int = 5, prefer_quality: bool = False,
+                    force_network_check: bool = False, use_cache: bool = True):
+        """
+        流式智能搜索：按引擎解析顺序逐条产出 SearchResult，无需等待整批结果
+        
+        按顺序回退（不支持竞速）。提前结束迭代（break 或 close()）时停止正在执行的引擎，
+        不完整的结果不写入缓存
+        """
+        cache_key = self.result_cache.make_key(query, max_results, 'quality' if prefer_quality else 'balanced')
+        local: List[Dict] = []
+        if use_cache:
+            outcome = SearchOutcome(query, prefer_quality=prefer_quality)
+            if not self._lookup_cache(cache_key, outcome):
+                local = self._lookup_index(query, max_results, outcome)
+            for item in outcome.results:
+                yield SearchResult.from_dict(item)
+            if outcome.results:
+                return
+        
+        availability = self._get_availability(force_network_check)
+        quota_status = self.quota_manager.get_quota_status()
+        plan = self.scheduler.rank(self._plan_engines(availability, quota_status, prefer_quality), quota_status)
+        results: List[SearchResult] = []
+        attempted = False
+        for step in plan:
+            logger.debug("Strategy: %s", step['message'])
+            if not self._take_quota(step):
+                continue
+            if attempted:
+                _metrics.inc("fallbacks_total", engine=step['key'])
+            attempted = True
+            for result in self._iter_step(step, query, max_results, results):
+                yield result
+            if results:
+                break
+        
+        self._store([result.to_dict() for result in results], cache_key if use_cache else None)
+        seen = {canonicalize_url(result.href) for result in results}
+        for item in local[:max(0, max_results - len(results))]:
+            if canonicalize_url(item['href']) not in seen:
+                yield SearchResult.from_dict(item)
+    
+    def _iter_step(self, step: Dict, query: str, max_results: int, results: List[SearchResult]):
+        """
+        流式执行单个引擎，产出的结果同时追加到 results
+        
+        只在引擎完整结束时记录健康状态与调度统计（提前结束迭代不算成功或失败，只归还半开试探名额）
+        """
+        errors: List[str] = []
+        started = time.perf_counter()
+        source = step['engine'].iter_search(query, max_results)
+        completed = False
+        try:
+            while True:
+                token = _engine_errors.set(errors)
+                try:
+                    result = next(source)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    logger.error("%s search failed: %s", step['name'], e)
+                    errors.append(str(e))
+                    break
+                finally:
+                    _engine_errors.reset(token)
+                results.append(result)
+                yield result
+            completed = True
+        finally:
+            source.close()
+            if not completed:
+                self.health.release(step['key'])
+        self._record_outcome(step, results, errors, time.perf_counter() - started)
+    
+    def _execute(self, query: str, max_results: int, prefer_quality: bool, availability: Dict[str, bool],
+                 quota_status: Dict, strategy: str = "sequential", hedge_delay: float = RACE_HEDGE_DELAY,
+                 race_paid: bool = False, budget: Optional[_QuotaBudget] = None):
+        """按调度结果执行一次搜索（不读写缓存），返回 (results, used_engine)"""
+        plan = self.scheduler.rank(self._plan_engines(availability, quota_status, prefer_quality), quota_status)
+        if strategy == "race":
+            return self._search_race(plan, query, max_results, hedge_delay, race_paid, budget)
+        return self._search_sequential(plan, query, max_results, budget)
+    
+    def search_many(self, queries: List[str], max_results: int = 5, prefer_quality: bool = False,
+                    max_concurrency: int = SEARCH_MANY_CONCURRENCY, quota_budget: Optional[int] = None,
+                    use_cache: bool = True, strategy: str = "sequential",
+                    on_result: Optional[Callable[[str, List[Dict]], None]] = None) -> Dict:
+        """
+        批量搜索多个查询，并发执行并合并去重
+        
+        Args:
+            queries: 查询列表（大小写/空白不同的相同查询只搜索一次）
+            max_results: 每个查询的最大结果数
+            prefer_quality: 是否优先质量
+            max_concurrency: 最大并发查询数
+            quota_budget: 整批最多允许的付费引擎调用次数（None 表示不额外限制）
+            use_cache: 是否使用搜索结果缓存
+            strategy: "sequential" 或 "race"
+            on_result: 每个查询完成时的回调 on_result(query, results)
+        
+        Returns:
+            {'per_query': {query: results}, 'merged': [...], 'stats': {...}}
+        """
+        per_query: Dict[str, List[Dict]] = {}
+        stats: Dict = {}
+        for query, results in self._iter_batch(queries, max_results, prefer_quality, max_concurrency,
+                                               quota_budget, use_cache, strategy, stats):
+            per_query[query] = results
+            if on_result is not None:
+                on_result(query, results)
+        
+        ordered = list(dict.fromkeys(queries))
+        merged = merge_results([per_query.get(query, []) for query in ordered], ordered)
+        stats['results'] = sum(len(per_query.get(query, [])) for query in ordered)
+        stats['merged'] = len(merged)
+        return {'per_query': {query: per_query.get(query, []) for query in ordered}, 'merged': merged,
+                'stats': stats}
+    
+    def iter_search_many(self, queries: List[str], max_results: int = 5, prefer_quality: bool = False,
+                         max_concurrency: int = SEARCH_MANY_CONCURRENCY, quota_budget: Optional[int] = None,
+                         use_cache: bool = True, strategy: str = "sequential"):
+        """
+        批量搜索的流式版本：按完成顺序逐个产出 (query, results)，无需等待最慢的查询
+        
+        网络可用性和配额只在开始时读取一次，单个查询不打印过程信息
+        """
+        return self._iter_batch(queries, max_results, prefer_quality, max_concurrency, quota_budget, use_cache,
+                                strategy, {})
+    
+    def _iter_batch(self, queries: List[str], max_results: int, prefer_quality: bool, max_concurrency: int,
+                    quota_budget: Optional[int], use_cache: bool, strategy: str, stats: Dict):
+        """批量搜索实现，执行统计写入 stats"""
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        mode = 'quality' if prefer_quality else 'balanced'
+        groups: "OrderedDict[str, List[str]]" = OrderedDict()
+        for query in queries:
+            groups.setdefault(self.result_cache.make_key(query, max_results, mode), []).append(query)
+        
+        availability = self._get_availability()
+        quota_status = self.quota_manager.get_quota_status()
+        budget = _QuotaBudget(quota_budget)
+        stats.update(queries=len(queries), unique_queries=len(groups), cache_hits=0, coalesced=0, paid_calls=0)
+        lock = threading.Lock()
+        
+        def run_one(cache_key: str, query: str) -> List[Dict]:
+            if use_cache:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    with lock:
+                        stats['cache_hits'] += 1
+                    return cached['results']
+            
+            def execute():
+                results, _ = self._execute(query, max_results, prefer_quality, availability, quota_status,
+                                           strategy, budget=budget)
+                if results and use_cache:
+                    self.result_cache.put(cache_key, results[0]['source'], results)
+                return results
+            
+            results, coalesced = self.coalescer.run(cache_key, execute)
+            if coalesced:
+                with lock:
+                    stats['coalesced'] += 1
+            return [dict(r) for r in results]
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+        futures = {}
+        try:
+            futures = {executor.submit(run_one, key, group[0]): group for key, group in groups.items()}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error("Batch query failed: %s", e)
+                    results = []
+                # 同组的每个查询拿到独立的副本，修改其中一个不影响其他查询
+                for query in futures[future]:
+                    yield query, [dict(r) for r in results]
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+            stats['paid_calls'] = budget.used
+    
+    def _lookup_cache(self, cache_key: str, outcome: "SearchOutcome") -> bool:
+        """查询结果缓存，命中时把结果写入 outcome"""
+        mark = time.perf_counter()
+        cached = self.result_cache.get(cache_key)
+        outcome.timings['cache_ms'] = _elapsed_ms(mark)
+        if cached is None:
+            return False
+        outcome.results = cached['results']
+        outcome.engine = cached['engine']
+        outcome.cached = True
+        return True
+    
+    def _get_availability(self, force_network_check: bool = False) -> Dict[str, bool]:
+        """
+        读取各引擎可用性
+        
+        默认只读取后台健康监控的内存状态，不阻塞；force_network_check 时立即并行探测一轮
+        """
+        with _metrics.span("network_check"):
+            if force_network_check:
+                self.health.probe_all()
+            self.health.start()
+            return {
+                'duckduckgo': self.health.is_available('duckduckgo'),
+                'bing': self.health.is_available('bing'),
+                'tavily': self.tavily.is_available() and self.health.is_available('tavily'),
+                'bing_api': self.bing_api.is_available() and self.health.is_available('bing_api'),
+            }
+    
+    def _lookup_index(self, query: str, max_results: int, outcome: "SearchOutcome") -> List[Dict]:
+        """
+        查询本地全文索引：命中数足够时把结果写入 outcome（不再访问网络），
+        否则返回按合并策略需要补充到网络结果中的本地命中
+        """
+        policy = self.scheduler.policy
+        if not policy.local_index or not self.local_index.enabled:
+            return []
+        mark = time.perf_counter()
+        with _metrics.span("local_index"):
+            local = self.local_index.search(query, max_results, policy.local_max_age)
+        outcome.timings['index_ms'] = _elapsed_ms(mark)
+        needed = max(1, min(policy.local_min_hits, max_results))
+        self.local_index.record(len(local), needed)
+        _metrics.inc("cache_requests_total", cache="local_index",
+                     outcome="hit" if len(local) >= needed else ("partial" if local else "miss"))
+        if len(local) >= needed:
+            outcome.results = local
+            outcome.engine = "Local Index"
+            return local
+        return local if policy.local_merge == "fill" else []
+    
+    @staticmethod
+    def _merge_local(results: List[Dict], local: List[Dict], max_results: int) -> List[Dict]:
+        """用本地索引命中补足网络结果的空位（按规范化 URL 去重）"""
+        if not local or len(results) >= max_results:
+            return results
+        seen = {canonicalize_url(r['href']) for r in results}
+        extra = [r for r in local if canonicalize_url(r['href']) not in seen]
+        return results + extra[:max_results - len(results)]
+    
+    def _check_engines(self, force_network_check: bool, timings: Dict):
+        """读取网络可用性与配额，返回 (availability, quota_status)，耗时写入 timings"""
+        mark = time.perf_counter()
+        availability = self._get_availability(force_network_check)
+        timings['network_ms'] = _elapsed_ms(mark)
+        mark = time.perf_counter()
+        quota_status = self.quota_manager.get_quota_status()
+        timings['quota_ms'] = _elapsed_ms(mark)
+        return availability, quota_status
+    
+    def _store(self, results: List[Dict], cache_key: Optional[str]) -> List[Dict]:
+        """有结果时写入缓存"""
+        if results and cache_key is not None:
+            self.result_cache.put(cache_key, results[0]['source'], results)
+        return results
+    
+    def _plan_engines(self, availability: Dict[str, bool], quota_status: Dict, prefer_quality: bool) -> List[Dict]:
+        """按策略生成引擎尝试顺序，quota 为需要消耗配额的服务名"""
+        plan = []
+        if prefer_quality and availability['tavily'] and quota_status['tavily']['remaining'] > 0:
+            plan.append({'name': 'Tavily', 'key': 'tavily', 'engine': self.tavily, 'quota': 'tavily',
+                         'message': 'Quality first: Trying Tavily...'})
+        if availability['duckduckgo']:
+            plan.append({'name': 'DuckDuckGo', 'key': 'duckduckgo', 'engine': self.duckduckgo, 'quota': None,
+                         'message': 'Trying DuckDuckGo...'})
+        if availability['bing_api'] and quota_status['bing_api']['remaining'] > 0:
+            plan.append({'name': 'Bing API', 'key': 'bing_api', 'engine': self.bing_api, 'quota': 'bing_api',
+                         'message': 'Trying Bing Web Search API...'})
+        if availability['bing']:
+            plan.append({'name': 'Bing Scraper', 'key': 'bing', 'engine': self.bing_scraper, 'quota': None,
+                         'message': 'Using Bing Scraper (fallback)...'})
+        return plan
+    
+    def _take_quota(self, step: Dict, budget: Optional[_QuotaBudget] = None) -> bool:
+        """
+        引擎开始执行前调用：熔断半开时占用唯一的试探名额，付费引擎同时扣减配额（以及批量预算）
+        
+        试探名额已被占用或配额不足时返回 False
+        """
+        if not self.health.begin(step['key']):
+            return False
+        if not step['quota']:
+            return True
+        if budget is not None and not budget.take():
+            self.health.release(step['key'])
+            return False
+        if self.quota_manager.use_quota(step['quota']):
+            return True
+        if budget is not None:
+            budget.refund()
+        self.health.release(step['key'])
+        return False
+    
+    def _refund_quota(self, step: Dict, budget: Optional[_QuotaBudget] = None):
+        """退还 _take_quota 占用的试探名额和扣减的配额（请求没有真正发出时）"""
+        self.health.release(step['key'])
+        if not step['quota']:
+            return
+        self.quota_manager.refund(step['quota'])
+        if budget is not None:
+            budget.refund()
+    
+    def _search_sequential(self, plan: List[Dict], query: str, max_results: int,
+                           budget: Optional[_QuotaBudget] = None):
+        """按顺序逐个尝试引擎，直到有结果返回"""
+        used_engine = ""
+        for step in plan:
+            logger.debug("Strategy: %s", step['message'])
+            if not self._take_quota(step, budget):
+                continue
+            if used_engine:
+                _metrics.inc("fallbacks_total", engine=step['key'])
+            used_engine = step['name']
+            results = self._run_step(step, query, max_results)
+            if results:
+                return results, used_engine
+        return [], used_engine
+    
+    def _run_step(self, step: Dict, query: str, max_results: int, cancel: Optional[threading.Event] = None,
+                  budget: Optional[_QuotaBudget] = None) -> List[Dict]:
+        """
+        执行单个引擎搜索并记录健康状态与调度统计
+        
+        竞速时传入 cancel：在线程中真正开始时才扣减配额，cancel 已置位（其他引擎已返回结果）时不再发出请求，
+        得到结果后置位 cancel；引擎在请求前发现 cancel 置位而放弃时退还配额，也不记录健康状态
+        """
+        state = None
+        if cancel is not None:
+            if cancel.is_set() or not self._take_quota(step, budget):
                 return []
+            state = {'cancel': cancel, 'skipped': False}
+        errors: List[str] = []
+        token = _engine_errors.set(errors)
+        race_token = _race_state.set(state)
+        started = time.perf_counter()
+        try:
+            with _metrics.span("engine", engine=step['key']):
+                results = step['engine'].search(query, max_results)
+        except Exception as e:
+            logger.error("%s search failed: %s", step['name'], e)
+            errors.append(str(e))
+            results = []
+        finally:
+            _race_state.reset(race_token)
+            _engine_errors.reset(token)
+        if state is not None and state['skipped']:
+            logger.debug("Race: %s skipped, another engine already answered", step['name'])
+            self._refund_quota(step, budget)
+            return []
+        if cancel is not None and results:
+            # 在工作线程中立即置位，排在后面的引擎不必等调度线程处理完结果
+            cancel.set()
+        self._record_outcome(step, results, errors, time.perf_counter() - started)
+        return results
+    
+    def _record_outcome(self, step: Dict, results: List[Dict], errors: List[str], latency: float):
+        """空结果对熔断器视为失败；调度统计区分 ok / empty / error"""
+        outcome = 'ok' if results else ('error' if errors else 'empty')
+        self.health.record(step['key'], bool(results), latency)
+        self.scheduler.record(step['key'], latency, outcome)
+        _metrics.inc("engine_attempts_total", engine=step['key'])
+        if outcome != 'ok':
+            _metrics.inc("engine_failures_total", engine=step['key'], reason=outcome)
+    
+    def _search_race(self, plan: List[Dict], query: str, max_results: int, hedge_delay: float, race_paid: bool,
+                     budget: Optional[_QuotaBudget] = None):
+        """
+        竞速搜索 - 按 hedge_delay 间隔依次启动引擎，返回最先得到的有效结果
+        
+        某个引擎失败时立即启动下一个。付费引擎默认不参与竞速，只在所有免费引擎都失败后
+        按顺序回退；race_paid=True 时付费引擎也参与竞速。已有结果后置位取消标记：
+        还在排队或等待限速的引擎不再发出请求，配额只在请求真正发出前扣减（已发出的付费请求即使结果被丢弃也已计费）。
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+        queue = [step for step in plan if race_paid or not step['quota']]
+        fallback = [step for step in plan if not race_paid and step['quota']]
+        executor = self._get_executor()
+        cancel = threading.Event()
+        running = {}
+        next_launch = time.monotonic()
+        
+        while queue or running:
+            now = time.monotonic()
+            if queue and (not running or now >= next_launch):
+                step = queue.pop(0)
+                logger.debug("Race: starting %s", step['name'])
+                running[executor.submit(self._run_step, step, query, max_results, cancel, budget)] = step
+                next_launch = now + hedge_delay
+                continue
+            
+            timeout = max(0.0, next_launch - now) if queue else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error("%s search failed: %s", step['name'], e)
+                    results = []
+                if results:
+                    cancel.set()
+                    for other in running:
+                        other.cancel()
+                    return results, step['name']
+                logger.debug("Race: %s returned no results", step['name'])
+        
+        if fallback:
+            return self._search_sequential(fallback, query, max_results, budget)
+        return [], ""
+    
+    def set_policy(self, policy: SearchPolicy):
+        """设置引擎调度策略"""
+        self.scheduler.policy = policy
+    
+    def get_policy(self) -> SearchPolicy:
+        """获取当前引擎调度策略"""
+        return self.scheduler.policy
+    
+    def explain_plan(self, prefer_quality: bool = False) -> List[Dict]:
+        """不执行搜索，返回当前状态下的引擎排序及理由"""
+        availability = self._get_availability()
+        quota_status = self.quota_manager.get_quota_status()
+        self.scheduler.rank(self._plan_engines(availability, quota_status, prefer_quality), quota_status)
+        return self.scheduler.snapshot()["last_decision"]
+    
+    def _get_executor(self) -> "ThreadPoolExecutor":
+        """竞速模式使用的线程池（延迟创建，随实例复用）"""
+        if self._executor is None:
+            with _shared_lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=RACE_MAX_WORKERS)
+        return self._executor
+    
+    def get_status(self, force_network_check: bool = False) -> Dict:
+        """获取搜索系统状态"""
+        quota = self.quota_manager.get_quota_status()
+        availability = self._get_availability(force_network_check)
+        parse_pool = get_parse_pool()
+        
+        return {
+            "quota": quota,
+            "network": availability,
+            "health": self.health.snapshot(),
+            "scheduler": self.scheduler.snapshot(),
+            "cache": self.result_cache.get_stats(),
+            "local_index": self.local_index.get_stats(),
+            "dedup": get_fingerprint_store().get_stats(),
+            "parse_pool": parse_pool.get_stats() if parse_pool is not None else None,
+            "rate_limit": self.duckduckgo.rate_limiter.get_stats(),
+            "metrics": _metrics.snapshot(),
+            "startup": dict(_STARTUP),
+            "engines": {
+                "duckduckgo": {"available": availability['duckduckgo'], "type": "unlimited"},
+                "bing_scraper": {"available": availability['bing'], "type": "unlimited"},
+                "tavily": {"available": availability['tavily'], "type": "api"},
+                "bing_api": {"available": availability['bing_api'], "type": "api"}
+            }
+        }
+
+
+class AsyncMultiSearch(MultiSearch):
+    """
+    异步多引擎搜索管理器
+
+    与 MultiSearch 共享引擎、配额、缓存和策略逻辑，网络请求通过共享的 AsyncHttpClient
+    在事件循环中并发执行；没有原生异步接口的引擎（如 DuckDuckGo）在线程池中运行
+    """
+    
+    def __init__(self, transport: Optional[HttpTransport] = None, result_cache: Optional[ResultCache] = None,
+                 quota_manager: Optional[QuotaManager] = None, network_checker: Optional[NetworkChecker] = None,
+                 health_monitor: Optional[HealthMonitor] = None, scheduler: Optional[EngineScheduler] = None,
+                 client: Optional[AsyncHttpClient] = None, local_index: Optional["LocalIndex"] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        super().__init__(transport, result_cache, quota_manager, network_checker, health_monitor, scheduler,
+                         local_index, rate_limiter)
+        self.client = client or get_async_client()
+    
+    async def asearch(self, query: str, max_results: int = 5, prefer_quality: bool = False,
+                      force_network_check: bool = False, use_cache: bool = True, strategy: str = "sequential",
+                      hedge_delay: float = RACE_HEDGE_DELAY, race_paid: bool = False,
+                      verbose: Optional[bool] = None) -> List[Dict]:
+        """异步智能搜索，参数与 MultiSearch.search 相同"""
+        outcome = await self.arun(query, max_results, prefer_quality, force_network_check, use_cache, strategy,
+                                  hedge_delay, race_paid)
+        if SEARCH_VERBOSE if verbose is None else verbose:
+            print(format_search_outcome(outcome))
+        return outcome.results
+    
+    async def arun(self, query: str, max_results: int = 5, prefer_quality: bool = False,
+                   force_network_check: bool = False, use_cache: bool = True, strategy: str = "sequential",
+                   hedge_delay: float = RACE_HEDGE_DELAY, race_paid: bool = False) -> "SearchOutcome":
+        """异步智能搜索的静默版本，返回 SearchOutcome"""
+        import asyncio
+        started = time.perf_counter()
+        outcome = SearchOutcome(query, strategy, prefer_quality)
+        cache_key = self.result_cache.make_key(query, max_results, 'quality' if prefer_quality else 'balanced')
+        if use_cache and self._lookup_cache(cache_key, outcome):
+            return outcome.finish(started)
+        local = self._lookup_index(query, max_results, outcome) if use_cache else []
+        if outcome.results:
+            return outcome.finish(started)
+        
+        loop = asyncio.get_running_loop()
+        outcome.availability, outcome.quota = await loop.run_in_executor(None, self._check_engines,
+                                                                         force_network_check, outcome.timings)
+        
+        mark = time.perf_counter()
+        plan = self.scheduler.rank(self._plan_engines(outcome.availability, outcome.quota, prefer_quality),
+                                   outcome.quota)
+        if strategy == "race":
+            results, outcome.engine = await self._asearch_race(plan, query, max_results, hedge_delay, race_paid)
+        else:
+            results, outcome.engine = await self._asearch_sequential(plan, query, max_results)
+        outcome.timings['engines_ms'] = _elapsed_ms(mark)
+        outcome.results = self._merge_local(self._store(results, cache_key if use_cache else None), local,
+                                            max_results)
+        return outcome.finish(started)
+    
+    async def _asearch_sequential(self, plan: List[Dict], query: str, max_results: int):
+        """按顺序逐个尝试引擎，直到有结果返回"""
+        used_engine = ""
+        for step in plan:
+            logger.debug("Strategy: %s", step['message'])
+            if not self._take_quota(step):
+                continue
+            if used_engine:
+                _metrics.inc("fallbacks_total", engine=step['key'])
+            used_engine = step['name']
+            results = await self._arun_step(step, query, max_results)
+            if results:
+                return results, used_engine
+        return [], used_engine
+    
+    async def _arun_step(self, step: Dict, query: str, max_results: int) -> List[Dict]:
+        """异步执行单个引擎搜索并记录健康状态与调度统计"""
+        errors: List[str] = []
+        token = _engine_errors.set(errors)
+        started = time.perf_counter()
+        try:
+            with _metrics.span("engine", engine=step['key']):
+                results = await step['engine'].asearch(query, max_results, self.client)
+        except Exception as e:
+            logger.error("%s search failed: %s", step['name'], e)
+            errors.append(str(e))
+            results = []
+        except BaseException:
+            # 竞速中被取消：没有结果可记录，归还半开试探名额
+            self.health.release(step['key'])
+            raise
+        finally:
+            _engine_errors.reset(token)
+        self._record_outcome(step, results, errors, time.perf_counter() - started)
+        return results
+    
+    async def _asearch_race(self, plan: List[Dict], query: str, max_results: int, hedge_delay: float,
+                            race_paid: bool):
+        """竞速搜索，规则与 MultiSearch._search_race 相同；得到结果后取消其余请求"""
+        import asyncio
+        queue = [step for step in plan if race_paid or not step['quota']]
+        fallback = [step for step in plan if not race_paid and step['quota']]
+        running = {}
+        loop = asyncio.get_running_loop()
+        next_launch = loop.time()
+        
+        try:
+            while queue or running:
+                now = loop.time()
+                if queue and (not running or now >= next_launch):
+                    step = queue.pop(0)
+                    if not self._take_quota(step):
+                        continue
+                    logger.debug("Race: starting %s", step['name'])
+                    task = asyncio.ensure_future(self._arun_step(step, query, max_results))
+                    running[task] = step
+                    next_launch = now + hedge_delay
+                    continue
+                
+                timeout = max(0.0, next_launch - now) if queue else None
+                done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = running.pop(task)
+                    try:
+                        results = task.result()
+                    except Exception as e:
+                        logger.error("%s search failed: %s", step['name'], e)
+                        results = []
+                    if results:
+                        return results, step['name']
+                    logger.debug("Race: %s returned no results", step['name'])
+        finally:
+            for task in running:
+                task.cancel()
+        
+        if fallback:
+            return await self._asearch_sequential(fallback, query, max_results)
+        return [], ""
+
+
+_shared_instances: Dict[str, object] = {}
+_shared_lock = threading.Lock()
+
+
+def _get_shared(name: str, factory: Callable[[], object]):
+    """获取进程内共享实例，首次使用时创建"""
+    instance = _shared_instances.get(name)
+    if instance is None:
+        with _shared_lock:
+            instance = _shared_instances.get(name)
+            if instance is None:
+                instance = factory()
+                _shared_instances[name] = instance
+    return instance
+
+
+def get_multi_search() -> MultiSearch:
+    """
+    获取进程内复用的 MultiSearch
+
+    配额与网络检测状态只在首次创建时从磁盘加载，之后保存在内存中并延迟写回
+    """
+    return _get_shared("multi_search", MultiSearch)
+
+
+def get_async_multi_search() -> AsyncMultiSearch:
+    """获取进程内复用的 AsyncMultiSearch，与 get_multi_search() 共享配额和网络检测状态"""
+    def factory():
+        base = get_multi_search()
+        return AsyncMultiSearch(base.transport, base.result_cache, base.quota_manager, base.network_checker,
+                                base.health, base.scheduler, local_index=base.local_index,
+                                rate_limiter=base.duckduckgo.rate_limiter)
+    return _get_shared("async_multi_search", factory)
+
+
+def set_search_policy(policy: Optional[SearchPolicy] = None, **options) -> SearchPolicy:
+    """
+    设置共享实例的引擎调度策略
+    
+    Examples:
+        set_search_policy(allow_paid=False)             # 只用免费引擎
+        set_search_policy(max_latency=3, min_quality=3)  # 延迟与质量约束
+        set_search_policy(adaptive=False)               # 恢复固定优先级
+    """
+    policy = policy or SearchPolicy(**options)
+    get_multi_search().set_policy(policy)
+    return policy
+
+
+def explain_search_plan(prefer_quality: bool = False) -> List[Dict]:
+    """查看共享实例当前的引擎排序及理由"""
+    return get_multi_search().explain_plan(prefer_quality)
+
+
+def measure_cold_start(query: Optional[str] = None, max_results: int = 3) -> Dict:
+    """
+    在新的解释器进程中测量冷启动耗时
+
+    Args:
+        query: 同时测量首次查询耗时所用的关键词，为空时只测量 import
+        max_results: 首次查询的最大结果数
+
+    Returns:
+        {'import_ms': ..., 'first_query_ms': ...}
+    """
+    import subprocess
+
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import multi_search\n"
+        "import_ms = (time.perf_counter() - started) * 1000\n"
+        "first_query_ms = None\n"
+        "if len(sys.argv) > 1:\n"
+        "    started = time.perf_counter()\n"
+        "    multi_search.search(sys.argv[1], int(sys.argv[2]), use_cache=False, verbose=False)\n"
+        "    first_query_ms = round((time.perf_counter() - started) * 1000, 2)\n"
+        "print()\n"
+        "print(json.dumps({'import_ms': round(import_ms, 2), 'first_query_ms': first_query_ms}))\n"
+    )
+    args = [sys.executable, "-c", code] + ([query, str(max_results)] if query else [])
+    completed = subprocess.run(args, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True,
+                               text=True, encoding="utf-8", errors="replace", timeout=300)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def search(query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False,
+           use_cache: bool = True, strategy: str = "sequential", hedge_delay: float = RACE_HEDGE_DELAY,
+           race_paid: bool = False, verbose: Optional[bool] = None) -> List[Dict]:
+    """
+    执行多引擎搜索
+    
+    Args:
+        query: 搜索关键词
+        max_results: 最大结果数
+        prefer_quality: 是否优先质量（会优先使用 Tavily）
+        force_network_check: 是否强制重新检测网络
+        use_cache: 是否使用搜索结果缓存
+        strategy: "sequential" 逐个回退，或 "race" 并行竞速
+        hedge_delay: 竞速模式下启动下一个引擎前的等待秒数（0 表示同时启动）
+        race_paid: 竞速模式下付费引擎是否参与竞速
+        verbose: 是否打印可读报告（默认打印，环境变量 MULTI_SEARCH_QUIET=1 时不打印）
+    
+    Returns:
+        搜索结果列表
+    """
+    outcome = run_search(query, max_results, prefer_quality, force_network_check, use_cache, strategy, hedge_delay,
+                         race_paid)
+    if SEARCH_VERBOSE if verbose is None else verbose:
+        print(format_search_outcome(outcome))
+    return outcome.results
+
+
+def run_search(query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False,
+               use_cache: bool = True, strategy: str = "sequential", hedge_delay: float = RACE_HEDGE_DELAY,
+               race_paid: bool = False) -> SearchOutcome:
+    """
+    静默执行多引擎搜索，参数与 search 相同
+    
+    Returns:
+        SearchOutcome：使用的引擎、各阶段耗时、配额快照与结果列表（不打印任何内容）
+    """
+    started = time.perf_counter()
+    remote = _call_daemon("search", query=query, max_results=max_results, prefer_quality=prefer_quality,
+                          force_network_check=force_network_check, use_cache=use_cache, strategy=strategy,
+                          hedge_delay=hedge_delay, race_paid=race_paid)
+    if remote is not None:
+        outcome = SearchOutcome.from_dict(remote)
+    else:
+        outcome = get_multi_search().run(query, max_results, prefer_quality, force_network_check, use_cache,
+                                         strategy, hedge_delay, race_paid)
+    if _STARTUP["first_query_ms"] is None:
+        _STARTUP["first_query_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return outcome
+
+
+def search_many(queries: List[str], max_results: int = 5, prefer_quality: bool = False,
+                max_concurrency: int = SEARCH_MANY_CONCURRENCY, quota_budget: Optional[int] = None,
+                use_cache: bool = True, strategy: str = "sequential",
+                on_result: Optional[Callable[[str, List[Dict]], None]] = None) -> Dict:
+    """
+    批量搜索多个相关查询，并发执行并按 URL 合并去重
+    
+    Returns:
+        {'per_query': {query: results}, 'merged': [...], 'stats': {...}}
+    """
+    return get_multi_search().search_many(queries, max_results, prefer_quality, max_concurrency, quota_budget,
+                                          use_cache, strategy, on_result)
+
+
+def iter_search_many(queries: List[str], max_results: int = 5, prefer_quality: bool = False,
+                     max_concurrency: int = SEARCH_MANY_CONCURRENCY, quota_budget: Optional[int] = None,
+                     use_cache: bool = True, strategy: str = "sequential"):
+    """批量搜索的流式版本，按完成顺序逐个产出 (query, results)"""
+    return get_multi_search().iter_search_many(queries, max_results, prefer_quality, max_concurrency,
+                                               quota_budget, use_cache, strategy)
+
+
+def search_skills(query: str = "OpenClaw AI agent skills", max_results: int = 10, force_network_check: bool = False) -> List[Dict]:
+    """搜索 OpenClaw/AI Agent 相关技能"""
+    return search(query, max_results, prefer_quality=True, force_network_check=force_network_check)
+
+
+def format_status(status: Dict) -> str:
+    """把 get_status() 返回的字典渲染成可读报告"""
+    lines = ["=" * 60, "📊 Multi-Search System Status", "=" * 60]
+    
+    lines.append("\n[Network Status]")
+    for engine, available in status["network"].items():
+        lines.append(f"  {'✅' if available else '❌'} {engine}")
+    
+    lines.append("\n[Quota Status]")
+    for service, info in status["quota"].items():
+        lines.append(f"  {service}: {info['used']}/{info['limit']} used, {info['remaining']} remaining")
+    
+    lines.append("\n[Engine Health]")
+    for engine, info in status["health"].items():
+        latency = f"{info['latency_ms']} ms" if info['latency_ms'] is not None else "-"
+        lines.append(f"  {engine}: {info['state']}, success {info['success_rate']:.0%}, latency {latency}")
+    
+    cache = status["cache"]
+    lines.append("\n[Cache Status]")
+    lines.append(f"  hits: {cache['memory_hits']} memory / {cache['disk_hits']} disk, misses: {cache['misses']}, "
+                 f"hit rate: {cache['hit_rate']:.0%}")
+    
+    metrics = status["metrics"]
+    if metrics["timers"]:
+        lines.append("\n[Metrics]")
+        for name, timer in metrics["timers"].items():
+            lines.append(f"  {name}: {timer['count']} calls, mean {timer['mean_ms']} ms, max {timer['max_ms']} ms")
+    
+    lines.append("\n[Engine Status]")
+    for engine, info in status["engines"].items():
+        lines.append(f"  {'✅' if info['available'] else '❌'} {engine} ({info['type']})")
+    
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+def get_status(force_network_check: bool = False, verbose: Optional[bool] = None) -> Dict:
+    """获取搜索系统状态，verbose 时同时打印可读报告（使用常驻服务时为服务进程的状态）"""
+    status = _call_daemon("status", force_network_check=force_network_check)
+    if status is None:
+        status = get_multi_search().get_status(force_network_check=force_network_check)
+    if SEARCH_VERBOSE if verbose is None else verbose:
+        print(format_status(status))
+    return status
+
+
+def _lower_headers(headers) -> Dict[str, str]:
+    """响应头转为小写键的普通字典（aiohttp 响应头转成 dict 后区分大小写）"""
+    return {key.lower(): value for key, value in headers.items()}
+
+
+class PageCache:
+    """
+    网页内容缓存 - SQLite 磁盘缓存，按规范化 URL 保存提取后的标题和压缩正文
+
+    新鲜期内直接返回缓存；过期后带 If-None-Match / If-Modified-Since 重新验证，
+    服务器返回 304 时不再下载和解析。按最近访问时间淘汰，压缩后总大小不超过 max_bytes
+    """
+
+    def __init__(self, path: Optional[str] = PAGE_CACHE_FILE, max_bytes: int = PAGE_CACHE_MAX_BYTES,
+                 ttl: float = PAGE_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = self._open_db() if path else None
+        self.stats = {"hits": 0, "stale": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _open_db(self) -> Optional["sqlite3.Connection"]:
+        """打开磁盘缓存，失败时禁用网页缓存"""
+        try:
+            db = lazy_import('sqlite3').connect(self.path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, title TEXT, content BLOB, max_length INTEGER, complete INTEGER, "
+                "etag TEXT, last_modified TEXT, fresh_until REAL, accessed_at REAL, size INTEGER)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+            db.commit()
+            return db
+        except Exception as e:
+            logger.warning("Page cache disabled: %s", e)
+            return None
+
+    def _freshness(self, headers: Dict[str, str]) -> Optional[float]:
+        """根据 Cache-Control 计算新鲜期（秒），no-store 时返回 None 表示不缓存"""
+        cache_control = headers.get('cache-control', '').lower()
+        if 'no-store' in cache_control:
+            return None
+        if 'no-cache' in cache_control:
+            return 0
+        match = re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            return min(int(match.group(1)), PAGE_CACHE_MAX_TTL)
+        return self.ttl
+
+    def get(self, url: str, max_length: int) -> Optional[Dict]:
+        """
+        读取缓存，返回 {'title', 'content', 'fresh', 'validators'}
+
+        缓存的正文不足 max_length（之前按更小的长度提取）时视为未命中
+        """
+        if self._db is None:
+            return None
+        key = canonicalize_url(url)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT title, content, max_length, complete, etag, last_modified, fresh_until "
+                    "FROM pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and (max_length <= row[2] or row[3]):
+                    self._db.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                else:
+                    row = None
+            except Exception as e:
+                logger.warning("Page cache read failed: %s", e)
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                _metrics.inc("cache_requests_total", cache="page", outcome="miss")
+                return None
+            fresh = row[6] > now
+            self.stats["hits" if fresh else "stale"] += 1
+            _metrics.inc("cache_requests_total", cache="page", outcome="hit" if fresh else "stale")
+
+        content = zlib.decompress(row[1]).decode('utf-8')
+        # 与新下载时的截断规则一致：只有正文确实被截到 max_length 时才加省略号
+        # （未完整保存且长度等于保存时的 max_length，说明原文在此处被截断）
+        if len(content) > max_length or (not row[3] and len(content) >= row[2]):
+            content = content[:max_length] + "..."
+        validators = {}
+        if row[4]:
+            validators['If-None-Match'] = row[4]
+        if row[5]:
+            validators['If-Modified-Since'] = row[5]
+        return {"title": row[0], "content": content, "fresh": fresh, "validators": validators}
+
+    def put(self, url: str, max_length: int, title: str, content: str, complete: bool, headers: Dict[str, str]):
+        """
+        写入缓存
+
+        Args:
+            url: 网页地址
+            max_length: 提取时的正文长度上限
+            title: 标题
+            content: 提取的正文（超出 max_length 时已截断并带省略号）
+            complete: 是否完整下载（未触发字节上限）
+            headers: 响应头，用于保存 ETag / Last-Modified 和计算新鲜期
+        """
+        if self._db is None:
+            return
+        headers = _lower_headers(headers)
+        freshness = self._freshness(headers)
+        if freshness is None:
+            return
+
+        # 正文被截断时只保存 max_length 以内的部分，complete 表示保存的是完整正文
+        complete = complete and len(content) <= max_length
+        if not complete:
+            content = content[:max_length]
+        blob = zlib.compress(content.encode('utf-8'), PAGE_CACHE_COMPRESS_LEVEL)
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages (key, title, content, max_length, complete, etag, last_modified, "
+                    "fresh_until, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (canonicalize_url(url), title, blob, max_length, int(complete), headers.get('etag'),
+                     headers.get('last-modified'), now + freshness, now, len(blob)),
+                )
+                self.stats["stores"] += 1
+                self._evict()
+                self._db.commit()
+            except Exception as e:
+                logger.warning("Page cache write failed: %s", e)
+
+    def revalidated(self, url: str, headers: Dict[str, str]):
+        """服务器返回 304 后刷新新鲜期"""
+        if self._db is None:
+            return
+        freshness = self._freshness(_lower_headers(headers)) or 0
+        now = time.time()
+        _metrics.inc("cache_requests_total", cache="page", outcome="revalidated")
+        with self._lock:
+            self.stats["revalidated"] += 1
+            try:
+                self._db.execute("UPDATE pages SET fresh_until = ?, accessed_at = ? WHERE key = ?",
+                                 (now + freshness, now, canonicalize_url(url)))
+                self._db.commit()
+            except Exception as e:
+                logger.warning("Page cache write failed: %s", e)
+
+    def _evict(self):
+        """按最近访问时间淘汰，直到压缩后总大小不超过 max_bytes"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        while total > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM pages ORDER BY accessed_at LIMIT 32").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                total -= size
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """清空网页缓存"""
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM pages")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        """获取缓存命中统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"], stats["bytes"] = 0, 0
+            if self._db is not None:
+                try:
+                    stats["entries"], stats["bytes"] = self._db.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+                except Exception:
+                    pass
+        total = stats["hits"] + stats["stale"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["revalidated"]) / total, 4) if total else 0.0
+        return stats
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """获取进程内共享的网页内容缓存"""
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache()
+    return _page_cache
+
+
+class LocalIndex:
+    """
+    本地全文索引 - SQLite FTS5，收录抓取过的网页正文，按 BM25 排序检索
+
+    作为网络引擎之前的零成本搜索层：足够新鲜且同时包含全部查询词的网页足够多时直接返回，
+    不访问网络也不消耗配额。中日韩文字按单字分词，查询时按短语匹配。
+    超过保留期的网页会被清除，文档数或总大小超限时淘汰最早抓取的网页
+    """
+
+    CJK = "\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef"
+    CJK_CHAR = _LazyObject(re.compile, f"([{CJK}])")
+    CJK_GAP = _LazyObject(re.compile, f" *([{CJK}]) *")
+
+    def __init__(self, path: Optional[str] = LOCAL_INDEX_FILE, max_docs: int = LOCAL_INDEX_MAX_DOCS,
+                 max_bytes: int = LOCAL_INDEX_MAX_BYTES, retention: float = LOCAL_INDEX_RETENTION):
+        self.path = path
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._db = self._open_db() if path else None
+        self._pending_compact = 0
+        self.stats = {"queries": 0, "hits": 0, "partial": 0, "misses": 0, "adds": 0, "evictions": 0,
+                      "compactions": 0}
+
+    def _open_db(self) -> Optional["sqlite3.Connection"]:
+        """打开索引库，SQLite 不支持 FTS5 或打开失败时禁用本地索引"""
+        try:
+            db = lazy_import('sqlite3').connect(self.path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                "id INTEGER PRIMARY KEY, key TEXT UNIQUE, url TEXT, title TEXT, fetched_at REAL, size INTEGER)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS docs_fetched ON docs (fetched_at)")
+            db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5("
+                       "title, content, tokenize='unicode61 remove_diacritics 2')")
+            db.commit()
+            return db
+        except Exception as e:
+            logger.warning("Local index disabled: %s", e)
+            return None
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def _tokenize(self, text: str) -> str:
+        return self.CJK_CHAR.sub(r' \1 ', text)
+
+    def _match_expression(self, query: str) -> str:
+        """查询词全部需要出现；每个词按短语匹配，中日韩词拆成单字短语"""
+        terms = re.findall(r'\w+', query.lower())
+        return " ".join('"' + " ".join(self._tokenize(term).split()) + '"' for term in terms)
+
+    def add(self, url: str, title: str, content: str):
+        """收录（或更新）一个网页"""
+        if self._db is None or not content:
+            return
+        key = canonicalize_url(url)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT id FROM docs WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                    self._db.execute("UPDATE docs SET url = ?, title = ?, fetched_at = ?, size = ? WHERE id = ?",
+                                     (url, title, now, len(title) + len(content), row[0]))
+                    doc_id = row[0]
+                else:
+                    doc_id = self._db.execute(
+                        "INSERT INTO docs (key, url, title, fetched_at, size) VALUES (?, ?, ?, ?, ?)",
+                        (key, url, title, now, len(title) + len(content))).lastrowid
+                self._db.execute("INSERT INTO docs_fts (rowid, title, content) VALUES (?, ?, ?)",
+                                 (doc_id, self._tokenize(title), self._tokenize(content)))
+                self.stats["adds"] += 1
+                self._pending_compact += 1
+                if self._pending_compact >= LOCAL_INDEX_COMPACT_EVERY:
+                    self._compact()
+                self._db.commit()
+            except Exception as e:
+                logger.warning("Local index write failed: %s", e)
+
+    def search(self, query: str, limit: int = 5, max_age: Optional[float] = None) -> List[Dict]:
+        """
+        按 BM25 检索包含全部查询词的网页
+
+        Args:
+            query: 搜索关键词
+            limit: 最大结果数
+            max_age: 只返回最近 max_age 秒内抓取的网页（None 表示不限）
+
+        Returns:
+            与搜索引擎相同格式的结果列表，source 为 'local_index'，附带 score（越小越相关）
+        """
+        if self._db is None:
+            return []
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+        since = time.time() - max_age if max_age is not None else 0.0
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT d.url, d.title, snippet(docs_fts, 1, '', '', '...', 32), bm25(docs_fts, 5.0, 1.0) AS rank "
+                    "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+                    "WHERE docs_fts MATCH ? AND d.fetched_at >= ? ORDER BY rank LIMIT ?",
+                    (expression, since, limit)).fetchall()
+            except Exception as e:
+                logger.warning("Local index query failed: %s", e)
+                rows = []
+        return [{'title': title, 'href': url, 'body': self.CJK_GAP.sub(r'\1', snippet), 'source': 'local_index',
+                 'score': round(rank, 4)} for url, title, snippet, rank in rows]
+
+    def record(self, hits: int, needed: int):
+        """记录一次分层查询的结果：hits 满足 needed 为命中，部分满足为 partial"""
+        with self._lock:
+            self.stats["queries"] += 1
+            if hits >= needed:
+                self.stats["hits"] += 1
+            elif hits:
+                self.stats["partial"] += 1
+            else:
+                self.stats["misses"] += 1
+
+    def compact(self):
+        """清除过期网页、按大小限制淘汰，并合并 FTS 段、回收空闲页"""
+        if self._db is None:
+            return
+        with self._lock:
+            try:
+                self._compact()
+                self._db.commit()
+                self._db.execute("PRAGMA incremental_vacuum")
+            except Exception as e:
+                logger.warning("Local index compaction failed: %s", e)
+
+    def _compact(self):
+        self._pending_compact = 0
+        cutoff = time.time() - self.retention
+        expired = [row[0] for row in self._db.execute("SELECT id FROM docs WHERE fetched_at < ?", (cutoff,))]
+        count, total = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM docs WHERE fetched_at >= ?", (cutoff,)).fetchone()
+        if count > self.max_docs or total > self.max_bytes:
+            for doc_id, size in self._db.execute(
+                    "SELECT id, size FROM docs WHERE fetched_at >= ? ORDER BY fetched_at", (cutoff,)).fetchall():
+                if count <= self.max_docs and total <= self.max_bytes:
+                    break
+                expired.append(doc_id)
+                count -= 1
+                total -= size
+        for doc_id in expired:
+            self._db.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+            self._db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+        self.stats["evictions"] += len(expired)
+        self.stats["compactions"] += 1
+        self._db.execute("INSERT INTO docs_fts (docs_fts) VALUES ('optimize')")
+
+    def clear(self):
+        """清空本地索引"""
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM docs")
+                self._db.execute("DELETE FROM docs_fts")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        """获取索引规模与命中统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["docs"], stats["bytes"] = 0, 0
+            if self._db is not None:
+                try:
+                    stats["docs"], stats["bytes"] = self._db.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM docs").fetchone()
+                except Exception:
+                    pass
+        stats["hit_rate"] = round(stats["hits"] / stats["queries"], 4) if stats["queries"] else 0.0
+        return stats
+
+
+_local_index: Optional[LocalIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalIndex:
+    """获取进程内共享的本地全文索引（环境变量 MULTI_SEARCH_LOCAL_INDEX=0 时为禁用的空索引）"""
+    global _local_index
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = LocalIndex(LOCAL_INDEX_FILE if LOCAL_INDEX_ENABLED else None)
+    return _local_index
+
+
+_SHINGLE_TOKEN = _LazyObject(re.compile, f"[^\\W_{_CJK_RANGE}]+|[{_CJK_RANGE}]")
+_SIMHASH_BANDS = 4
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    计算正文的 64 位 SimHash：按相邻 DEDUP_SHINGLE 个词（中日韩文字按单字）取片段，
+    片段数少于 DEDUP_MIN_SHINGLES 时返回 None（过短的文本不做近似判断）
+    """
+    import hashlib
+    tokens = _SHINGLE_TOKEN.findall(text.lower())
+    size = DEDUP_SHINGLE
+    shingles = {" ".join(tokens[i:i + size]) for i in range(max(0, len(tokens) - size + 1))}
+    if len(shingles) < DEDUP_MIN_SHINGLES:
+        return None
+    bits = [format(int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+            for shingle in shingles]
+    half = len(bits) / 2
+    value = 0
+    for column in zip(*bits):
+        value = (value << 1) | (column.count("1") > half)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def dedup_key(url: str) -> str:
+    """去重用的 URL 键：在 canonicalize_url 的基础上忽略协议、www. / m. / amp. 前缀和末尾的 /amp"""
+    key = canonicalize_url(url).split("://", 1)[-1]
+    for prefix in ("www.", "m.", "amp."):
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+            break
+    host, _, rest = key.partition("/")
+    path, _, query = rest.partition("?")
+    if path == "amp" or path.endswith("/amp"):
+        path = path[:-3].rstrip("/")
+    return f"{host}/{path}" + (f"?{query}" if query else "")
+
+
+class FingerprintStore:
+    """
+    网页指纹库 - SQLite 保存每个网页（按 dedup_key）正文的 SimHash 以及它是哪个网页的近似副本
+
+    新网页与库中海明距离不超过 distance 的网页视为近似重复；64 位指纹分成 4 段分别建索引，
+    只比较至少一段完全相同的候选（distance 不超过 3 时不会漏判）。超过 ttl 的记录会被清除，
+    条目数超过 max_entries 时淘汰最早的记录
+    """
+
+    def __init__(self, path: Optional[str] = FINGERPRINT_FILE, distance: int = DEDUP_DISTANCE,
+                 max_entries: int = DEDUP_MAX_ENTRIES, ttl: float = DEDUP_TTL):
+        self.path = path
+        self.distance = distance
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = self._open_db() if path else None
+        self._pending_compact = 0
+        self.stats = {"adds": 0, "duplicates": 0, "known_skips": 0, "evictions": 0}
+
+    def _open_db(self) -> Optional["sqlite3.Connection"]:
+        try:
+            db = lazy_import('sqlite3').connect(self.path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS fingerprints (key TEXT PRIMARY KEY, simhash INTEGER, "
+                       "b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER, duplicate_of TEXT, seen_at REAL)")
+            for band in range(_SIMHASH_BANDS):
+                db.execute(f"CREATE INDEX IF NOT EXISTS fingerprints_b{band} ON fingerprints (b{band})")
+            db.execute("CREATE INDEX IF NOT EXISTS fingerprints_seen ON fingerprints (seen_at)")
+            db.commit()
+            return db
+        except Exception as e:
+            logger.warning("Fingerprint store disabled: %s", e)
+            return None
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def _bands(fingerprint: int) -> List[int]:
+        return [(fingerprint >> (16 * band)) & 0xFFFF for band in range(_SIMHASH_BANDS)]
+
+    def duplicate_of(self, url: str) -> Optional[str]:
+        """已知 url 是其他网页的近似副本时返回原网页的 dedup_key"""
+        if self._db is None:
+            return None
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT duplicate_of FROM fingerprints WHERE key = ? AND seen_at >= ?",
+                                       (dedup_key(url), time.time() - self.ttl)).fetchone()
+            except Exception as e:
+                logger.warning("Fingerprint lookup failed: %s", e)
+                return None
+        return row[0] if row else None
+
+    def add(self, url: str, fingerprint: int) -> Optional[str]:
+        """记录网页指纹，返回库中与之近似的原网页的 dedup_key（没有时为 None）"""
+        if self._db is None:
+            return None
+        key = dedup_key(url)
+        signed = fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+        bands = self._bands(fingerprint)
+        now = time.time()
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT key, simhash, duplicate_of FROM fingerprints WHERE key != ? AND seen_at >= ? AND ("
+                    + " OR ".join(f"b{band} = ?" for band in range(_SIMHASH_BANDS)) + ") ORDER BY seen_at",
+                    [key, now - self.ttl] + bands).fetchall()
+                original = next((dup or other for other, value, dup in rows
+                                 if hamming_distance(value & ((1 << 64) - 1), fingerprint) <= self.distance), None)
+                self._db.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 [key, signed] + bands + [original, now])
+                self.stats["adds"] += 1
+                self.stats["duplicates"] += original is not None
+                self._pending_compact += 1
+                if self._pending_compact >= DEDUP_COMPACT_EVERY:
+                    self._compact(now)
+                self._db.commit()
+                return original
+            except Exception as e:
+                logger.warning("Fingerprint store write failed: %s", e)
+                return None
+
+    def _compact(self, now: float):
+        """清除过期记录并按 max_entries 淘汰最早的记录（调用方持有锁）"""
+        self._pending_compact = 0
+        removed = self._db.execute("DELETE FROM fingerprints WHERE seen_at < ?", (now - self.ttl,)).rowcount
+        removed += self._db.execute(
+            "DELETE FROM fingerprints WHERE key IN (SELECT key FROM fingerprints ORDER BY seen_at DESC "
+            "LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+        self.stats["evictions"] += removed
+
+    def clear(self):
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints")
+            self._db.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats, entries=0)
+            if self._db is not None:
+                try:
+                    stats["entries"] = self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+                except Exception:
+                    pass
+        return stats
+
+
+_fingerprint_store: Optional[FingerprintStore] = None
+_fingerprint_store_lock = threading.Lock()
+
+
+def get_fingerprint_store() -> FingerprintStore:
+    """获取进程内共享的网页指纹库（环境变量 MULTI_SEARCH_DEDUP=0 时为禁用的空库）"""
+    global _fingerprint_store
+    if _fingerprint_store is None:
+        with _fingerprint_store_lock:
+            if _fingerprint_store is None:
+                _fingerprint_store = FingerprintStore(FINGERPRINT_FILE if DEDUP_ENABLED else None)
+    return _fingerprint_store
+
+
+def _known_duplicates(results: List[Dict], targets: List[int], store: FingerprintStore) -> Dict[int, int]:
+    """
+    抓取前找出重复的结果，返回 {结果下标: 原结果下标}
+
+    dedup_key 相同（镜像 / 跟踪参数 / AMP 变体）的只抓取第一个；指纹库中已知是本批另一个结果的近似副本的也不抓取
+    """
+    first: Dict[str, int] = {}
+    duplicates: Dict[int, int] = {}
+    for idx in targets:
+        key = dedup_key(results[idx]['href'])
+        if key in first:
+            duplicates[idx] = first[key]
+        else:
+            first[key] = idx
+    for idx in targets:
+        if idx in duplicates:
+            continue
+        original = store.duplicate_of(results[idx]['href'])
+        if original is not None and first.get(original, idx) != idx:
+            duplicates[idx] = first[original]
+            store.stats["known_skips"] += 1
+    return duplicates
+
+
+def _release_orphans(results: List[Dict], duplicates: Dict[int, int], contents: Dict[int, Optional[Dict]]) -> List[int]:
+    """原网页抓取失败时，已跳过的近似副本（URL 不同的）改为需要抓取，返回这些结果的下标"""
+    orphans = [idx for idx, original in duplicates.items()
+               if not (contents.get(original) or {}).get('success')
+               and dedup_key(results[idx]['href']) != dedup_key(results[original]['href'])]
+    for idx in orphans:
+        del duplicates[idx]
+    return orphans
+
+
+def _collapse_near_duplicates(results: List[Dict], contents: Dict[int, Optional[Dict]], duplicates: Dict[int, int],
+                              store: FingerprintStore, distance: int):
+    """按结果顺序为抓取到的正文计算指纹，与本批前面的正文近似的移出 contents 并记入 duplicates"""
+    kept: List[Tuple[int, int]] = []
+    for idx in sorted(contents):
+        content = contents[idx]
+        if not content or not content['success']:
+            continue
+        fingerprint = simhash(content['content'])
+        if fingerprint is None:
+            continue
+        store.add(results[idx]['href'], fingerprint)
+        original = next((other for other, value in kept if hamming_distance(value, fingerprint) <= distance), None)
+        if original is None:
+            kept.append((idx, fingerprint))
+        else:
+            duplicates[idx] = original
+            del contents[idx]
+    _metrics.inc("dedup_total", len(duplicates))
+
+
+def fetch_byte_limit(max_length: int) -> int:
+    """按正文长度估算下载字节上限（网页中标记和脚本远多于正文）"""
+    return min(FETCH_MAX_BYTES, max(FETCH_MIN_BYTES, max_length * FETCH_BYTES_PER_CHAR))
+
+
+def _init_parse_worker(extractor: str):
+    """解析进程初始化：预先加载与主进程相同的解析后端"""
+    configure_html_extractor(extractor)
+
+
+def _parse_page_worker(content_type: str, data: bytes, max_length: int) -> Tuple[str, str, float]:
+    """解码并提取已下载网页的正文（在解析进程中执行），返回 (标题, 正文, 解析耗时)"""
+    reader = _PageReader({'Content-Type': content_type}, max_length, len(data) + 1)
+    for start in range(0, len(data), HTML_FEED_CHUNK):
+        if reader.feed(data[start:start + HTML_FEED_CHUNK]):
+            break
+    title, content = reader.finish()
+    return title, content, reader.parse_seconds
+
+
+def _parse_bing_worker(page: str, max_results: int) -> List[Dict]:
+    return get_html_extractor().extract_bing(page, max_results)
+
+
+class ParsePool:
+    """
+    解析进程池 - 把大网页的 HTML 解析交给常驻的工作进程，多线程并发抓取时解析不再受 GIL 限制
+
+    工作进程用 spawn 方式启动并预先加载解析后端。网页按实际下载的字节数分流（Bing 结果页按字符数）：
+    下载量达到 min_bytes 后改为先完整下载（不超过字节上限）再整体交给进程池解析，较小的网页仍在当前线程边下载边解析。
+    进程池异常退出时重建进程池，当次解析在当前线程完成
+    """
+
+    def __init__(self, processes: Optional[int] = None, min_bytes: int = PARSE_POOL_MIN_BYTES):
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.min_bytes = min_bytes
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {"pooled": 0, "fallbacks": 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor, wait
+                    executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"),
+                                                   initializer=_init_parse_worker,
+                                                   initargs=(get_html_extractor().name,))
+                    wait([executor.submit(time.sleep, 0) for _ in range(self.processes)])
+                    self._executor = executor
+        return self._executor
+
+    def start(self) -> "ParsePool":
+        """启动并预热全部工作进程"""
+        self._get_executor()
+        return self
+
+    def routes(self, size: Optional[int]) -> bool:
+        """大小为 size 的内容是否交给进程池解析"""
+        return size is not None and size >= self.min_bytes
+
+    def _run(self, fn: Callable, *args):
+        """在进程池中执行，进程池不可用时返回 None（调用方改在当前线程解析）"""
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            result = self._get_executor().submit(fn, *args).result()
+        except BrokenProcessPool as e:
+            logger.warning("Parse pool broken, parsing in thread: %s", e)
+            with self._lock:
+                self._executor = None
+                self.stats["fallbacks"] += 1
+            return None
+        with self._lock:
+            self.stats["pooled"] += 1
+        return result
+
+    def parse_page(self, content_type: str, data: bytes, max_length: int) -> Tuple[str, str, float]:
+        """解析已下载的网页字节，返回 (标题, 正文, 解析耗时)"""
+        result = self._run(_parse_page_worker, content_type, data, max_length)
+        return result if result is not None else _parse_page_worker(content_type, data, max_length)
+
+    def parse_bing(self, page: str, max_results: int) -> List[Dict]:
+        result = self._run(_parse_bing_worker, page, max_results)
+        return result if result is not None else _parse_bing_worker(page, max_results)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, processes=self.processes, min_bytes=self.min_bytes, running=self._executor is not None)
+
+
+_parse_pool: Optional[ParsePool] = None
+_parse_pool_ready = False
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ParsePool]:
+    """获取共享的解析进程池，未启用（未设置 MULTI_SEARCH_PARSE_PROCESSES 且未调用 configure_parse_pool）时返回 None"""
+    global _parse_pool, _parse_pool_ready
+    if not _parse_pool_ready:
+        with _parse_pool_lock:
+            if not _parse_pool_ready:
+                _parse_pool = ParsePool(PARSE_PROCESSES) if PARSE_PROCESSES > 0 else None
+                _parse_pool_ready = True
+    return _parse_pool
+
+
+def configure_parse_pool(processes: Optional[int] = None,
+                         min_bytes: int = PARSE_POOL_MIN_BYTES) -> Optional[ParsePool]:
+    """
+    启用（或关闭）共享的解析进程池并预热工作进程
+
+    Args:
+        processes: 工作进程数，None 表示 CPU 核数，0 表示关闭进程池
+        min_bytes: 交给进程池解析的最小网页大小
+    """
+    global _parse_pool, _parse_pool_ready
+    pool = ParsePool(processes, min_bytes).start() if processes != 0 else None
+    with _parse_pool_lock:
+        previous, _parse_pool = _parse_pool, pool
+        _parse_pool_ready = True
+    if previous is not None:
+        previous.shutdown()
+    return pool
+
+
+class _PageReader:
+    """
+    边下载边解析网页
+
+    根据 Content-Type 和响应开头的魔数跳过二进制内容，按响应头或 <meta> 声明的编码增量解码，
+    达到字节上限或解析器已收集到足够正文时通知调用方停止下载。
+    指定 parse_pool 时同时保留原始字节，实际下载量达到分流阈值后不再增量解析，结束时整体交给解析进程池；
+    未压缩且 Content-Length 小于阈值的响应不保留原始字节。
+    异步抓取时用 hold 在事件循环中只做检查和暂存，再用 drain 在线程池中解码和解析
+    """
+
+    BINARY_MAGIC = (b'%PDF', b'PK\x03\x04', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'\x1f\x8b', b'Rar!', b'7z\xbc\xaf')
+    META_CHARSET = _LazyObject(re.compile, rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+    def __init__(self, headers: Dict[str, str], max_length: int, max_bytes: Optional[int] = None,
+                 parse_pool: Optional[ParsePool] = None):
+        headers = _lower_headers(headers)
+        content_type = headers.get('content-type', '')
+        media_type = content_type.split(';')[0].strip().lower()
+        if media_type and media_type not in FETCH_CONTENT_TYPES:
+            raise ValueError(f"Unsupported content type: {media_type}")
+
+        match = re.search(r'charset=["\']?([\w.:-]+)', content_type, re.I)
+        self.charset = match.group(1) if match else None
+        self.max_bytes = max_bytes or fetch_byte_limit(max_length)
+        self.received = 0
+        self.truncated = False
+        self.parse_seconds = 0.0
+        self.parser = get_html_extractor().page_parser(max_length)
+        self._decoder = None
+        self._pending: List[bytes] = []
+        self.pending_bytes = 0
+        self._content_type = content_type
+        self._max_length = max_length
+        self._pool = parse_pool
+        self._pooled = False
+        # 分块传输或压缩的响应无法预知解压后的大小，只能按实际下载量分流
+        length = headers.get('content-length', '')
+        declared_small = (parse_pool is not None and length.isdigit() and not headers.get('content-encoding')
+                          and not parse_pool.routes(int(length)))
+        self._buffer: Optional[List[bytes]] = [] if parse_pool is not None and not declared_small else None
+
+    def _start(self, chunk: bytes):
+        """根据第一块数据识别二进制内容并确定编码"""
+        head = chunk[:1024]
+        if head.startswith(self.BINARY_MAGIC) or (b'\x00' in head and not head.startswith((b'\xff\xfe', b'\xfe\xff'))):
+            raise ValueError("Unsupported content: binary data")
+
+        charset = self.charset
+        if charset is None:
+            match = self.META_CHARSET.search(chunk[:4096])
+            charset = match.group(1).decode('ascii') if match else 'utf-8'
+        try:
+            self._decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def _accept(self, chunk: bytes) -> bytes:
+        """识别二进制内容，按字节上限截断并计入下载量"""
+        if self._decoder is None:
+            self._start(chunk)
+        remaining = self.max_bytes - self.received
+        if len(chunk) >= remaining:
+            chunk = chunk[:remaining]
+            self.truncated = True
+        self.received += len(chunk)
+        return chunk
+
+    def _parse(self, chunk: bytes) -> bool:
+        """解码并解析一块数据（或为解析进程池暂存），返回 True 表示解析器已收集到足够正文"""
+        if self._buffer is not None:
+            self._buffer.append(chunk)
+            if not self._pooled and self._pool.routes(self.received):
+                self._pooled = True
+            if self._pooled:
+                return False
+        started = time.perf_counter()
+        done = self.parser.push(self._decoder.decode(chunk))
+        self.parse_seconds += time.perf_counter() - started
+        return done
+
+    def feed(self, chunk: bytes) -> bool:
+        """处理一块（已解压的）响应数据，返回 True 表示可以停止下载"""
+        if not chunk:
+            return False
+        return self._parse(self._accept(chunk)) or self.truncated
+
+    def hold(self, chunk: bytes) -> bool:
+        """只检查并暂存一块数据（不解码、不解析），返回 True 表示已达到字节上限"""
+        if chunk:
+            chunk = self._accept(chunk)
+            self._pending.append(chunk)
+            self.pending_bytes += len(chunk)
+        return self.truncated
+
+    def drain(self) -> bool:
+        """解析 hold 暂存的数据，返回 True 表示解析器已收集到足够正文"""
+        pending, self._pending, self.pending_bytes = self._pending, [], 0
+        return any(self._parse(chunk) for chunk in pending)
+
+    def finish(self) -> Tuple[str, str]:
+        """结束下载并返回 (标题, 正文)，同时记录抓取字节数和解析耗时"""
+        if self._pending:
+            self.drain()
+        if self._pooled:
+            title, content, self.parse_seconds = self._pool.parse_page(self._content_type, b''.join(self._buffer),
+                                                                       self._max_length)
+            page = (title, content)
+        else:
+            started = time.perf_counter()
+            if self._decoder is not None:
+                self.parser.push(self._decoder.decode(b'', final=True))
+            page = self.parser.finish()
+            self.parse_seconds += time.perf_counter() - started
+        _metrics.inc("fetch_bytes_total", self.received)
+        _metrics.observe("stage_seconds", self.parse_seconds, stage="parse", kind="page")
+        return page
+
+
+class WebContentFetcher:
+    """网页内容抓取器"""
+    
+    def __init__(self, timeout: int = 15, transport: Optional[HttpTransport] = None, max_bytes: Optional[int] = None,
+                 page_cache: Optional[PageCache] = None, local_index: Optional[LocalIndex] = None,
+                 rate_limiter: Optional[RateLimiter] = None, parse_pool: Optional[ParsePool] = None):
+        self.timeout = timeout
+        self.transport = transport or get_transport()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_bytes = max_bytes
+        self._parse_pool = parse_pool
+        self.page_cache = page_cache or get_page_cache()
+        self.local_index = local_index or get_local_index()
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+        }
+    
+    @property
+    def parse_pool(self) -> Optional[ParsePool]:
+        """大网页使用的解析进程池，未指定时使用共享进程池（未启用时为 None）"""
+        return self._parse_pool or get_parse_pool()
+    
+    def fetch(self, url: str, max_length: int = 5000, use_cache: bool = True, max_bytes: Optional[int] = None) -> Dict:
+        """
+        抓取网页内容
+
+        流式下载并边下载边解析：非网页类型（PDF、图片、压缩包等）直接跳过，
+        正文收集够 max_length 或下载量达到字节上限（max_bytes，默认为实例的 max_bytes 或按 max_length 估算）后停止下载。
+        启用缓存时，新鲜期内直接返回缓存内容，过期后发送条件请求，304 时复用缓存
+        """
+        with _metrics.span("fetch", {'url': url}):
+            try:
+                cached, headers = self._lookup_cache(url, max_length, use_cache)
+                if cached is not None and cached['fresh']:
+                    return self._success(url, cached['title'], cached['content'], "cached")
+
+                self.rate_limiter.acquire(_host_key(url))
+                with self.transport.get(url, timeout=self.timeout, headers=headers, stream=True) as response:
+                    self.rate_limiter.observe_response(_host_key(url), response.status_code, response.headers)
+                    if response.status_code == 304 and cached is not None:
+                        self.page_cache.revalidated(url, response.headers)
+                        self.local_index.add(url, cached['title'], cached['content'])
+                        return self._success(url, cached['title'], cached['content'], "revalidated")
+                    response.raise_for_status()
+                    reader = _PageReader(response.headers, max_length, max_bytes or self.max_bytes, self.parse_pool)
+                    for chunk in response.iter_content(FETCH_CHUNK_SIZE):
+                        if reader.feed(chunk):
+                            break
+                    title, content = reader.finish()
+                if use_cache:
+                    self.page_cache.put(url, max_length, title, content, not reader.truncated, response.headers)
+                self.local_index.add(url, title, content)
+                return self._success(url, title, content, "downloaded")
+                
+            except Exception as e:
+                return self._failure(url, e)
+    
+    async def afetch(self, url: str, max_length: int = 5000, client: Optional[AsyncHttpClient] = None,
+                     use_cache: bool = True) -> Dict:
+        """
+        异步抓取网页内容，流式下载与缓存规则同 fetch
+
+        事件循环中只检查字节上限和内容类型并暂存原始数据，每攒够一批交给线程池解码和解析，
+        解析器收集到足够正文后停止下载
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        with _metrics.span("fetch", {'url': url}):
+            try:
+                cached, headers = self._lookup_cache(url, max_length, use_cache)
+                if cached is not None and cached['fresh']:
+                    return self._success(url, cached['title'], cached['content'], "cached")
+
+                await self.rate_limiter.aacquire(_host_key(url))
+                async with (client or get_async_client()).stream(url, headers=headers, timeout=self.timeout) as response:
+                    self.rate_limiter.observe_response(_host_key(url), response.status, response.headers)
+                    if response.status == 304 and cached is not None:
+                        self.page_cache.revalidated(url, response.headers)
+                        self.local_index.add(url, cached['title'], cached['content'])
+                        return self._success(url, cached['title'], cached['content'], "revalidated")
+                    response.raise_for_status()
+                    reader = _PageReader(response.headers, max_length, self.max_bytes, self.parse_pool)
+                    async for chunk in response.iter_chunks():
+                        if reader.hold(chunk):
+                            break
+                        if reader.pending_bytes >= HTML_FEED_CHUNK and await loop.run_in_executor(None, reader.drain):
+                            break
+                title, content = await loop.run_in_executor(None, reader.finish)
+                if use_cache:
+                    self.page_cache.put(url, max_length, title, content, not reader.truncated, response.headers)
+                self.local_index.add(url, title, content)
+                return self._success(url, title, content, "downloaded")
+                
+            except Exception as e:
+                return self._failure(url, e)
+    
+    def _lookup_cache(self, url: str, max_length: int, use_cache: bool):
+        """查询网页缓存，返回 (缓存条目, 请求头)；缓存过期时请求头附带条件请求字段"""
+        if not use_cache:
+            return None, self.headers
+        cached = self.page_cache.get(url, max_length)
+        if cached is None or cached['fresh']:
+            return cached, self.headers
+        return cached, dict(self.headers, **cached['validators'])
+    
+    @staticmethod
+    def parse(page: str, url: str, max_length: int = 5000) -> Dict:
+        """从网页 HTML 中提取标题和正文，正文达到 max_length 后停止解析"""
+        title, content = get_html_extractor().extract_page(page, max_length)
+        return WebContentFetcher._success(url, title, content)
+    
+    @staticmethod
+    def _success(url: str, title: str, content: str, outcome: Optional[str] = None) -> Dict:
+        if outcome is not None:
+            _metrics.inc("fetches_total", outcome=outcome)
+        return {
+            'title': title,
+            'content': content,
+            'url': url,
+            'success': True
+        }
+    
+    @staticmethod
+    def _failure(url: str, error: Exception) -> Dict:
+        _metrics.inc("fetches_total", outcome="error")
+        return {
+            'title': '',
+            'content': '',
+            'url': url,
+            'success': False,
+            'error': str(error)
+        }
+    
+    def fetch_many(self, urls: List[str], max_length: int = 5000, max_workers: int = FETCH_MAX_WORKERS,
+                   per_host_limit: int = FETCH_PER_HOST_LIMIT, deadline: Optional[float] = None) -> List[Optional[Dict]]:
+        """
+        并发抓取多个网页
+
+        Args:
+            urls: 网页地址列表
+            max_length: 每个网页的最大内容长度
+            max_workers: 最大并发数
+            per_host_limit: 同一主机的最大并发数
+            deadline: 整体截止时间（秒），超时后直接返回已完成的结果
+
+        Returns:
+            与 urls 顺序一致的结果列表，截止时仍未完成的位置为 None
+        """
+        results: List[Optional[Dict]] = [None] * len(urls)
+        for idx, content in self.iter_many(urls, max_length, max_workers, per_host_limit, deadline):
+            results[idx] = content
+        return results
+
+    def iter_many(self, urls: List[str], max_length: int = 5000, max_workers: int = FETCH_MAX_WORKERS,
+                  per_host_limit: int = FETCH_PER_HOST_LIMIT, deadline: Optional[float] = None):
+        """
+        并发抓取多个网页，按完成顺序逐个产出 (urls 中的下标, 抓取结果)，参数同 fetch_many
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
+        提前结束迭代时取消尚未开始的抓取
+        """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        if not urls:
+            return
 
-            results = []
-            for link in links:
-                href = link.get('href', '')
-                text = link.get_text().strip()
+        max_workers = max(1, max_workers)
+        per_host_limit = max(1, per_host_limit)
+        end_time = time.monotonic() + deadline if deadline is not None else None
 
-                if not text or len(text) < 5:
-                    continue
-                if 'bing.com' in href or 'msn.com' in href:
-                    continue
-                if not href.startswith('http'):
-                    continue
+        pending = list(range(len(urls)))
+        hosts = [urlsplit(url).netloc.lower() for url in urls]
+        host_running: Dict[str, int] = {}
+        running = {}
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while pending or running:
+                # 先检查截止时间，超时后不再派发新的抓取
+                timeout = None
+                if end_time is not None:
+                    timeout = end_time - time.monotonic()
+                    if timeout <= 0:
+                        break
 
-                results.append({
-                    'title': text[:100],
-                    'href': href,
-                    'body': '',
-                    'source': 'bing_scraper'
-                })
+                # 按主机并发上限派发任务，被限制的主机排队等待
+                for idx in list(pending):
+                    if len(running) >= max_workers:
+                        break
+                    host = hosts[idx]
+                    if host_running.get(host, 0) >= per_host_limit:
+                        continue
+                    pending.remove(idx)
+                    host_running[host] = host_running.get(host, 0) + 1
+                    running[executor.submit(self.fetch, urls[idx], max_length)] = idx
 
-                if len(results) >= max_results:
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
                     break
+                for future in done:
+                    idx = running.pop(future)
+                    host_running[hosts[idx]] -= 1
+                    yield idx, future.result()
+        finally:
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    async def afetch_many(self, urls: List[str], max_length: int = 5000, max_concurrency: int = FETCH_MAX_WORKERS,
+                          per_host_limit: int = FETCH_PER_HOST_LIMIT, deadline: Optional[float] = None,
+                          client: Optional[AsyncHttpClient] = None) -> List[Optional[Dict]]:
+        """异步并发抓取多个网页，参数与返回值同 fetch_many"""
+        import asyncio
+        if not urls:
+            return []
 
-            return results
+        client = client or get_async_client()
+        limit = asyncio.Semaphore(max(1, max_concurrency))
+        host_limits: Dict[str, asyncio.Semaphore] = {}
 
-        except ImportError:
-            print("[ERROR] BeautifulSoup not installed. Run: pip install beautifulsoup4")
-            return []
-        except Exception as e:
-            print(f"[ERROR] Bing scraper failed: {e}")
-            return []
+        async def fetch_one(url: str) -> Dict:
+            host = urlsplit(url).netloc.lower()
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(max(1, per_host_limit)))
+            async with host_limit:
+                async with limit:
+                    return await self.afetch(url, max_length, client)
 
+        tasks = [asyncio.ensure_future(fetch_one(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        return [task.result() if task in done and not task.cancelled() else None for task in tasks]
 
-class TavilySearch(SearchEngine):
-    """Tavily API 搜索 - 需要 API Key"""
-    
-    def __init__(self):
-        self.api_key = get_api_key('TAVILY')
-    
-    def is_available(self) -> bool:
-        return self.api_key is not None
-    
-    def search(self, query: str, max_results: int = 5) -> List[Dict]:
-        """使用 Tavily API 搜索"""
-        try:
-            from tavily import TavilyClient
-            
-            client = TavilyClient(api_key=self.api_key)
-            response = client.search(
-                query=query,
-                max_results=max_results,
-                search_depth="basic"
-            )
-            
-            results = []
-            for item in response.get("results", []):
-                results.append({
-                    'title': item.get('title', ''),
-                    'href': item.get('url', ''),
-                    'body': item.get('content', '')[:200] + "..." if len(item.get('content', '')) > 200 else item.get('content', ''),
-                    'source': 'tavily'
-                })
-            
-            return results
-            
-        except Exception as e:
-            print(f"[ERROR] Tavily search failed: {e}")
-            return []
 
+def get_web_fetcher() -> WebContentFetcher:
+    """获取进程内复用的 WebContentFetcher"""
+    return _get_shared("web_fetcher", WebContentFetcher)
 
-class BingAPISearch(SearchEngine):
-    """Bing Web Search API - 需要 API Key"""
-    
-    def __init__(self):
-        self.api_key = os.environ.get("BING_API_KEY")
-        self.endpoint = "https://api.bing.microsoft.com/v7.0/search"
-    
-    def is_available(self) -> bool:
-        return self.api_key is not None
-    
-    def search(self, query: str, max_results: int = 5) -> List[Dict]:
-        """使用 Bing Web Search API"""
+
+def fetch_web_content(url: str, max_length: int = 5000, use_cache: bool = True, query: Optional[str] = None) -> Dict:
+    """
+    抓取网页内容的便捷函数
+
+    指定 query 时多读取 PASSAGE_POOL_FACTOR 倍正文，再按查询选出最相关的段落（总长不超过 max_length），
+    而不是只保留开头 max_length 个字符
+    """
+    remote = _call_daemon("fetch", url=url, max_length=max_length, use_cache=use_cache, query=query)
+    if remote is not None:
+        return remote
+    fetcher = get_web_fetcher()
+    if not query:
+        return fetcher.fetch(url, max_length, use_cache)
+    content = fetcher.fetch(url, max_length * PASSAGE_POOL_FACTOR, use_cache)
+    return focus_contents(query, [content], max_length, top_k=None)[0]
+
+
+def _attach_contents(results: List[Dict], fetched: Dict[int, Optional[Dict]],
+                     duplicates: Optional[Dict[int, int]] = None) -> List[Dict]:
+    """将抓取成功的网页内容附加到对应搜索结果的 full_content 字段，重复的结果改为附加 duplicate_of（原结果链接）"""
+    duplicates = duplicates or {}
+    enriched = []
+    for idx, result in enumerate(results):
+        enriched_result = result.copy()
+        content = fetched.get(idx)
+        if content and content['success']:
+            enriched_result['full_content'] = content
+        elif idx in duplicates:
+            enriched_result['duplicate_of'] = results[duplicates[idx]]['href']
+        enriched.append(enriched_result)
+
+    return enriched
+
+
+def fetch_search_results_content(results: List[Dict], max_length: int = 2000, max_workers: int = FETCH_MAX_WORKERS,
+                                 per_host_limit: int = FETCH_PER_HOST_LIMIT, deadline: Optional[float] = None,
+                                 query: Optional[str] = None, passage_budget: int = PASSAGE_BUDGET,
+                                 top_k: int = PASSAGE_TOP_K, dedup: bool = True,
+                                 dedup_distance: int = DEDUP_DISTANCE) -> List[Dict]:
+    """
+    批量抓取搜索结果的详细内容
+
+    Args:
+        results: 搜索结果列表
+        max_length: 每个网页的最大内容长度
+        max_workers: 最大并发数（为 1 时逐个抓取）
+        per_host_limit: 同一主机的最大并发数
+        deadline: 整体截止时间（秒），超时未完成的结果不附带 full_content
+        query: 指定时每个网页多读取 PASSAGE_POOL_FACTOR 倍正文，所有网页的段落一起按查询打分，
+            full_content['content'] 只保留入选的段落（段落列表见 full_content['passages']）
+        passage_budget: 所有网页入选段落的总字符数上限
+        top_k: 所有网页入选段落的总数上限
+        dedup: 是否去重。dedup_key 相同的链接和指纹库中已知是本批另一结果近似副本的链接不再抓取；
+            正文 SimHash 与前面结果的海明距离不超过 dedup_distance 的不附带 full_content。
+            重复的结果改为附带 duplicate_of（原结果的链接）
+        dedup_distance: 近似重复判定的海明距离阈值（64 位指纹）
+
+    Returns:
+        与输入顺序一致的结果列表
+    """
+    remote = _call_daemon("fetch_results", results=results, max_length=max_length, max_workers=max_workers,
+                          per_host_limit=per_host_limit, deadline=deadline, query=query,
+                          passage_budget=passage_budget, top_k=top_k, dedup=dedup, dedup_distance=dedup_distance)
+    if remote is not None:
+        return remote
+    fetcher = get_web_fetcher()
+    store = get_fingerprint_store()
+    targets = [idx for idx, result in enumerate(results) if result.get('href')]
+    duplicates = _known_duplicates(results, targets, store) if dedup else {}
+    end_time = time.monotonic() + deadline if deadline is not None else None
+    contents: Dict[int, Optional[Dict]] = {}
+    batch = [idx for idx in targets if idx not in duplicates]
+    while batch:
+        remaining = max(0.0, end_time - time.monotonic()) if end_time is not None else None
+        contents.update(zip(batch, fetcher.fetch_many([results[idx]['href'] for idx in batch],
+                                                      max_length * PASSAGE_POOL_FACTOR if query else max_length,
+                                                      max_workers=max_workers, per_host_limit=per_host_limit,
+                                                      deadline=remaining)))
+        batch = _release_orphans(results, duplicates, contents)
+    if dedup:
+        _collapse_near_duplicates(results, contents, duplicates, store, dedup_distance)
+    if query:
+        focus_contents(query, list(contents.values()), passage_budget, top_k)
+    return _attach_contents(results, contents, duplicates)
+
+
+def iter_search(query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False,
+                use_cache: bool = True):
+    """
+    流式搜索：逐条产出 SearchResult，引擎解析出第一条结果即可开始处理
+
+    Examples:
+        for result in iter_search("Python asyncio", max_results=20):
+            print(result.title, result.href)
+            if enough:
+                break  # 停止上游引擎，不再读取后续结果
+    """
+    return get_multi_search().iter_search(query, max_results, prefer_quality, force_network_check, use_cache)
+
+
+def iter_fetch(results: List, max_length: int = 2000, max_workers: int = FETCH_MAX_WORKERS,
+               per_host_limit: int = FETCH_PER_HOST_LIMIT, deadline: Optional[float] = None,
+               query: Optional[str] = None, dedup: bool = True, dedup_distance: int = DEDUP_DISTANCE):
+    """
+    流式抓取搜索结果的详细内容：按完成顺序逐个产出附带 full_content 的 SearchResult（抓取失败的不产出）
+
+    results 可以是结果字典或 SearchResult（例如 iter_search 的输出）；指定 query 时每个网页单独选出
+    最相关的段落（总长不超过 max_length）。dedup 时重复的链接不抓取、与已产出正文近似的网页不产出
+    （规则同 fetch_search_results_content）。提前结束迭代时取消尚未开始的抓取
+    """
+    records = [result if isinstance(result, SearchResult) else SearchResult.from_dict(result) for result in results]
+    store = get_fingerprint_store()
+    targets = [idx for idx, record in enumerate(records) if record.href]
+    duplicates = _known_duplicates(records, targets, store) if dedup else {}
+    end_time = time.monotonic() + deadline if deadline is not None else None
+    fetched: Dict[int, Optional[Dict]] = {}
+    kept: List[int] = []
+    batch = [idx for idx in targets if idx not in duplicates]
+    while batch:
+        remaining = max(0.0, end_time - time.monotonic()) if end_time is not None else None
+        contents = get_web_fetcher().iter_many([records[idx].href for idx in batch],
+                                               max_length * PASSAGE_POOL_FACTOR if query else max_length,
+                                               max_workers=max_workers, per_host_limit=per_host_limit,
+                                               deadline=remaining)
         try:
-            import requests
-            
-            headers = {"Ocp-Apim-Subscription-Key": self.api_key}
-            params = {
-                "q": query,
-                "count": max_results,
-                "textDecorations": False,
-                "textFormat": "HTML"
-            }
-            
-            response = requests.get(self.endpoint, headers=headers, params=params)
-            response.raise_for_status()
-            
-            search_results = response.json()
-            results = []
-            
-            for item in search_results.get("webPages", {}).get("value", []):
-                results.append({
-                    'title': item.get('name', ''),
-                    'href': item.get('url', ''),
-                    'body': item.get('snippet', ''),
-                    'source': 'bing_api'
-                })
-            
-            return results
-            
-        except Exception as e:
-            print(f"[ERROR] Bing API search failed: {e}")
-            return []
+            for pos, content in contents:
+                idx = batch[pos]
+                fetched[idx] = content
+                if not content['success']:
+                    continue
+                fingerprint = simhash(content['content']) if dedup else None
+                if fingerprint is not None:
+                    store.add(records[idx].href, fingerprint)
+                    if any(hamming_distance(value, fingerprint) <= dedup_distance for value in kept):
+                        continue
+                    kept.append(fingerprint)
+                if query:
+                    content = focus_contents(query, [content], max_length, top_k=None)[0]
+                record = records[idx]
+                yield SearchResult(record.title, record.href, record.body, record.source, content)
+        finally:
+            contents.close()
+        batch = _release_orphans(records, duplicates, fetched)
 
 
-class MultiSearch:
-    """多引擎搜索管理器"""
-    
-    def __init__(self):
-        self.quota_manager = QuotaManager()
-        self.network_checker = NetworkChecker()
-        self.duckduckgo = DuckDuckGoSearch()
-        self.bing_scraper = BingScraper()
-        self.tavily = TavilySearch()
-        self.bing_api = BingAPISearch()
-    
-    def search(self, query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False) -> List[Dict]:
-        """
-        智能搜索 - 自动选择最佳引擎
-        
-        Args:
-            query: 搜索关键词
-            max_results: 最大结果数
-            prefer_quality: 是否优先质量（优先使用 Tavily）
-            force_network_check: 是否强制重新检测网络
-        
-        Returns:
-            搜索结果列表
-        """
-        print("=" * 60)
-        print("🔍 Multi-Search - 智能多引擎搜索")
-        print("=" * 60)
-        print(f"[Query] {query}")
-        print(f"[Mode] {'Quality Priority' if prefer_quality else 'Balanced'}")
-        print("-" * 60)
-        
-        print("[Network] Checking availability...")
-        availability = self.network_checker.get_availability(force_check=force_network_check)
-        print(f"  DuckDuckGo: {'✅' if availability['duckduckgo'] else '❌'}")
-        print(f"  Bing: {'✅' if availability['bing'] else '❌'}")
-        print(f"  Tavily: {'✅' if availability['tavily'] else '❌'}")
-        print("-" * 60)
-        
-        quota_status = self.quota_manager.get_quota_status()
-        print(f"[Quota] Tavily: {quota_status['tavily']['remaining']}/{MAX_TAVILY_QUOTA} remaining")
-        print(f"[Quota] Bing API: {quota_status['bing_api']['remaining']}/{MAX_BING_API_QUOTA} remaining")
-        print("-" * 60)
-        
-        results = []
-        used_engine = ""
-        
-        if prefer_quality and availability['tavily'] and quota_status['tavily']['remaining'] > 0:
-            print("[Strategy] Quality first: Trying Tavily...")
-            if self.quota_manager.use_quota("tavily"):
-                results = self.tavily.search(query, max_results)
-                used_engine = "Tavily"
-        
-        if not results and availability['duckduckgo']:
-            print("[Strategy] Trying DuckDuckGo...")
-            results = self.duckduckgo.search(query, max_results)
-            used_engine = "DuckDuckGo"
-        
-        if not results and self.bing_api.is_available() and quota_status['bing_api']['remaining'] > 0:
-            print("[Strategy] Trying Bing Web Search API...")
-            if self.quota_manager.use_quota("bing_api"):
-                results = self.bing_api.search(query, max_results)
-                used_engine = "Bing API"
-        
-        if not results and availability['bing']:
-            print("[Strategy] Using Bing Scraper (fallback)...")
-            results = self.bing_scraper.search(query, max_results)
-            used_engine = "Bing Scraper"
-        
-        if results:
-            print(f"\n[OK] {used_engine} returned {len(results)} results:\n")
-            for idx, r in enumerate(results, 1):
-                print(f"{idx}. {r['title']}")
-                print(f"   Source: {r['source']}")
-                print(f"   URL: {r['href']}")
-                if r['body']:
-                    print(f"   Summary: {r['body'][:150]}...")
-                print()
+def _pipeline_search_fetch(query: str, max_results: int, max_length: int, prefetch: Optional[int],
+                           prefetch_bytes: Optional[int], deadline: Optional[float], max_workers: int,
+                           per_host_limit: int, prefer_quality: bool, use_cache: bool, dedup: bool,
+                           dedup_distance: int):
+    """
+    搜索与抓取流水线，按完成顺序产出 (搜索结果序号, SearchResult)
+
+    搜索生成器在线程池中逐条推进，与网页抓取放在同一个 wait() 中等待：每得到一条结果立即按主机并发上限
+    派发抓取，不等整批搜索完成
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    fetcher = get_web_fetcher()
+    store = get_fingerprint_store()
+    source = get_multi_search().iter_search(query, max_results, prefer_quality, use_cache=use_cache)
+    end_time = time.monotonic() + deadline if deadline is not None else None
+    max_workers = max(1, max_workers)
+    per_host_limit = max(1, per_host_limit)
+    executor = ThreadPoolExecutor(max_workers=max_workers + 1)
+    searching: Optional[Future] = executor.submit(next, source, None)
+    records: List[SearchResult] = []
+    pending: List[int] = []
+    running: Dict[Future, int] = {}
+    host_running: Dict[str, int] = {}
+    seen: Dict[str, int] = {}
+    kept: List[Tuple[int, int]] = []
+    fetching = True
+    try:
+        while searching is not None or pending or running:
+            timeout = None
+            if end_time is not None and (pending or running):
+                timeout = end_time - time.monotonic()
+                if timeout <= 0:
+                    # 时间预算用完：未完成的抓取不再等待，之后的搜索结果不再抓取
+                    fetching = False
+                    for future in running:
+                        future.cancel()
+                    for idx in sorted(pending + list(running.values())):
+                        yield idx, records[idx]
+                    pending, running = [], {}
+                    continue
+
+            for idx in list(pending):
+                if len(running) >= max_workers:
+                    break
+                host = urlsplit(records[idx].href).netloc.lower()
+                if host_running.get(host, 0) >= per_host_limit:
+                    continue
+                pending.remove(idx)
+                host_running[host] = host_running.get(host, 0) + 1
+                running[executor.submit(fetcher.fetch, records[idx].href, max_length, use_cache=use_cache,
+                                        max_bytes=prefetch_bytes)] = idx
+
+            done, _ = wait(list(running) + ([searching] if searching is not None else []), timeout=timeout,
+                           return_when=FIRST_COMPLETED)
+            if searching in done:
+                record = searching.result()
+                searching = executor.submit(next, source, None) if record is not None else None
+                if record is not None:
+                    idx = len(records)
+                    records.append(record)
+                    if not record.href or not fetching or (prefetch is not None and idx >= prefetch):
+                        yield idx, record
+                        continue
+                    key = dedup_key(record.href)
+                    original = seen.get(key) if dedup else None
+                    if dedup and original is None:
+                        original = seen.get(store.duplicate_of(record.href) or "")
+                    if original is not None:
+                        record.duplicate_of = records[original].href
+                        yield idx, record
+                        continue
+                    seen[key] = idx
+                    pending.append(idx)
+
+            for future in done:
+                if future not in running:
+                    continue
+                idx = running.pop(future)
+                record = records[idx]
+                host_running[urlsplit(record.href).netloc.lower()] -= 1
+                content = future.result()
+                if content['success']:
+                    fingerprint = simhash(content['content']) if dedup else None
+                    if fingerprint is not None:
+                        store.add(record.href, fingerprint)
+                        original = next((other for other, value in kept
+                                         if hamming_distance(value, fingerprint) <= dedup_distance), None)
+                        if original is not None:
+                            record.duplicate_of = records[original].href
+                            yield idx, record
+                            continue
+                        kept.append((idx, fingerprint))
+                    record.full_content = content
+                yield idx, record
+    finally:
+        for future in running:
+            future.cancel()
+        if searching is not None and not searching.done():
+            searching.add_done_callback(lambda _: source.close())
         else:
-            print("[ERROR] All search engines failed")
-            print("[TIP] Try enabling VPN or check your network connection")
-        
-        print("=" * 60)
-        return results
-    
-    def get_status(self, force_network_check: bool = False) -> Dict:
-        """获取搜索系统状态"""
-        quota = self.quota_manager.get_quota_status()
-        availability = self.network_checker.get_availability(force_check=force_network_check)
-        
-        return {
-            "quota": quota,
-            "network": availability,
-            "engines": {
-                "duckduckgo": {"available": availability['duckduckgo'], "type": "unlimited"},
-                "bing_scraper": {"available": availability['bing'], "type": "unlimited"},
-                "tavily": {"available": availability['tavily'], "type": "api"},
-                "bing_api": {"available": self.bing_api.is_available(), "type": "api"}
-            }
-        }
+            source.close()
+        executor.shutdown(wait=False)
 
 
-def search(query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False) -> List[Dict]:
+def iter_search_and_fetch(query: str, max_results: int = 5, max_length: int = 2000, prefetch: Optional[int] = None,
+                          prefetch_bytes: Optional[int] = None, deadline: Optional[float] = None,
+                          max_workers: int = FETCH_MAX_WORKERS, per_host_limit: int = FETCH_PER_HOST_LIMIT,
+                          prefer_quality: bool = False, use_cache: bool = True, dedup: bool = True,
+                          dedup_distance: int = DEDUP_DISTANCE):
     """
-    执行多引擎搜索
-    
+    流水线式搜索并抓取：引擎每给出一条结果就立即开始抓取该网页，按完成顺序逐个产出 SearchResult
+
+    每条搜索结果都会产出一次：抓取成功的附带 full_content，重复的附带 duplicate_of，
+    抓取失败、超出 prefetch 或时间预算的只有搜索摘要。参数见 search_and_fetch
+    """
+    for _, record in _pipeline_search_fetch(query, max_results, max_length, prefetch, prefetch_bytes, deadline,
+                                            max_workers, per_host_limit, prefer_quality, use_cache, dedup,
+                                            dedup_distance):
+        yield record
+
+
+def search_and_fetch(query: str, max_results: int = 5, max_length: int = 2000, prefetch: Optional[int] = None,
+                     prefetch_bytes: Optional[int] = None, deadline: Optional[float] = None,
+                     max_workers: int = FETCH_MAX_WORKERS, per_host_limit: int = FETCH_PER_HOST_LIMIT,
+                     prefer_quality: bool = False, use_cache: bool = True, dedup: bool = True,
+                     dedup_distance: int = DEDUP_DISTANCE) -> List[Dict]:
+    """
+    搜索并抓取结果详细内容，搜索与抓取重叠执行（总耗时接近 max(搜索, 最慢的抓取) 而不是两者之和）
+
     Args:
         query: 搜索关键词
         max_results: 最大结果数
-        prefer_quality: 是否优先质量（会优先使用 Tavily）
-        force_network_check: 是否强制重新检测网络
-    
+        max_length: 每个网页的最大内容长度
+        prefetch: 只抓取排名前 prefetch 个结果（None 表示全部），在搜索仍在进行时即开始抓取
+        prefetch_bytes: 每个网页的下载字节上限（None 时按 max_length 估算）
+        deadline: 整体时间预算（秒），超时后不再等待未完成的抓取，搜索结果仍完整返回
+        max_workers: 最大抓取并发数
+        per_host_limit: 同一主机的最大并发数
+        prefer_quality: 是否优先质量
+        use_cache: 是否使用搜索结果缓存和网页缓存
+        dedup: 是否去重（规则同 fetch_search_results_content）
+        dedup_distance: 近似重复判定的海明距离阈值
+
     Returns:
-        搜索结果列表
+        与搜索结果顺序一致的列表，格式同 fetch_search_results_content
     """
-    multi_search = MultiSearch()
-    return multi_search.search(query, max_results, prefer_quality, force_network_check)
+    remote = _call_daemon("search_and_fetch", query=query, max_results=max_results, max_length=max_length,
+                          prefetch=prefetch, prefetch_bytes=prefetch_bytes, deadline=deadline,
+                          max_workers=max_workers, per_host_limit=per_host_limit, prefer_quality=prefer_quality,
+                          use_cache=use_cache, dedup=dedup, dedup_distance=dedup_distance)
+    if remote is not None:
+        return remote
+    ordered = sorted(_pipeline_search_fetch(query, max_results, max_length, prefetch, prefetch_bytes, deadline,
+                                            max_workers, per_host_limit, prefer_quality, use_cache, dedup,
+                                            dedup_distance), key=lambda item: item[0])
+    return [record.to_dict() for _, record in ordered]
 
 
-def search_skills(query: str = "OpenClaw AI agent skills", max_results: int = 10, force_network_check: bool = False) -> List[Dict]:
-    """搜索 OpenClaw/AI Agent 相关技能"""
-    return search(query, max_results, prefer_quality=True, force_network_check=force_network_check)
+async def asearch(query: str, max_results: int = 5, prefer_quality: bool = False, force_network_check: bool = False,
+                  use_cache: bool = True, strategy: str = "sequential", hedge_delay: float = RACE_HEDGE_DELAY,
+                  race_paid: bool = False, verbose: Optional[bool] = None) -> List[Dict]:
+    """异步执行多引擎搜索，参数与 search 相同"""
+    return await get_async_multi_search().asearch(query, max_results, prefer_quality, force_network_check, use_cache,
+                                      strategy, hedge_delay, race_paid, verbose)
 
 
-def get_status(force_network_check: bool = False):
-    """获取搜索系统状态"""
-    multi_search = MultiSearch()
-    status = multi_search.get_status(force_network_check=force_network_check)
-    
-    print("=" * 60)
-    print("📊 Multi-Search System Status")
-    print("=" * 60)
-    
-    print("\n[Network Status]")
-    for engine, available in status["network"].items():
-        status_icon = "✅" if available else "❌"
-        print(f"  {status_icon} {engine}")
-    
-    print("\n[Quota Status]")
-    for service, info in status["quota"].items():
-        print(f"  {service}: {info['used']}/{info['limit']} used, {info['remaining']} remaining")
-    
-    print("\n[Engine Status]")
-    for engine, info in status["engines"].items():
-        status_icon = "✅" if info["available"] else "❌"
-        print(f"  {status_icon} {engine} ({info['type']})")
-    
-    print("=" * 60)
-    return status
+async def arun_search(query: str, max_results: int = 5, prefer_quality: bool = False,
+                      force_network_check: bool = False, use_cache: bool = True, strategy: str = "sequential",
+                      hedge_delay: float = RACE_HEDGE_DELAY, race_paid: bool = False) -> SearchOutcome:
+    """run_search 的异步版本，返回 SearchOutcome"""
+    return await get_async_multi_search().arun(query, max_results, prefer_quality, force_network_check, use_cache,
+                                               strategy, hedge_delay, race_paid)
 
 
-class WebContentFetcher:
-    """网页内容抓取器"""
-    
-    def __init__(self, timeout: int = 15):
+async def afetch_web_content(url: str, max_length: int = 5000, use_cache: bool = True,
+                             query: Optional[str] = None) -> Dict:
+    """异步抓取网页内容的便捷函数，参数与 fetch_web_content 相同"""
+    fetcher = get_web_fetcher()
+    if not query:
+        return await fetcher.afetch(url, max_length, use_cache=use_cache)
+    content = await fetcher.afetch(url, max_length * PASSAGE_POOL_FACTOR, use_cache=use_cache)
+    return focus_contents(query, [content], max_length, top_k=None)[0]
+
+
+async def afetch_search_results_content(results: List[Dict], max_length: int = 2000,
+                                        max_concurrency: int = FETCH_MAX_WORKERS,
+                                        per_host_limit: int = FETCH_PER_HOST_LIMIT,
+                                        deadline: Optional[float] = None, query: Optional[str] = None,
+                                        passage_budget: int = PASSAGE_BUDGET, top_k: int = PASSAGE_TOP_K,
+                                        dedup: bool = True, dedup_distance: int = DEDUP_DISTANCE) -> List[Dict]:
+    """异步批量抓取搜索结果的详细内容，参数与 fetch_search_results_content 相同"""
+    fetcher = get_web_fetcher()
+    store = get_fingerprint_store()
+    targets = [idx for idx, result in enumerate(results) if result.get('href')]
+    duplicates = _known_duplicates(results, targets, store) if dedup else {}
+    end_time = time.monotonic() + deadline if deadline is not None else None
+    contents: Dict[int, Optional[Dict]] = {}
+    batch = [idx for idx in targets if idx not in duplicates]
+    while batch:
+        remaining = max(0.0, end_time - time.monotonic()) if end_time is not None else None
+        contents.update(zip(batch, await fetcher.afetch_many([results[idx]['href'] for idx in batch],
+                                                             max_length * PASSAGE_POOL_FACTOR if query else max_length,
+                                                             max_concurrency=max_concurrency,
+                                                             per_host_limit=per_host_limit, deadline=remaining)))
+        batch = _release_orphans(results, duplicates, contents)
+    if dedup:
+        _collapse_near_duplicates(results, contents, duplicates, store, dedup_distance)
+    if query:
+        focus_contents(query, list(contents.values()), passage_budget, top_k)
+    return _attach_contents(results, contents, duplicates)
+
+
+class DaemonUnavailable(Exception):
+    """常驻服务不可用（未启动、连接或发送请求失败），请求未送达，可以在进程内执行"""
+
+
+class DaemonError(RuntimeError):
+    """请求已送达常驻服务后出错（读取超时、连接断开或服务端执行出错），不在进程内重复执行"""
+
+
+def _parse_address(address: str):
+    """解析服务地址："unix:/path/to.sock" 或 "host:port"，返回 (family, 地址)"""
+    import socket
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[5:]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class DaemonClient:
+    """
+    常驻服务的轻量客户端 - 每行一个 JSON 请求/响应，每个线程复用一条连接
+
+    连接或发送失败时抛出 DaemonUnavailable，并在 DAEMON_RETRY_INTERVAL 秒内不再尝试连接；
+    请求发出后的任何错误抛出 DaemonError，不重发请求
+    """
+
+    def __init__(self, address: str = DAEMON_ADDRESS, timeout: float = DAEMON_TIMEOUT):
+        self.address = address
         self.timeout = timeout
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self):
+        import select
+        import socket
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and select.select([conn[0]], [], [], 0)[0]:
+            # 空闲连接变为可读说明服务端已关闭（或重启），发送前重新连接
+            self._close()
+            conn = None
+        if conn is None:
+            family, target = _parse_address(self.address)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def call(self, op: str, **args):
+        """
+        发送一个请求并返回结果
+
+        只有连接或发送失败时才重试（复用的连接发送失败时重新连接一次）或抛出 DaemonUnavailable；
+        请求发出后读取超时、连接断开或服务端执行出错时抛出 DaemonError
+        """
+        if time.monotonic() < self._down_until:
+            raise DaemonUnavailable(f"{self.address} marked down")
+        payload = json.dumps({"op": op, "args": args}, ensure_ascii=False).encode("utf-8") + b"\n"
+        for attempt in range(2):
+            reused = getattr(self._local, "conn", None) is not None
+            try:
+                sock, reader = self._connection()
+                sock.sendall(payload)
+                break
+            except OSError as e:
+                self._close()
+                if attempt or not reused:
+                    self._down_until = time.monotonic() + DAEMON_RETRY_INTERVAL
+                    raise DaemonUnavailable(f"{self.address}: {e}") from e
+        try:
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("connection closed by daemon")
+            response = json.loads(line)
+        except (OSError, ValueError) as e:
+            self._close()
+            raise DaemonError(f"{self.address}: {e}") from e
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "daemon error"))
+        return response["result"]
+
+    def close(self):
+        self._close()
+
+
+_daemon_client: Optional[DaemonClient] = None
+_daemon_mode = False
+
+
+def get_daemon_client() -> Optional[DaemonClient]:
+    """
+    获取常驻服务客户端，不使用常驻服务时返回 None
+
+    未设置 MULTI_SEARCH_DAEMON 时只在默认 Unix socket 文件存在时使用；设置为 0 时禁用；常驻服务进程自身不使用
+    """
+    global _daemon_client
+    if _daemon_mode or DAEMON_ADDRESS in ("", "0"):
+        return None
+    if "MULTI_SEARCH_DAEMON" not in os.environ and not os.path.exists(DAEMON_ADDRESS[5:]):
+        return None
+    if _daemon_client is None:
+        _daemon_client = DaemonClient()
+    return _daemon_client
+
+
+def _call_daemon(op: str, **args):
+    """
+    通过常驻服务执行请求，服务不可用（请求未送达）时返回 None，由调用方在进程内执行
+
+    请求送达后的错误以 DaemonError 抛出，避免同一请求在进程内再执行一次
+    """
+    client = get_daemon_client()
+    if client is None:
+        return None
+    try:
+        return client.call(op, **args)
+    except DaemonUnavailable as e:
+        logger.debug("Daemon unavailable, running in process: %s", e)
+        return None
+
+
+class _DaemonHandler:
+    """一条连接上依次处理多个请求（与 socketserver.StreamRequestHandler 组合使用，socketserver 只在启动服务时导入）"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = {"ok": True, "result": self.server.search_daemon.dispatch(request["op"], request.get("args") or {})}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            try:
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                return
+
+
+class SearchDaemon:
+    """
+    常驻服务 - 保持 MultiSearch、WebContentFetcher 与连接池常驻，通过 Unix socket 或本机 TCP 提供
+    search / fetch / fetch_results / status 请求
+
+    相同的并发请求只执行一次；配额按 DAEMON_QUOTA_LEASE 批量预占在内存中扣减，空闲后写回
+    """
+
+    def __init__(self, address: str = DAEMON_ADDRESS):
+        global _daemon_mode
+        _daemon_mode = True
+        self.address = address
+        self.coalescer = RequestCoalescer()
+        self.started = time.time()
+        self.stats = {"requests": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        self._server = None
+        self.handlers = {
+            "search": lambda **args: run_search(**args).to_dict(),
+            "fetch": fetch_web_content,
+            "fetch_results": fetch_search_results_content,
+            "search_and_fetch": search_and_fetch,
+            "status": self.status,
+            "ping": self.ping,
         }
-    
-    def fetch(self, url: str, max_length: int = 5000) -> Dict:
-        """抓取网页内容"""
+        _get_shared("multi_search", lambda: MultiSearch(quota_manager=QuotaManager(lease_size=DAEMON_QUOTA_LEASE)))
+
+    def dispatch(self, op: str, args: Dict):
+        """执行一个请求，status / ping 以外的相同请求在执行期间合并"""
+        handler = self.handlers.get(op)
+        if handler is None:
+            raise ValueError(f"unknown op: {op}")
+        with self._stats_lock:
+            self.stats["requests"] += 1
+        _metrics.inc("daemon_requests_total", op=op)
         try:
-            import requests
-            from bs4 import BeautifulSoup
-            
-            response = requests.get(url, timeout=self.timeout, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            title = soup.title.string if soup.title else ""
-            
-            text = soup.get_text(separator='\n', strip=True)
-            lines = [line.strip() for line in text.splitlines() if line.strip()]
-            content = '\n'.join(lines)
-            
-            if len(content) > max_length:
-                content = content[:max_length] + "..."
-            
-            return {
-                'title': title,
-                'content': content,
-                'url': url,
-                'success': True
-            }
-            
-        except Exception as e:
-            return {
-                'title': '',
-                'content': '',
-                'url': url,
-                'success': False,
-                'error': str(e)
-            }
+            if op in ("status", "ping"):
+                return handler(**args)
+            key = json.dumps([op, args], sort_keys=True, ensure_ascii=False)
+            return self.coalescer.run(key, handler, **args)[0]
+        except Exception:
+            with self._stats_lock:
+                self.stats["errors"] += 1
+            raise
 
+    def ping(self) -> Dict:
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 3)}
 
-def fetch_web_content(url: str, max_length: int = 5000) -> Dict:
-    """抓取网页内容的便捷函数"""
-    fetcher = WebContentFetcher()
-    return fetcher.fetch(url, max_length)
+    def status(self, force_network_check: bool = False) -> Dict:
+        status = get_multi_search().get_status(force_network_check=force_network_check)
+        with self._stats_lock:
+            status["daemon"] = dict(self.stats, coalesced=self.coalescer.coalesced, **self.ping())
+        return status
 
+    def warm_up(self):
+        """预先创建连接池、加载解析后端并启动后台健康监控"""
+        get_multi_search().get_status()
+        get_web_fetcher().transport.session
+        get_html_extractor()
 
-def fetch_search_results_content(results: List[Dict], max_length: int = 2000) -> List[Dict]:
-    """批量抓取搜索结果的详细内容"""
-    fetcher = WebContentFetcher()
-    enriched = []
-    
-    for result in results:
-        enriched_result = result.copy()
-        if result.get('href'):
-            content = fetcher.fetch(result['href'], max_length)
-            if content['success']:
-                enriched_result['full_content'] = content
-        enriched.append(enriched_result)
-    
-    return enriched
+    def serve_forever(self):
+        """监听并处理请求，直到 shutdown() 或收到 SIGINT / SIGTERM"""
+        import socket
+        import socketserver
+        family, target = _parse_address(self.address)
+        handler = type("_DaemonHandler", (_DaemonHandler, socketserver.StreamRequestHandler), {})
+        if family == socket.AF_UNIX:
+            if os.path.exists(target):
+                os.unlink(target)
+            # 在受限的 umask 下创建 socket 文件，绑定后即只有当前用户可以连接
+            umask = os.umask(0o177)
+            try:
+                server = socketserver.ThreadingUnixStreamServer(target, handler)
+            finally:
+                os.umask(umask)
+        else:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            server = socketserver.ThreadingTCPServer(target, handler)
+        server.daemon_threads = True
+        server.search_daemon = self
+        self._server = server
+        self.warm_up()
+        logger.info("Daemon listening on %s", self.address)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if family == socket.AF_UNIX and os.path.exists(target):
+                os.unlink(target)
+            _WriteBehind.flush_all()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def serve_daemon(address: Optional[str] = None):
+    """启动常驻服务（阻塞），address 默认为 MULTI_SEARCH_DAEMON 或技能目录下的 Unix socket"""
+    import signal
+
+    daemon = SearchDaemon(address or DAEMON_ADDRESS)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.shutdown).start())
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+_STARTUP["import_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 2)
 
 
 if __name__ == "__main__":
     print("Multi-Search Skill - 智能多引擎搜索")
     print("Usage: from multi_search import search, get_status")
     
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        import logging
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+        serve_daemon(sys.argv[2] if len(sys.argv) > 2 else None)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "--startup":
+        report = measure_cold_start(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"[Startup] import: {report['import_ms']} ms, first query: {report['first_query_ms']} ms")
+    
     demo = False
     if demo:
         search("Python tutorial", max_results=3)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+测试夹具 - 基于 benchmark.py 的本地模拟服务器，完全离线运行
+
+共享实例（结果缓存、网页缓存、本地索引、指纹库、限速器、MultiSearch、WebContentFetcher）
+都替换为不读写技能目录的实例，测试之间互不影响
+"""
+
+import os
+import sys
+
+os.environ["MULTI_SEARCH_DAEMON"] = "0"
+os.environ["MULTI_SEARCH_QUIET"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import multi_search
+from benchmark import UNLIMITED, MockConfig, MockServer, build_multi_search
+from multi_search import (
+    FingerprintStore, HttpTransport, LocalIndex, PageCache, ResultCache, WebContentFetcher,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    """每个测试使用全新的内存共享实例"""
+    monkeypatch.setattr(multi_search, "_shared_instances", {})
+    monkeypatch.setattr(multi_search, "_result_cache", ResultCache(path=None))
+    monkeypatch.setattr(multi_search, "_page_cache", PageCache(path=None))
+    monkeypatch.setattr(multi_search, "_local_index", LocalIndex(path=None))
+    monkeypatch.setattr(multi_search, "_fingerprint_store", FingerprintStore(path=None))
+    monkeypatch.setattr(multi_search, "_rate_limiter", UNLIMITED)
+
+
+@pytest.fixture
+def config() -> MockConfig:
+    return MockConfig(latency=0.0, page_size=20 * 1024)
+
+
+@pytest.fixture
+def server(config):
+    with MockServer(config) as server:
+        yield server
+
+
+@pytest.fixture
+def transport():
+    transport = HttpTransport()
+    yield transport
+    transport.close()
+
+
+@pytest.fixture
+def searcher(server, transport):
+    """全部引擎指向模拟服务器的 MultiSearch，同时作为共享实例"""
+    searcher = build_multi_search(server.base_url, transport)
+    multi_search._shared_instances["multi_search"] = searcher
+    yield searcher
+    searcher.health.stop()
+
+
+@pytest.fixture
+def fetcher(transport):
+    """不使用缓存和索引、不限速的网页抓取器，同时作为共享实例"""
+    fetcher = WebContentFetcher(transport=transport, page_cache=PageCache(path=None),
+                                local_index=LocalIndex(path=None), rate_limiter=UNLIMITED)
+    multi_search._shared_instances["web_fetcher"] = fetcher
+    return fetcher
+
+
+@pytest.fixture
+def page_results(server):
+    """生成指向模拟服务器合成网页的搜索结果"""
+    def build(count: int, start: int = 0):
+        return [{'title': f'Page {i}', 'href': f'{server.base_url}/page/{i}', 'body': '', 'source': 'duckduckgo'}
+                for i in range(start, start + count)]
+    return build
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""user-005: asyncio 接口（AsyncMultiSearch.asearch、WebContentFetcher.afetch / afetch_many）"""
+
+import asyncio
+import time
+
+import pytest
+
+import multi_search
+from benchmark import UNLIMITED
+from multi_search import AsyncHttpClient, AsyncMultiSearch, LocalIndex, QuotaManager, ResultCache
+
+
+@pytest.fixture
+def async_searcher(searcher, transport, monkeypatch):
+    """引擎与健康状态沿用 searcher 的 AsyncMultiSearch"""
+    monkeypatch.setattr(multi_search, "_transport", transport)
+    async_searcher = AsyncMultiSearch(transport, ResultCache(path=None), QuotaManager(path=None),
+                                      searcher.network_checker, searcher.health, client=AsyncHttpClient(),
+                                      local_index=LocalIndex(path=None), rate_limiter=UNLIMITED)
+    for name in ("duckduckgo", "bing_scraper", "tavily", "bing_api"):
+        setattr(async_searcher, name, getattr(searcher, name))
+    return async_searcher
+
+
+def test_concurrent_asearch_calls_overlap(async_searcher, config):
+    config.latency['ddg'] = 0.3
+    queries = [f"query {i}" for i in range(4)]
+
+    async def run():
+        return await asyncio.gather(*(async_searcher.asearch(query, 3, verbose=False) for query in queries))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    assert all(len(items) == 3 and items[0]['source'] == 'duckduckgo' for items in results)
+    assert time.perf_counter() - started < len(queries) * 0.3
+
+
+def test_async_race_returns_results(async_searcher, config):
+    config.latency['ddg'] = 0.5
+    outcome = asyncio.run(async_searcher.arun("race", 3, strategy="race", hedge_delay=0, use_cache=False))
+    assert outcome.engine == "Bing Scraper" and outcome.results
+
+
+def test_afetch_many_matches_sync_fetch(server, fetcher, transport, monkeypatch, page_results):
+    monkeypatch.setattr(multi_search, "_transport", transport)
+    urls = [item['href'] for item in page_results(4)]
+    contents = asyncio.run(fetcher.afetch_many(urls, 800, client=AsyncHttpClient()))
+    assert [content['content'] for content in contents] == [fetcher.fetch(url, 800)['content'] for url in urls]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""user-010: 批量多查询搜索与跨查询去重"""
+
+from multi_search import canonicalize_url, merge_results
+
+
+def test_duplicate_queries_are_searched_once(searcher, config):
+    batch = searcher.search_many(["Python asyncio", " python  ASYNCIO ", "rust tokio"], max_results=3,
+                                 use_cache=False)
+    assert batch['stats']['unique_queries'] == 2
+    assert config.requests['ddg'] == 2
+    assert batch['per_query']["Python asyncio"] == batch['per_query'][" python  ASYNCIO "]
+    assert len(batch['merged']) == 6
+
+    batch['per_query']["Python asyncio"][0]['title'] = "edited"
+    batch['per_query']["Python asyncio"].clear()
+    assert batch['per_query'][" python  ASYNCIO "][0]['title'] != "edited"
+
+
+def test_merge_results_dedups_across_queries():
+    first = [{'title': 'A', 'href': 'https://Example.com/a/?utm_source=x', 'body': ''}]
+    second = [{'title': 'A', 'href': 'https://example.com/a', 'body': 'filled'},
+              {'title': 'B', 'href': 'https://example.com/b', 'body': ''}]
+    merged = merge_results([first, second], ["q1", "q2"])
+    assert [item['title'] for item in merged] == ['A', 'B']
+    assert merged[0]['queries'] == ["q1", "q2"] and merged[0]['body'] == 'filled'
+
+
+def test_malformed_port_does_not_abort_merging():
+    assert canonicalize_url("http://example.com:99999/a") == "http://example.com:99999/a"
+    bad = [{'title': 'Bad', 'href': 'http://example.com:99999/a', 'body': ''}]
+    good = [{'title': 'Good', 'href': 'https://example.com:443/b/', 'body': ''}]
+    assert [item['title'] for item in merge_results([bad, good, bad])] == ['Bad', 'Good']
+
+
+def test_quota_budget_caps_paid_calls(searcher, config):
+    config.failure_rate['ddg'] = 1.0
+    batch = searcher.search_many([f"budget {i}" for i in range(4)], max_results=2, quota_budget=1,
+                                 use_cache=False, max_concurrency=1)
+    assert batch['stats']['paid_calls'] == 1
+    assert config.requests['bingapi'] == 1
+    assert all(batch['per_query'].values())
+
+
+def test_iter_search_many_streams_every_query(searcher):
+    seen = dict(searcher.iter_search_many(["alpha", "beta", "gamma"], max_results=2, use_cache=False))
+    assert sorted(seen) == ["alpha", "beta", "gamma"]
+    assert all(len(results) == 2 for results in seen.values())
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""user-014: 基准与压力测试套件（本地模拟服务器）"""
+
+import json
+
+import pytest
+
+import benchmark
+from benchmark import MockConfig, compare_reports, comparable_metrics, percentile, run_benchmarks
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 11))
+    assert percentile(values, 50) == 5 and percentile(values, 90) == 9 and percentile(values, 100) == 10
+    assert percentile([], 50) is None
+
+
+def test_mock_server_fails_on_demand(server, config, transport):
+    config.failure_rate['ddg'] = 1.0
+    assert transport.get(f"{server.base_url}/ddg?q=x").status_code == 503
+    assert transport.get(f"{server.base_url}/tavily?q=x&n=2").json()['results'][1]['title'] == "x result 1"
+
+
+@pytest.fixture(scope="module")
+def report():
+    return run_benchmarks(MockConfig(latency=0.0, page_size=16 * 1024), queries=3, pages=4, parse_rounds=1)
+
+
+def test_report_covers_every_scenario(report):
+    assert report['search']['count'] == 3 and report['search']['empty'] == 0
+    assert report['fallback']['failed_route'] == 'ddg' and 'duckduckgo' not in report['fallback']['engines']
+    assert report['enrichment']['succeeded'] == 4
+    assert report['parse']['backends']
+    json.dumps(report)
+
+
+def test_compare_flags_only_regressions(report):
+    metrics = comparable_metrics(report)
+    assert 'search.p50_ms' in metrics and 'enrichment.seconds' in metrics
+    slower = json.loads(json.dumps(report))
+    slower['search']['p50_ms'] = report['search']['p50_ms'] * 2 + 1
+    assert compare_reports(report, report) == []
+    assert [item['metric'] for item in compare_reports(report, slower)] == ['search.p50_ms']
+
+
+def test_cli_exit_code_on_regression(tmp_path, report, monkeypatch):
+    baseline = json.loads(json.dumps(report))
+    baseline['search']['p50_ms'] = baseline['search']['p90_ms'] = baseline['search']['p99_ms'] = 1e-6
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline), encoding='utf-8')
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda *args, **kwargs: report)
+    assert benchmark.main(["--compare", str(path)]) == 1
+    assert benchmark.main(["--compare", str(path), "--threshold", "1e9"]) == 0
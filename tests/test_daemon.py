@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""user-020: 常驻服务：本地 socket 协议、请求合并与不可用时的回退"""
+
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+import pytest
+
+import multi_search
+from multi_search import DaemonClient, DaemonError, DaemonUnavailable, SearchDaemon, run_search
+
+
+def start(address: str, **handlers) -> SearchDaemon:
+    daemon = SearchDaemon(address)
+    daemon.warm_up = lambda: None
+    daemon.handlers.update(handlers)
+    daemon.thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    daemon.thread.start()
+    deadline = time.monotonic() + 5
+    while daemon._server is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return daemon
+
+
+def stop(daemon: SearchDaemon):
+    daemon.shutdown()
+    daemon.thread.join(5)
+
+
+@pytest.fixture
+def address(monkeypatch):
+    # SearchDaemon 会把当前进程标记为常驻服务进程，测试结束后恢复
+    monkeypatch.setattr(multi_search, "_daemon_mode", False)
+    directory = tempfile.mkdtemp(prefix="ms-")
+    yield "unix:" + os.path.join(directory, "d.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def daemon(address, searcher, calls):
+    def slow(value=None):
+        calls.append(value)
+        time.sleep(0.3)
+        return value
+
+    def boom():
+        raise ValueError("bad input")
+
+    daemon = start(address, slow=slow, boom=boom)
+    yield daemon
+    stop(daemon)
+
+
+def test_socket_is_private(daemon, address):
+    assert stat.S_IMODE(os.stat(address[5:]).st_mode) == 0o600
+
+
+def test_search_round_trip(daemon, address, config):
+    client = DaemonClient(address)
+    outcome = client.call("search", query="daemon", max_results=2, use_cache=False)
+    assert outcome['engine'] == "DuckDuckGo" and len(outcome['results']) == 2
+    assert client.call("ping")['pid'] == os.getpid()
+    assert client.call("status")['daemon']['requests'] == 3
+    client.close()
+
+
+def test_module_api_goes_through_daemon(daemon, address, monkeypatch):
+    client = DaemonClient(address)
+    caller = threading.current_thread()
+    # 服务端与测试在同一进程，服务端线程内执行请求时不能再转发给自己
+    monkeypatch.setattr(multi_search, "get_daemon_client",
+                        lambda: client if threading.current_thread() is caller else None)
+    outcome = run_search("via daemon", max_results=2, use_cache=False)
+    assert outcome.ok and daemon.stats['requests'] == 1
+
+
+def test_identical_requests_are_coalesced(daemon, address, calls):
+    client = DaemonClient(address)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.call("slow", value=7))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [7] * 4 and calls == [7]
+    assert daemon.coalescer.coalesced == 3
+
+
+def test_errors_after_delivery_raise_daemon_error(daemon, address, calls):
+    client = DaemonClient(address, timeout=0.1)
+    with pytest.raises(DaemonError, match="bad input"):
+        client.call("boom")
+    with pytest.raises(DaemonError, match="unknown op"):
+        client.call("missing")
+    with pytest.raises(DaemonError):
+        client.call("slow", value=1)
+    assert calls == [1]
+
+
+def test_restarted_daemon_reuses_client(address, searcher):
+    client = DaemonClient(address)
+    first = start(address, echo=lambda **args: args)
+    assert client.call("echo", n=1) == {'n': 1}
+    stop(first)
+    second = start(address, echo=lambda **args: args)
+    try:
+        assert client.call("echo", n=2) == {'n': 2}
+    finally:
+        stop(second)
+
+
+def test_unavailable_daemon_falls_back_in_process(address, searcher, monkeypatch):
+    client = DaemonClient(address)
+    with pytest.raises(DaemonUnavailable):
+        client.call("ping")
+    with pytest.raises(DaemonUnavailable, match="marked down"):
+        client.call("ping")
+    monkeypatch.setattr(multi_search, "get_daemon_client", lambda: client)
+    assert run_search("fallback", max_results=2, use_cache=False).engine == "DuckDuckGo"
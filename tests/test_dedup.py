@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""user-022: SimHash 近似重复检测，跳过重复的抓取和结果"""
+
+import pytest
+
+import multi_search
+from benchmark import make_page
+from multi_search import (
+    FingerprintStore, dedup_key, fetch_search_results_content, get_html_extractor, hamming_distance, simhash,
+)
+
+
+def page_text(seed: int) -> str:
+    return get_html_extractor().extract_page(make_page(20 * 1024, seed), 3000)[1]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = FingerprintStore(path=str(tmp_path / "fingerprints.db"))
+    monkeypatch.setattr(multi_search, "_fingerprint_store", store)
+    return store
+
+
+def test_simhash_tolerates_small_edits():
+    text = page_text(1)
+    assert hamming_distance(simhash(text), simhash(text + " one extra trailing sentence")) <= 3
+    assert hamming_distance(simhash(text), simhash(page_text(2))) > 3
+    assert simhash("too short") is None
+
+
+def test_dedup_key_ignores_mirrors_and_amp():
+    assert dedup_key("https://www.example.com/a/amp?utm_source=x") == dedup_key("http://m.example.com/a")
+    assert dedup_key("https://example.com/a?id=1") != dedup_key("https://example.com/a?id=2")
+
+
+def test_store_remembers_near_duplicates(tmp_path):
+    path = str(tmp_path / "fingerprints.db")
+    text = page_text(3)
+    assert FingerprintStore(path=path).add("https://a.example/post", simhash(text)) is None
+    reopened = FingerprintStore(path=path)
+    assert reopened.add("https://b.example/copy", simhash(text + " syndicated")) == "a.example/post"
+    assert reopened.duplicate_of("https://b.example/copy") == "a.example/post"
+    assert reopened.add("https://c.example/other", simhash(page_text(4))) is None
+
+
+def test_batch_skips_and_collapses_duplicates(fetcher, server, config, store):
+    base = f"{server.base_url}/page"
+    results = [{'title': str(i), 'href': href, 'body': '', 'source': 'duckduckgo'} for i, href in enumerate(
+        [f"{base}/1", f"{base}/1?utm_source=feed", f"{base}/1?mirror=1", f"{base}/2"])]
+    enriched = fetch_search_results_content(results, max_length=2000)
+    assert config.requests['page'] == 3
+    assert [('full_content' in r, r.get('duplicate_of')) for r in enriched] == [
+        (True, None), (False, f"{base}/1"), (False, f"{base}/1"), (True, None)]
+
+    again = fetch_search_results_content([results[2], results[0]], max_length=2000)
+    assert config.requests['page'] == 4
+    assert again[0]['duplicate_of'] == f"{base}/1" and 'full_content' in again[1]
+    assert store.get_stats()['known_skips'] == 1
+
+
+def test_dedup_can_be_disabled(fetcher, page_results, config):
+    results = page_results(2) + page_results(1)
+    enriched = fetch_search_results_content(results, max_length=500, dedup=False)
+    assert all('full_content' in r for r in enriched) and config.requests['page'] == 3
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""user-011: 可切换的快速网页解析后端"""
+
+import pytest
+
+import multi_search
+from benchmark import benchmark_extractors, make_page
+from multi_search import HTML_EXTRACTORS, configure_html_extractor, get_html_extractor
+
+
+def installed():
+    names = []
+    for name in HTML_EXTRACTORS:
+        try:
+            get_html_extractor(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+BING_PAGE = ('<html><body><a href="https://www.bing.com/nav/1">Bing navigation</a><ol id="b_results">'
+             '<li class="b_algo"><h2><a href="https://example.com/a">First result</a></h2>'
+             '<div class="b_caption"><p>About the first</p></div></li>'
+             '<li class="b_algo"><h2><a href="https://example.org/b">Second result</a></h2></li></ol></body></html>')
+
+
+@pytest.mark.parametrize("name", installed())
+def test_extract_page_drops_boilerplate(name):
+    title, text = get_html_extractor(name).extract_page(make_page(20 * 1024, seed=3), max_length=2000)
+    assert title == "Synthetic page 3"
+    assert "Paragraph 0:" in text and len(text) <= 2000 + len("...")
+    assert "Section 1" not in text and "var t" not in text
+
+
+@pytest.mark.parametrize("name", installed())
+def test_extract_bing_skips_bing_links(name):
+    results = get_html_extractor(name).extract_bing(BING_PAGE, max_results=5)
+    assert [result['href'] for result in results] == ["https://example.com/a", "https://example.org/b"]
+    assert results[0]['title'] == "First result"
+
+
+def test_configure_switches_shared_backend(monkeypatch):
+    monkeypatch.setattr(multi_search, "_html_extractor", None)
+    assert configure_html_extractor("stream") is get_html_extractor()
+    assert get_html_extractor().name == "stream"
+    with pytest.raises(KeyError):
+        configure_html_extractor("missing")
+
+
+def test_bing_scraper_parses_mock_results(searcher):
+    results = searcher.bing_scraper.search("html parsing", max_results=3)
+    assert len(results) == 3 and all('/page/' in result['href'] for result in results)
+
+
+def test_benchmark_reports_every_installed_backend():
+    report = benchmark_extractors(rounds=1)
+    assert sorted(report['backends']) == sorted(installed())
+    assert all(stats['page_ms'] > 0 for stats in report['backends'].values())
+
+
+@pytest.mark.parametrize("name, module", [("selectolax", "selectolax"), ("lxml", "lxml.etree")])
+def test_native_backends_stop_parsing_early(name, module):
+    pytest.importorskip(module)
+    extractor = get_html_extractor(name)
+    page = make_page(4 * 1024 * 1024, seed=7)
+    parser, pushed = extractor.page_parser(500), 0
+    for start in range(0, len(page), 32768):
+        pushed += 32768
+        if parser.push(page[start:start + 32768]):
+            break
+    assert pushed < 256 * 1024
+    assert parser.finish() == extractor.extract_page(page, 500) == get_html_extractor("stream").extract_page(page, 500)
+
+
+@pytest.mark.parametrize("name, module", [("selectolax", "selectolax"), ("lxml", "lxml.etree")])
+def test_native_backends_bing_selectors(name, module):
+    pytest.importorskip(module)
+    extractor = get_html_extractor(name)
+    assert extractor.extract_bing(BING_PAGE, 5) == get_html_extractor("stream").extract_bing(BING_PAGE, 5)
+    assert extractor.extract_bing(BING_PAGE, 5)[0]['body'] == "About the first"
+    links_only = '<html><body><a href="https://example.net/x">Fallback link title</a></body></html>'
+    assert [r['href'] for r in extractor.extract_bing(links_only, 5)] == ["https://example.net/x"]
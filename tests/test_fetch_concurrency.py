@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""user-001: 搜索结果网页并发抓取（并发上限、按主机限流、整体截止时间）"""
+
+import time
+
+from multi_search import fetch_search_results_content
+
+
+def test_fetches_results_concurrently_in_order(server, config, fetcher, page_results):
+    config.latency['page'] = 0.2
+    results = page_results(6)
+
+    started = time.perf_counter()
+    enriched = fetch_search_results_content(results, max_length=500, max_workers=6, per_host_limit=6, dedup=False)
+    elapsed = time.perf_counter() - started
+
+    assert [item['href'] for item in enriched] == [item['href'] for item in results]
+    assert all(item['full_content']['success'] for item in enriched)
+    assert config.peak['page'] > 1
+    assert elapsed < 6 * 0.2
+
+
+def test_per_host_limit_caps_parallel_requests(server, config, fetcher, page_results):
+    config.latency['page'] = 0.05
+    fetcher.fetch_many([item['href'] for item in page_results(6)], 500, max_workers=6, per_host_limit=2)
+    assert config.peak['page'] == 2
+
+
+def test_deadline_stops_dispatching_new_fetches(server, config, fetcher, page_results):
+    config.latency['page'] = 0.3
+    results = page_results(6)
+
+    started = time.perf_counter()
+    contents = fetcher.fetch_many([item['href'] for item in results], 500, max_workers=1, deadline=0.4)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
+    assert contents[0]['success']
+    assert contents[-1] is None
+    assert config.requests['page'] <= 2
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""user-008: 后台健康监控与熔断器（替代搜索路径上的同步网络检测）"""
+
+import time
+from datetime import datetime
+
+import multi_search
+from multi_search import EngineHealth, HealthMonitor, NetworkChecker
+
+
+def test_first_search_does_not_wait_for_unknown_engines(searcher):
+    searcher.health.probes['duckduckgo'] = lambda: time.sleep(2) or True
+    started = time.perf_counter()
+    outcome = searcher.run("health", 3, use_cache=False)
+    assert time.perf_counter() - started < 1.0
+    assert outcome.engine == "DuckDuckGo" and outcome.results
+
+
+def test_background_probe_settles_unknown_engines(searcher):
+    searcher.health.probes['duckduckgo'] = lambda: False
+    searcher.health.start()
+    deadline = time.monotonic() + 5
+    while searcher.health.is_available('duckduckgo') and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert searcher.health.snapshot()['duckduckgo']['state'] == "open"
+
+
+def test_cached_availability_seeds_state_without_probing(searcher):
+    checker = searcher.network_checker
+    checker.cache = {'availability': {'duckduckgo': False, 'bing': True}, 'last_check': datetime.now().isoformat()}
+    health = HealthMonitor(checker, interval=3600)
+    assert not health.is_available('duckduckgo') and health.is_available('bing')
+    assert health._cache_remaining() > 0
+
+
+def test_network_checker_has_no_quota_spending_check():
+    assert not hasattr(NetworkChecker, "check_tavily")
+    assert not hasattr(NetworkChecker, "get_availability")
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    monkeypatch.setattr(multi_search, "HEALTH_FAILURE_THRESHOLD", 3)
+    health = EngineHealth()
+    for _ in range(2):
+        health.record(False, 0.1)
+    assert health.allow()
+    health.record(False, 0.1)
+    assert health.state == "open" and not health.allow()
+
+
+def test_half_open_allows_a_single_trial(searcher, monkeypatch):
+    monkeypatch.setattr(multi_search, "HEALTH_COOLDOWN", 0.05)
+    searcher.health.engines['bing'].trip()
+    assert not searcher.health.is_available('bing')
+    time.sleep(0.1)
+    assert searcher.health.is_available('bing')
+    assert searcher.health.begin('bing')
+    assert not searcher.health.begin('bing') and not searcher.health.is_available('bing')
+    searcher.health.release('bing')
+    assert searcher.health.begin('bing')
+    searcher.health.record('bing', True, 0.1)
+    assert searcher.health.snapshot()['bing']['state'] == "closed"
+    assert searcher.health.begin('bing') and searcher.health.begin('bing')
+
+
+def test_search_path_does_not_block_on_probes(searcher, config):
+    searcher.run("warm", 3, use_cache=False)
+    searcher.health.probes['duckduckgo'] = lambda: time.sleep(2) or True
+    started = time.perf_counter()
+    assert searcher.run("health", 3, use_cache=False).results
+    assert time.perf_counter() - started < 1.0
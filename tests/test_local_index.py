@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""user-017: 已抓取网页的本地全文索引作为零成本的第一搜索层"""
+
+import time
+
+import pytest
+
+from benchmark import UNLIMITED
+from multi_search import LocalIndex, PageCache, SearchPolicy, WebContentFetcher
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalIndex(path=str(tmp_path / "local_index.db"))
+    if not index.enabled:
+        pytest.skip("SQLite FTS5 is not available")
+    return index
+
+
+def test_bm25_ranks_title_matches_first(index):
+    index.add("https://example.com/a", "Unrelated", "gradient descent mentioned once in the body")
+    index.add("https://example.com/b", "Gradient descent explained", "gradient descent step size and momentum")
+    results = index.search("gradient descent", limit=5)
+    assert [r['href'] for r in results] == ["https://example.com/b", "https://example.com/a"]
+    assert results[0]['source'] == 'local_index'
+    assert index.search("gradient missingword") == []
+
+
+def test_cjk_and_max_age(index):
+    index.add("https://example.cn/x", "搜索引擎", "本地全文索引可以离线检索中文网页")
+    assert index.search("全文索引")[0]['href'] == "https://example.cn/x"
+    time.sleep(0.05)
+    assert index.search("全文索引", max_age=0.01) == []
+
+
+def test_readding_a_page_replaces_it(index):
+    index.add("https://example.com/a?utm_source=x", "Old", "alpha content")
+    index.add("https://example.com/a", "New", "beta content")
+    assert index.search("alpha") == [] and index.search("beta")[0]['title'] == "New"
+
+
+def test_fetched_pages_answer_later_searches(index, searcher, server, config, transport):
+    fetcher = WebContentFetcher(transport=transport, page_cache=PageCache(path=None), local_index=index,
+                                rate_limiter=UNLIMITED)
+    assert fetcher.fetch(f"{server.base_url}/page/1", max_length=2000, use_cache=False)['success']
+    searcher.local_index = index
+
+    outcome = searcher.run("python latency", max_results=1)
+    assert outcome.engine == "Local Index" and outcome.results[0]['href'] == f"{server.base_url}/page/1"
+    assert config.requests['ddg'] == 0
+
+    searcher.set_policy(SearchPolicy(local_index=False))
+    assert searcher.run("python latency", max_results=1).engine == "DuckDuckGo"
+
+
+def test_partial_hits_fill_network_results(index, searcher, config):
+    index.add("https://example.com/local", "Fill query", "fill query page")
+    searcher.local_index = index
+    config.failure_rate.update(dict.fromkeys(config.failure_rate, 1.0))
+    outcome = searcher.run("fill query", max_results=5)
+    assert config.requests['ddg'] >= 1
+    assert [r['href'] for r in outcome.results] == ["https://example.com/local"]
+    assert index.get_stats()['partial'] == 1
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""user-015: 搜索流程的结构化指标与追踪钩子"""
+
+import pytest
+
+import multi_search
+from multi_search import Metrics, SpanHook
+
+
+class Recorder(SpanHook):
+    def __init__(self):
+        self.ended = []
+
+    def on_end(self, span):
+        self.ended.append(span)
+
+
+class Broken(SpanHook):
+    def on_start(self, span):
+        raise RuntimeError("hook failure")
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = Metrics(enabled=True)
+    monkeypatch.setattr(multi_search, "_metrics", metrics)
+    return metrics
+
+
+def test_search_records_counters_and_stages(searcher, config, metrics):
+    config.failure_rate['ddg'] = 1.0
+    searcher.search("metrics", max_results=2, use_cache=False)
+    snapshot = metrics.snapshot()
+    assert snapshot['counters']['engine_attempts_total{engine=duckduckgo}'] >= 1
+    assert snapshot['counters']['fallbacks_total{engine=bing_api}'] == 1
+    assert snapshot['timers']['stage_seconds{stage=search,strategy=sequential}']['count'] == 1
+    assert snapshot['timers']['stage_seconds{engine=bing_api,stage=engine}']['count'] == 1
+
+
+def test_hooks_receive_nested_spans(searcher, metrics):
+    recorder = Recorder()
+    metrics.add_hook(Broken())
+    metrics.add_hook(recorder)
+    searcher.search("tracing", max_results=2, use_cache=False)
+    search = next(span for span in recorder.ended if span.name == "search")
+    assert search.attributes['query'] == "tracing" and search.duration >= 0
+    assert any(span.parent is search for span in recorder.ended if span.name == "engine")
+
+
+def test_span_records_errors(metrics):
+    recorder = Recorder()
+    metrics.add_hook(recorder)
+    with pytest.raises(ValueError):
+        with metrics.span("stage"):
+            raise ValueError("boom")
+    assert recorder.ended[0].error == "ValueError: boom"
+
+
+def test_disabled_metrics_record_nothing(metrics):
+    metrics.enabled = False
+    metrics.inc("x")
+    with metrics.span("stage") as span:
+        span.set_attribute("k", "v")
+    assert metrics.snapshot()['counters'] == {} and metrics.snapshot()['timers'] == {}
+
+
+def test_prometheus_export(metrics):
+    metrics.inc("fetches_total", outcome='down"loaded')
+    metrics.observe("stage_seconds", 0.02, stage="fetch")
+    text = metrics.to_prometheus()
+    assert 'multi_search_fetches_total{outcome="down\\"loaded"} 1' in text
+    assert 'multi_search_stage_seconds_count{stage="fetch"} 1' in text
+    assert '# TYPE multi_search_stage_seconds histogram' in text
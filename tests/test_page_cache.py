@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""user-013: 基于 ETag / Last-Modified 条件请求的磁盘网页缓存"""
+
+import pytest
+
+from benchmark import UNLIMITED
+from multi_search import LocalIndex, PageCache, WebContentFetcher
+
+
+@pytest.fixture
+def cached_fetcher(tmp_path, transport):
+    cache = PageCache(path=str(tmp_path / "page_cache.db"))
+    return WebContentFetcher(transport=transport, page_cache=cache, local_index=LocalIndex(path=None),
+                             rate_limiter=UNLIMITED)
+
+
+def page_requests(config) -> int:
+    return config.requests['page']
+
+
+def test_fresh_entry_skips_the_network(cached_fetcher, server, config):
+    url = f"{server.base_url}/page/1"
+    first = cached_fetcher.fetch(url, max_length=1000)
+    second = cached_fetcher.fetch(url, max_length=1000)
+    assert second['content'] == first['content']
+    assert page_requests(config) == 1
+    assert cached_fetcher.page_cache.get_stats()['hits'] == 1
+
+
+def test_stale_entry_is_revalidated_with_304(cached_fetcher, server, config):
+    url = f"{server.base_url}/page/2?max_age=0"
+    first = cached_fetcher.fetch(url, max_length=1000)
+    second = cached_fetcher.fetch(url, max_length=1000)
+    assert second['content'] == first['content'] and second['success']
+    assert page_requests(config) == 2 and config.not_modified == 1
+    assert cached_fetcher.page_cache.get_stats()['revalidated'] == 1
+
+
+def test_shorter_entry_is_a_miss(cached_fetcher, server, config):
+    url = f"{server.base_url}/page/3"
+    cached_fetcher.fetch(url, max_length=200)
+    assert len(cached_fetcher.fetch(url, max_length=2000)['content']) > 200
+    assert page_requests(config) == 2
+
+
+def test_no_store_is_not_cached(tmp_path):
+    cache = PageCache(path=str(tmp_path / "page_cache.db"))
+    cache.put("https://example.com/a", 100, "t", "body", True, {'Cache-Control': 'no-store'})
+    assert cache.get("https://example.com/a", 100) is None
+
+
+def test_cache_survives_reopen_and_evicts(tmp_path):
+    path = str(tmp_path / "page_cache.db")
+    PageCache(path=path).put("https://example.com/a", 100, "t", "body", True, {'ETag': '"v1"'})
+    reopened = PageCache(path=path, max_bytes=1)
+    assert reopened.get("https://example.com/a", 100)['validators'] == {'If-None-Match': '"v1"'}
+    reopened.put("https://example.com/b", 100, "t", "other body", True, {})
+    assert reopened.get_stats()['evictions'] >= 1
+
+
+@pytest.mark.parametrize("max_length, max_bytes", [(500, None), (10 ** 6, 64 * 1024)])
+def test_cached_content_matches_fresh_fetch(cached_fetcher, server, max_length, max_bytes):
+    url = f"{server.base_url}/page/4?size={1024 * 1024}"
+    fresh = cached_fetcher.fetch(url, max_length=max_length, max_bytes=max_bytes)
+    cached = cached_fetcher.fetch(url, max_length=max_length, max_bytes=max_bytes)
+    assert cached_fetcher.page_cache.get_stats()['hits'] == 1
+    assert cached['content'] == fresh['content']
+    assert fresh['content'].endswith("...") == (max_bytes is None)
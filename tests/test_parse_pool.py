@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""user-024: 大网页的 HTML 解析交给进程池，绕开 GIL"""
+
+import os
+
+import pytest
+
+from benchmark import UNLIMITED
+from multi_search import LocalIndex, PageCache, ParsePool, WebContentFetcher, _PageReader, get_html_extractor
+
+MIN_BYTES = 64 * 1024
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ParsePool(1, min_bytes=MIN_BYTES).start()
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def pooled_fetcher(transport, pool):
+    pool.stats.update(pooled=0, fallbacks=0)
+    return WebContentFetcher(transport=transport, page_cache=PageCache(path=None), local_index=LocalIndex(path=None),
+                             rate_limiter=UNLIMITED, parse_pool=pool)
+
+
+def test_large_gzip_page_is_parsed_in_pool(pooled_fetcher, fetcher, server, pool):
+    url = f"{server.base_url}/page/1?size={512 * 1024}"
+    pooled = pooled_fetcher.fetch(url, max_length=10 ** 6, use_cache=False)
+    inline = fetcher.fetch(url, max_length=10 ** 6, use_cache=False)
+    assert pool.stats['pooled'] == 1
+    assert pooled['content'] == inline['content'] and pooled['title'] == inline['title']
+
+
+def test_small_page_stays_inline(pooled_fetcher, server, pool):
+    assert pooled_fetcher.fetch(f"{server.base_url}/page/2?size={16 * 1024}", max_length=10 ** 6,
+                                use_cache=False)['success']
+    assert pool.stats['pooled'] == 0
+
+
+def test_declared_small_response_is_not_buffered(pool):
+    html = {'Content-Type': 'text/html'}
+    assert _PageReader(dict(html, **{'Content-Length': '1000'}), 500, parse_pool=pool)._buffer is None
+    assert _PageReader(dict(html, **{'Content-Length': '1000', 'Content-Encoding': 'gzip'}), 500,
+                       parse_pool=pool)._buffer == []
+    assert _PageReader(html, 500, parse_pool=pool)._buffer == []
+
+
+def test_bing_parse_matches_inline(pool):
+    page = ''.join(f'<li class="b_algo"><h2><a href="https://example.com/{i}">Result {i}</a></h2>'
+                   f'<div class="b_caption"><p>About {i}</p></div></li>' for i in range(10))
+    page = f'<html><body><ol id="b_results">{page}</ol></body></html>'
+    assert pool.parse_bing(page, 5) == get_html_extractor().extract_bing(page, 5)
+
+
+def test_broken_pool_falls_back_to_thread():
+    pool = ParsePool(1, min_bytes=MIN_BYTES).start()
+    try:
+        for process in list(pool._executor._processes.values()):
+            os.kill(process.pid, 9)
+            process.join()
+        title, content, _ = pool.parse_page('text/html', b'<title>T</title><p>body text</p>', 100)
+        assert title == "T" and content.endswith("body text") and pool.stats['fallbacks'] == 1
+        assert pool.parse_page('text/html', b'<title>U</title><p>again</p>', 100)[0] == "U"
+        assert pool.stats['pooled'] == 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""user-018: 按查询选取相关段落，替代截取正文开头"""
+
+from multi_search import (
+    PASSAGE_SEPARATOR, fetch_search_results_content, focus_contents, query_snippet, rank_passages, split_passages,
+)
+
+FILLER = "\n".join(f"Background paragraph {i} about unrelated history and general context." for i in range(40))
+TEXT = FILLER + "\nThe transformer attention mechanism weighs every token against the others.\n" + FILLER
+
+
+def test_split_passages_respects_size():
+    passages = split_passages(TEXT + "\n" + "word " * 500, 200)
+    assert all(len(passage) <= 200 for passage in passages)
+    assert "".join(passages).replace("\n", "").replace(" ", "") == (TEXT + "word" * 500).replace("\n", "").replace(" ", "")
+
+
+def test_relevant_passage_beats_the_head():
+    [passages] = rank_passages("attention mechanism", [TEXT], budget=600, top_k=2)
+    assert any("attention mechanism" in passage['text'] for passage in passages)
+    assert sum(len(passage['text']) for passage in passages) <= 600
+    assert [p['index'] for p in passages] == sorted(p['index'] for p in passages)
+
+
+def test_top_k_none_is_limited_only_by_budget():
+    texts = ["\n".join(f"alpha beta {i} " * 5 for i in range(50))]
+    limited = rank_passages("alpha", texts, budget=10 ** 6, top_k=3, passage_chars=100)[0]
+    unlimited = rank_passages("alpha", texts, budget=10 ** 6, top_k=None, passage_chars=100)[0]
+    assert len(limited) == 3 and len(unlimited) == len(split_passages(texts[0], 100))
+
+
+def test_cjk_query_and_snippet():
+    text = "无关的开头内容。" * 40 + "向量数据库使用近似最近邻索引。" + "无关的结尾内容。" * 40
+    [passages] = rank_passages("近似最近邻", [text], budget=400, top_k=1, passage_chars=100)
+    assert "近似最近邻" in passages[0]['text']
+    assert "近似最近邻" in query_snippet(text, "近似最近邻", 100)
+
+
+def test_focus_contents_skips_failures():
+    contents = [{'success': True, 'content': TEXT}, None, {'success': False, 'content': ''}]
+    focus_contents("transformer attention", contents, budget=1000, top_k=1)
+    assert "transformer attention" in contents[0]['content'] and len(contents[0]['passages']) == 1
+    assert 'passages' not in contents[2]
+
+
+def test_fetch_results_with_query_stays_in_budget(searcher, fetcher, page_results):
+    results = fetch_search_results_content(page_results(3), max_length=1000, query="socket quota",
+                                           passage_budget=900, dedup=False)
+    passages = [p for r in results for p in r['full_content']['passages']]
+    assert passages and sum(len(p['text']) for p in passages) <= 900
+    for result in results:
+        assert result['full_content']['content'] == PASSAGE_SEPARATOR.join(
+            p['text'] for p in result['full_content']['passages'])
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""user-023: 搜索与抓取流水线，预取排名靠前的结果"""
+
+import time
+
+import multi_search
+from benchmark import UNLIMITED
+from multi_search import (
+    LocalIndex, PageCache, SearchResult, WebContentFetcher, iter_search_and_fetch, search_and_fetch,
+)
+
+
+def test_results_keep_search_order(searcher, fetcher):
+    expected = [r['href'] for r in searcher.search("pipeline order", max_results=4, use_cache=False)]
+    enriched = search_and_fetch("pipeline order", max_results=4, max_length=500, use_cache=False)
+    assert [r['href'] for r in enriched] == expected
+    assert all(r['full_content']['success'] for r in enriched)
+
+
+def test_prefetch_limits_fetched_results(searcher, fetcher, config):
+    enriched = search_and_fetch("prefetch", max_results=5, max_length=500, prefetch=2, use_cache=False)
+    assert ['full_content' in r for r in enriched] == [True, True, False, False, False]
+    assert config.requests['page'] == 2
+
+
+def test_deadline_returns_search_results(searcher, fetcher, config):
+    config.latency['page'] = 1.0
+    started = time.monotonic()
+    enriched = search_and_fetch("deadline", max_results=3, max_length=500, deadline=0.2, use_cache=False)
+    assert time.monotonic() - started < 0.8
+    assert len(enriched) == 3 and not any('full_content' in r for r in enriched)
+
+
+def test_fetches_overlap_with_each_other(searcher, fetcher, config):
+    config.latency['page'] = 0.3
+    started = time.monotonic()
+    enriched = search_and_fetch("overlap", max_results=4, max_length=500, use_cache=False)
+    assert time.monotonic() - started < 0.3 * 3
+    assert all('full_content' in r for r in enriched)
+
+
+def test_iter_yields_every_result_once(searcher, fetcher):
+    records = list(iter_search_and_fetch("streamed pipeline", max_results=4, max_length=500, prefetch=3,
+                                         use_cache=False))
+    assert all(isinstance(record, SearchResult) for record in records)
+    assert len({record.href for record in records}) == 4
+    assert sum(record.full_content is not None for record in records) == 3
+
+
+def test_use_cache_false_bypasses_page_cache(searcher, transport, config, tmp_path, monkeypatch):
+    fetcher = WebContentFetcher(transport=transport, page_cache=PageCache(path=str(tmp_path / "pages.db")),
+                                local_index=LocalIndex(path=None), rate_limiter=UNLIMITED)
+    monkeypatch.setitem(multi_search._shared_instances, "web_fetcher", fetcher)
+    search_and_fetch("page cache", max_results=2, max_length=500)
+    search_and_fetch("page cache", max_results=2, max_length=500)
+    assert config.requests['page'] == 2
+    search_and_fetch("page cache", max_results=2, max_length=500, use_cache=False)
+    assert config.requests['page'] == 4
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""user-016: 静默/结构化输出，热路径不做控制台 I/O"""
+
+import json
+
+from multi_search import SearchOutcome, format_search_outcome, run_search, search
+
+
+def test_quiet_search_prints_nothing(searcher, config, capsys):
+    config.failure_rate['ddg'] = 1.0
+    assert search("quiet", max_results=2, use_cache=False)
+    assert capsys.readouterr().out == ""
+
+
+def test_verbose_search_prints_report(searcher, capsys):
+    results = search("loud", max_results=2, use_cache=False, verbose=True)
+    out = capsys.readouterr().out
+    assert "[Query] loud" in out and results[0]['href'] in out
+
+
+def test_run_search_returns_structured_outcome(searcher):
+    outcome = run_search("structured", max_results=3, use_cache=True)
+    assert outcome.ok and outcome.engine == "DuckDuckGo" and not outcome.cached
+    assert outcome.availability['duckduckgo'] and 'tavily' in outcome.quota
+    assert {'network_ms', 'engines_ms', 'total_ms'} <= set(outcome.timings)
+
+    cached = run_search("structured", max_results=3)
+    assert cached.cached and cached.results == outcome.results
+
+
+def test_outcome_round_trips_through_json(searcher):
+    outcome = run_search("round trip", max_results=2, use_cache=False)
+    restored = SearchOutcome.from_dict(json.loads(json.dumps(outcome.to_dict())))
+    assert restored.to_dict() == outcome.to_dict()
+
+
+def test_format_reports_failure():
+    text = format_search_outcome(SearchOutcome("nothing"))
+    assert "[ERROR] All search engines failed" in text
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""user-007: 原子、多进程共享的 SQLite 配额计数与批量预占（lease）"""
+
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from multi_search import QuotaManager
+
+
+def _use_many(path: str, attempts: int) -> int:
+    manager = QuotaManager(path=path, limits={'tavily': 25})
+    return sum(manager.use_quota('tavily') for _ in range(attempts))
+
+
+def _db_used(path: str) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT used FROM quota WHERE service = 'tavily'").fetchone()[0]
+
+
+def test_limit_is_enforced_in_memory():
+    manager = QuotaManager(path=None, limits={'tavily': 3})
+    assert [manager.use_quota('tavily') for _ in range(4)] == [True, True, True, False]
+    assert manager.get_quota_status()['tavily'] == {'used': 3, 'limit': 3, 'remaining': 0}
+    assert not manager.use_quota('unknown')
+
+
+def test_processes_never_exceed_shared_limit(tmp_path):
+    path = str(tmp_path / "quota.db")
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        granted = sum(executor.map(_use_many, [path] * 3, [15] * 3))
+    assert granted == 25
+    assert _db_used(path) == 25
+
+
+def test_threads_share_one_manager_atomically(tmp_path):
+    manager = QuotaManager(path=str(tmp_path / "quota.db"), limits={'tavily': 40})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        granted = sum(executor.map(lambda _: manager.use_quota('tavily'), range(60)))
+    assert granted == 40
+
+
+def test_lease_reserves_in_batches_and_releases_unused(tmp_path):
+    path = str(tmp_path / "quota.db")
+    manager = QuotaManager(path=path, limits={'tavily': 100}, lease_size=5)
+    assert manager.use_quota('tavily') and manager.use_quota('tavily')
+    assert _db_used(path) == 5
+    assert manager.get_quota_status()['tavily']['used'] == 2
+    manager.release_leases()
+    assert _db_used(path) == 2
+
+
+def test_refund_returns_unused_charge(tmp_path):
+    path = str(tmp_path / "quota.db")
+    manager = QuotaManager(path=path, limits={'tavily': 1})
+    assert manager.use_quota('tavily')
+    manager.refund('tavily')
+    assert manager.get_quota_status()['tavily']['used'] == 0
+    assert manager.use_quota('tavily')
+    manager.refund('tavily')
+    manager.release_leases()
+    assert _db_used(path) == 0
+
+
+def test_new_month_resets_usage(tmp_path):
+    path = str(tmp_path / "quota.db")
+    manager = QuotaManager(path=path, limits={'tavily': 10})
+    with sqlite3.connect(path) as db:
+        db.execute("INSERT OR REPLACE INTO quota (service, period, used) VALUES ('tavily', '2000-01', 10)")
+    assert manager.get_quota_status()['tavily']['used'] == 0
+    assert manager.use_quota('tavily')
+    assert _db_used(path) == 1
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""user-004: 竞速（hedged）引擎策略"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from multi_search import RateLimiter
+
+
+def test_race_returns_fastest_engine(searcher, config):
+    config.latency['ddg'] = 0.6
+    started = time.perf_counter()
+    outcome = searcher.run("race", 3, strategy="race", hedge_delay=0, use_cache=False)
+    assert outcome.engine == "Bing Scraper" and outcome.results
+    assert time.perf_counter() - started < 0.6
+
+
+def test_paid_engines_only_fall_back_by_default(searcher, config):
+    outcome = searcher.run("race", 3, strategy="race", hedge_delay=0, use_cache=False)
+    assert outcome.results
+    assert config.requests['bingapi'] == 0 and config.requests['tavily'] == 0
+    assert searcher.quota_manager.get_quota_status()['bing_api']['used'] == 0
+
+
+def test_queued_paid_engine_is_not_billed_after_a_win(searcher, config):
+    config.latency['ddg'] = 0.1
+    searcher._executor = ThreadPoolExecutor(max_workers=1)
+    outcome = searcher.run("race", 3, strategy="race", hedge_delay=0, race_paid=True, use_cache=False)
+    searcher._executor.shutdown(wait=True)
+    assert outcome.engine == "DuckDuckGo"
+    assert config.requests['bingapi'] == 0
+    assert searcher.quota_manager.get_quota_status()['bing_api']['used'] == 0
+
+
+def test_loser_waiting_on_rate_limit_skips_its_request(searcher, config):
+    config.latency['ddg'] = 0.2
+    limiter = RateLimiter(path=None, limits={'bing': (2.0, 1)}, max_wait=5)
+    limiter.acquire('bing')
+    searcher.bing_scraper.rate_limiter = limiter
+    searcher.health.probe_all()
+    samples = searcher.health.snapshot()['bing']['samples']
+    outcome = searcher.run("race", 3, strategy="race", hedge_delay=0, use_cache=False)
+    assert outcome.engine == "DuckDuckGo"
+    searcher._executor.shutdown(wait=True)
+    assert config.requests['bing'] == 0
+    assert searcher.health.snapshot()['bing']['samples'] == samples
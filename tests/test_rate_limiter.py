@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""user-019: 跨进程共享的按主机 GCRA 限速器"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import formatdate
+
+import pytest
+
+from multi_search import (
+    LocalIndex, PageCache, RateLimited, RateLimiter, WebContentFetcher, _host_key, retry_after_seconds,
+)
+
+
+def timed_acquires(limiter: RateLimiter, key: str, count: int) -> float:
+    started = time.monotonic()
+    for _ in range(count):
+        limiter.acquire(key)
+    return time.monotonic() - started
+
+
+def acquire_in_process(path: str, count: int):
+    limiter = RateLimiter(path=path, limits={'shared': (40.0, 1)}, max_wait=10)
+    return [(limiter.acquire('shared'), time.time())[1] for _ in range(count)]
+
+
+def test_burst_then_steady_rate():
+    limiter = RateLimiter(path=None, limits={'k': (20.0, 3)})
+    assert timed_acquires(limiter, 'k', 3) < 0.03
+    assert timed_acquires(limiter, 'k', 3) >= 0.12
+    assert limiter.get_stats()['delayed'] == 3
+
+
+def test_unlimited_keys_never_wait():
+    limiter = RateLimiter(path=None, limits={})
+    assert timed_acquires(limiter, 'anything', 50) < 0.05
+
+
+def test_queue_longer_than_max_wait_is_rejected():
+    limiter = RateLimiter(path=None, limits={'k': (1.0, 1)}, max_wait=0.1)
+    limiter.acquire('k')
+    with pytest.raises(RateLimited):
+        limiter.acquire('k')
+    assert limiter.get_stats()['rejected'] == 1
+
+
+def test_default_host_limit_applies_per_host():
+    limiter = RateLimiter(path=None, limits={'host': (1.0, 1)}, max_wait=0.1)
+    limiter.acquire('host:a.example')
+    limiter.acquire('host:b.example')
+    with pytest.raises(RateLimited):
+        limiter.acquire('host:a.example')
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds({'Retry-After': '7'}) == 7
+    assert 50 <= retry_after_seconds({'Retry-After': formatdate(time.time() + 60, usegmt=True)}) <= 60
+    assert retry_after_seconds({'retry-after': 'soon'}, default=3.0) == 3.0
+    assert retry_after_seconds({'Retry-After': '99999'}) == 600.0
+
+
+def test_503_pauses_the_host(server, config, transport):
+    limiter = RateLimiter(path=None, limits={'host': (100.0, 5)}, max_wait=0.5)
+    fetcher = WebContentFetcher(transport=transport, page_cache=PageCache(path=None),
+                                local_index=LocalIndex(path=None), rate_limiter=limiter)
+    config.failure_rate['page'] = 1.0
+    url = f"{server.base_url}/page/1"
+    assert not fetcher.fetch(url, use_cache=False)['success']
+    assert limiter.blocked_for(_host_key(url)) > 20
+    sent = config.requests['page']
+    result = fetcher.fetch(url, use_cache=False)
+    assert not result['success'] and "queue longer" in result["error"]
+    assert config.requests['page'] == sent
+
+
+def test_limit_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "rate_limit.db")
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        stamps = sorted(stamp for batch in pool.map(acquire_in_process, [path, path], [6, 6]) for stamp in batch)
+    assert stamps[-1] - stamps[0] >= 11 / 40.0 * 0.9
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""user-003: 搜索结果缓存（内存 LRU + SQLite 磁盘、按引擎 TTL）"""
+
+import time
+
+from multi_search import ResultCache
+
+
+def test_repeated_query_served_from_cache(searcher, config):
+    first = searcher.run("python tutorial", 3)
+    again = searcher.run("  Python   TUTORIAL ", 3)
+    assert first.results and not first.cached
+    assert again.cached and again.results == first.results
+    assert config.requests['ddg'] == 1
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = ResultCache(path=None, memory_size=2)
+    for key in ("a", "b"):
+        cache.put(key, "duckduckgo", [{'href': key}])
+    cache.get("a")
+    cache.put("c", "duckduckgo", [{'href': 'c'}])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_entries_expire_after_engine_ttl():
+    cache = ResultCache(path=None, ttl={'duckduckgo': 0.05})
+    cache.put("k", "duckduckgo", [{'href': 'x'}])
+    assert cache.get("k")['engine'] == "duckduckgo"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultCache(path=path).put("k", "bing", [{'href': 'https://example.com/'}])
+    cache = ResultCache(path=path)
+    assert cache.get("k") == {'engine': 'bing', 'results': [{'href': 'https://example.com/'}]}
+    assert cache.get_stats()['disk_hits'] == 1
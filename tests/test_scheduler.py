@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""user-009: 按观测延迟、失败率和配额自适应排序引擎"""
+
+from multi_search import EngineScheduler, SearchPolicy
+
+QUOTA = {'tavily': {'used': 0, 'limit': 100, 'remaining': 100}, 'bing_api': {'used': 0, 'limit': 100, 'remaining': 100}}
+
+
+def plan():
+    return [{'name': name, 'key': key, 'engine': None, 'quota': quota, 'message': ''}
+            for name, key, quota in (("DuckDuckGo", "duckduckgo", None), ("Bing API", "bing_api", "bing_api"),
+                                     ("Bing Scraper", "bing", None))]
+
+
+def order(steps):
+    return [step['key'] for step in steps]
+
+
+def test_cold_start_keeps_fixed_priority():
+    assert order(EngineScheduler().rank(plan(), QUOTA)) == ["duckduckgo", "bing_api", "bing"]
+
+
+def test_failing_engine_is_demoted():
+    scheduler = EngineScheduler()
+    for _ in range(20):
+        scheduler.record("duckduckgo", 0.5, "error")
+        scheduler.record("bing", 0.1, "ok")
+    ranked = scheduler.rank(plan(), QUOTA)
+    assert order(ranked)[-1] == "duckduckgo"
+    assert any("empty/error" in reason for reason in ranked[-1]['reasons'])
+
+
+def test_policy_filters_paid_and_slow_engines():
+    scheduler = EngineScheduler(SearchPolicy(allow_paid=False, max_latency=1.0))
+    for _ in range(5):
+        scheduler.record("duckduckgo", 3.0, "ok")
+    assert order(scheduler.rank(plan(), QUOTA)) == ["bing", "duckduckgo"]
+    assert scheduler.snapshot()['last_decision'][-1] == {
+        'engine': 'bing_api', 'score': None, 'reasons': ['paid engines disabled by policy'], 'excluded': True}
+
+
+def test_quota_reserve_excludes_nearly_exhausted_engine():
+    quota = dict(QUOTA, bing_api={'used': 95, 'limit': 100, 'remaining': 5})
+    assert "bing_api" not in order(EngineScheduler(SearchPolicy(quota_reserve=0.1)).rank(plan(), quota))
+
+
+def test_search_outcomes_feed_the_scheduler(searcher, config):
+    config.failure_rate['ddg'] = 1.0
+    outcome = searcher.run("adaptive", 3, use_cache=False)
+    assert outcome.engine == "Bing API"
+    stats = searcher.scheduler.snapshot()['stats']
+    assert stats['duckduckgo']['error_rate'] == 1.0 and stats['bing_api']['samples'] == 1
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""user-006: 进程内复用的 MultiSearch 单例与可选依赖的延迟导入"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import multi_search
+from multi_search import get_multi_search, lazy_import, measure_cold_start
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_optional_dependencies():
+    code = ("import sys, multi_search\n"
+            "print(','.join(m for m in ('requests', 'ddgs', 'duckduckgo_search', 'bs4', 'tavily', 'lxml')"
+            " if m in sys.modules))")
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                               env=dict(os.environ, MULTI_SEARCH_DAEMON="0"), timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == ""
+
+
+def test_multi_search_is_a_process_wide_singleton(monkeypatch):
+    created = []
+    monkeypatch.setattr(multi_search, "MultiSearch", lambda: created.append(1) or object())
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append(get_multi_search())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_lazy_import_falls_back_and_caches():
+    module = lazy_import("module_that_does_not_exist", "json")
+    assert module is sys.modules["json"]
+    assert lazy_import("json") is module
+
+
+def test_measure_cold_start_reports_import_time():
+    report = measure_cold_start()
+    assert report['import_ms'] > 0 and report['first_query_ms'] is None
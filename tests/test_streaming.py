@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""user-021: 按引擎产出顺序逐条返回紧凑结果的流式生成器 API"""
+
+import itertools
+
+import pytest
+
+from multi_search import SearchResult, iter_fetch, iter_search
+
+
+def test_search_result_is_dict_like():
+    data = {'title': 't', 'href': 'https://example.com', 'body': 'b', 'source': 'duckduckgo'}
+    result = SearchResult.from_dict(data)
+    assert result['title'] == 't' and result.get('full_content') is None
+    with pytest.raises(KeyError):
+        result['duplicate_of']
+    assert result.to_dict() == data
+    assert not hasattr(result, '__dict__')
+
+
+def test_iter_search_matches_search_and_caches(searcher, config):
+    streamed = list(iter_search("streaming", max_results=4))
+    assert all(isinstance(result, SearchResult) for result in streamed)
+    assert [r.to_dict() for r in streamed] == searcher.search("streaming", max_results=4)
+    assert config.requests['ddg'] == 1
+
+
+def test_early_stop_is_not_cached(searcher, config):
+    assert len(list(itertools.islice(iter_search("partial", max_results=5), 2))) == 2
+    assert len(list(iter_search("partial", max_results=5))) == 5
+    assert config.requests['ddg'] == 2
+
+
+def test_iter_search_falls_back(searcher, config):
+    config.failure_rate['ddg'] = 1.0
+    assert {result.source for result in iter_search("fallback", max_results=3)} == {'bing_api'}
+
+
+def test_iter_fetch_yields_fetched_records(fetcher, page_results):
+    results = page_results(4)
+    fetched = list(iter_fetch(results, max_length=500, dedup=False))
+    assert sorted(r.href for r in fetched) == sorted(r['href'] for r in results)
+    assert all(r.full_content['success'] and r['full_content']['content'] for r in fetched)
+
+
+def test_iter_fetch_accepts_search_results(searcher, fetcher):
+    records = list(iter_search("pipeline", max_results=3))
+    stream = iter_fetch(records, max_length=300, dedup=False)
+    first = next(stream)
+    stream.close()
+    assert first.href in {r.href for r in records} and first.full_content['url'] == first.href
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""user-012: 流式、限制字节数的网页下载"""
+
+import pytest
+
+import multi_search
+from benchmark import make_page
+from multi_search import (
+    FETCH_MIN_BYTES, HTML_EXTRACTORS, Metrics, _PageReader, fetch_byte_limit, get_html_extractor,
+)
+
+HTML = {'Content-Type': 'text/html; charset=utf-8'}
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = Metrics(enabled=True)
+    monkeypatch.setattr(multi_search, "_metrics", metrics)
+    return metrics
+
+
+def installed():
+    names = []
+    for name in HTML_EXTRACTORS:
+        try:
+            get_html_extractor(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def fetched_bytes(metrics) -> float:
+    return metrics.snapshot()['counters'].get('fetch_bytes_total', 0)
+
+
+def test_byte_limit_scales_with_max_length():
+    assert fetch_byte_limit(10) == FETCH_MIN_BYTES
+    assert fetch_byte_limit(10 ** 9) == multi_search.FETCH_MAX_BYTES
+
+
+@pytest.mark.parametrize("name", installed())
+def test_download_stops_once_enough_text(fetcher, server, metrics, monkeypatch, name):
+    monkeypatch.setattr(multi_search, "_html_extractor", get_html_extractor(name))
+    url = f"{server.base_url}/page/1?size={4 * 1024 * 1024}"
+    result = fetcher.fetch(url, max_length=500, use_cache=False)
+    assert result['success'] and len(result['content']) <= 503
+    assert fetched_bytes(metrics) < 256 * 1024
+    full = get_html_extractor(name).extract_page(make_page(4 * 1024 * 1024, seed=1), 500)
+    assert (result['title'], result['content']) == full
+
+
+def test_download_is_capped(fetcher, server, metrics):
+    result = fetcher.fetch(f"{server.base_url}/page/2?size={1024 * 1024}", max_length=10 ** 6, use_cache=False,
+                           max_bytes=64 * 1024)
+    assert result['success'] and result['content']
+    assert fetched_bytes(metrics) == 64 * 1024
+
+
+@pytest.mark.parametrize("head", [b'%PDF-1.7\n', b'\x89PNG\r\n\x1a\n', b'PK\x03\x04', b'<html>\x00\x00\x00'])
+def test_binary_content_is_rejected(head):
+    with pytest.raises(ValueError):
+        _PageReader(HTML, 1000).feed(head + b'x' * 100)
+
+
+def test_unsupported_content_type_is_rejected():
+    with pytest.raises(ValueError):
+        _PageReader({'Content-Type': 'application/pdf'}, 1000)
+
+
+def test_meta_charset_is_honoured():
+    reader = _PageReader({'Content-Type': 'text/html'}, 1000)
+    reader.feed('<html><head><meta charset="gbk"><title>标题</title></head><body><p>正文内容</p></body></html>'
+                .encode('gbk'))
+    title, content = reader.finish()
+    assert title == "标题" and "正文内容" in content
+
+
+def test_hold_and_drain_match_feed():
+    page = make_page(64 * 1024, seed=5).encode('utf-8')
+    chunks = [page[i:i + 4096] for i in range(0, len(page), 4096)]
+    fed = _PageReader(HTML, 2000)
+    for chunk in chunks:
+        if fed.feed(chunk):
+            break
+    held = _PageReader(HTML, 2000)
+    for chunk in chunks:
+        if held.hold(chunk) or (held.pending_bytes >= 16384 and held.drain()):
+            break
+    assert held.finish() == fed.finish()
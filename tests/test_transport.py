@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""user-002: 所有引擎、网络检测器和网页抓取器共享同一个带连接池的 HTTP 传输层"""
+
+import time
+
+import pytest
+import requests
+
+import multi_search
+from multi_search import HttpTransport, MultiSearch, QuotaManager, ResultCache, configure_transport, get_transport
+
+
+def test_engines_checker_and_fetcher_share_one_transport(monkeypatch):
+    monkeypatch.setattr(multi_search, "_transport", None)
+    searcher = MultiSearch(result_cache=ResultCache(path=None), quota_manager=QuotaManager(path=None))
+    shared = get_transport()
+    assert searcher.transport is shared
+    assert searcher.network_checker.transport is shared
+    assert searcher.duckduckgo.transport is shared and searcher.bing_scraper.transport is shared
+    assert multi_search.get_web_fetcher().transport is shared
+    searcher.health.stop()
+
+
+def test_configure_transport_replaces_shared_transport(monkeypatch):
+    monkeypatch.setattr(multi_search, "_transport", None)
+    old = get_transport()
+    new = configure_transport(max_retries=0, timeout=3)
+    assert new is get_transport() and new is not old
+    assert (new.max_retries, new.timeout) == (0, 3)
+    new.close()
+
+
+def test_session_reused_across_requests(server, transport):
+    session = transport.session
+    for _ in range(3):
+        assert transport.get(f"{server.base_url}/health/ddg").status_code == 200
+    assert transport.session is session
+
+
+def test_retries_server_errors(server, config):
+    config.failure_rate['bingapi'] = 1.0
+    transport = HttpTransport(max_retries=2, backoff_factor=0)
+    response = transport.get(f"{server.base_url}/bingapi", params={'q': 'x'})
+    assert response.status_code == 503
+    assert config.requests['bingapi'] == 3
+    transport.close()
+
+
+def test_read_timeouts_are_not_retried(server, config):
+    config.latency['ddg'] = 0.5
+    transport = HttpTransport(max_retries=2, backoff_factor=0)
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        transport.get(f"{server.base_url}/ddg", params={'q': 'x'}, timeout=0.2)
+    assert time.monotonic() - started < 0.45
+    assert config.requests['ddg'] == 1
+    transport.close()